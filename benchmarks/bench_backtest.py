@@ -0,0 +1,71 @@
+"""
+Benchmark the vectorized backtester on the hourly BTC history.
+
+Runs every entry signal on datasets/modified_bitcoin_data_hourly_1.csv (56k
+hourly bars), checks the equity curve against a straightforward per-bar loop
+and prints the wall time of both.
+
+Usage: python benchmarks/bench_backtest.py [csv file]
+"""
+
+# Import required libraries
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'indicators'))
+from backtest import ENTRIES, load_prices, run_backtest
+
+HOLD = 24
+COST = 0.001
+
+
+def loop_backtest(close, entries, hold=HOLD, cost=COST):
+    # Reference implementation: one bar at a time
+    equity, value, left, held = [], 1.0, 0, []
+    for t in range(len(close)):
+        held.append(1 if left > 0 else 0)
+        if left > 0:
+            left -= 1
+        if entries[t]:
+            left = hold
+    for t in range(len(close)):
+        if held[t]:
+            r = close[t] / close[t - 1] - 1
+            if t == 0 or not held[t - 1]:
+                r -= cost
+            if t == len(close) - 1 or not held[t + 1]:
+                r -= cost
+            value *= 1 + r
+        equity.append(value)
+    return np.array(equity)
+
+
+def run(file_path):
+    data = load_prices(file_path)
+    close = data['close'].to_numpy(dtype=float)
+    print(f"{len(data)} bars from {os.path.basename(file_path)}")
+    for name, entries_of in ENTRIES.items():
+        start = time.perf_counter()
+        entries = entries_of(data)
+        signal_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bars, trades, stats = run_backtest(data, entries, hold=HOLD, cost=COST)
+        vector_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference = loop_backtest(close, entries.to_numpy())
+        loop_time = time.perf_counter() - start
+
+        assert np.allclose(bars['equity'].to_numpy(), reference, rtol=1e-9, atol=0)
+        print(f"{name:>10}: signals {signal_time * 1000:6.1f}ms  backtest {vector_time * 1000:6.1f}ms  "
+              f"per-bar loop {loop_time * 1000:7.1f}ms  ({stats['trades']} trades, "
+              f"total return {stats['total_return']:+.2%}, max drawdown {stats['max_drawdown']:.2%})")
+
+
+if __name__ == '__main__':
+    run(sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'datasets', 'modified_bitcoin_data_hourly_1.csv'))
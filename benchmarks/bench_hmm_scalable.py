@@ -0,0 +1,84 @@
+"""
+Benchmark the scalable HMM training path against the current full-matrix fit.
+
+Simulates a minute-level history of regime-switching features and trains a
+3-state full-covariance HMM two ways, each in a fresh process so its peak RSS
+is measured on its own:
+
+- current:   float64 matrix, one sequence, GaussianHMM.fit (as train_hmm does)
+- scalable:  float32 matrix, segments as separate sequences, mini-batch EM
+
+Both models are then scored on the whole history.
+
+Usage: python benchmarks/bench_hmm_scalable.py [n_rows]   (default 3,000,000)
+"""
+
+# Import required libraries
+import multiprocessing
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_science'))
+
+
+def simulate(n_rows, dtype, seed=0):
+    """
+    Return (n_rows x 3) standardized features from a 3-regime Markov chain.
+    """
+    rng = np.random.default_rng(seed)
+    transmat = np.array([[0.995, 0.004, 0.001], [0.003, 0.994, 0.003], [0.002, 0.008, 0.99]])
+    means = np.array([[0.1, -0.5, 0.0], [-0.1, 0.3, 0.2], [-0.5, 2.0, 0.8]])
+    scales = np.array([0.6, 1.0, 2.0])
+    # Regime path in blocks, to keep the simulation's own memory small
+    X = np.empty((n_rows, 3), dtype=dtype)
+    state = 0
+    for start in range(0, n_rows, 100000):
+        stop = min(start + 100000, n_rows)
+        u = rng.random(stop - start)
+        states = np.empty(stop - start, dtype=np.int8)
+        cumulative = np.cumsum(transmat, axis=1)
+        for i in range(stop - start):
+            state = int(np.searchsorted(cumulative[state], u[i]))
+            states[i] = state
+        X[start:stop] = means[states] + scales[states, None] * rng.normal(size=(stop - start, 3))
+    return X
+
+
+def run_current(n_rows, queue):
+    from hmm import fit_restart
+    from hmm_scalable import score_segments
+
+    start = time.time()
+    X = simulate(n_rows, np.float64)
+    model, stats = fit_restart(X, 3, 42, 100)
+    seconds = time.time() - start
+    queue.put(('current', seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+               score_segments(model, X) / n_rows, stats['iterations']))
+
+
+def run_scalable(n_rows, queue):
+    from hmm_scalable import fit_minibatch, score_segments
+
+    start = time.time()
+    X = simulate(n_rows, np.float32)
+    model, history = fit_minibatch(X, 3, verbose=False)
+    seconds = time.time() - start
+    queue.put(('scalable', seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+               score_segments(model, X) / n_rows, len(history)))
+
+
+if __name__ == '__main__':
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 3000000
+    print(f"{n_rows} rows, 3 features, 3 states")
+    queue = multiprocessing.Queue()
+    for target in (run_current, run_scalable):
+        process = multiprocessing.Process(target=target, args=(n_rows, queue))
+        process.start()
+        name, seconds, peak_mb, log_likelihood, iterations = queue.get()
+        process.join()
+        print(f"{name:>9}: {seconds:7.1f}s  peak RSS {peak_mb:8.1f} MB  "
+              f"log-likelihood/row {log_likelihood:.4f}  ({iterations} iterations/passes)")
@@ -0,0 +1,71 @@
+"""
+Benchmark regime plotting on a long minute-level series.
+
+Simulates a multi-year minute history with a 3-state regime path and renders it
+to a PNG two ways:
+
+- current:  fill_between over every bar for every state, full-resolution lines
+- fast:     one rectangle per regime spell, min/max-downsampled lines (fast_plot)
+
+Usage: python benchmarks/bench_plot.py [n_rows] [output_dir]   (default 3,000,000 rows, i.e. ~5.7 years)
+"""
+
+# Import required libraries
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data_science'))
+
+from fast_plot import plot_regimes
+
+
+def simulate(n_rows, seed=0):
+    """
+    Return a DataFrame with 'Close' and 'Returns' columns and a states array.
+    """
+    rng = np.random.default_rng(seed)
+    # Regime spells with geometric durations (mean 500 bars)
+    lengths = rng.geometric(1 / 500, size=n_rows // 100 + 1)
+    labels = rng.integers(0, 3, size=len(lengths))
+    states = np.repeat(labels, lengths)[:n_rows]
+    returns = rng.normal(0, np.array([0.0005, 0.001, 0.003])[states])
+    close = 10000 * np.exp(np.cumsum(returns))
+    index = pd.date_range('2019-01-01', periods=n_rows, freq='min')
+    return pd.DataFrame({'Close': close, 'Returns': returns}, index=index), states
+
+
+def plot_current(data, states, output, n_components=3):
+    # The original plot_results, saved instead of shown
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10), sharex=True)
+    ax1.plot(data.index, data['Close'])
+    for state in range(n_components):
+        mask = (states == state)
+        ax1.fill_between(data.index, data['Close'].min(), data['Close'].max(),
+                         where=mask, alpha=0.3, label=f'State {state}')
+    ax1.legend()
+    ax2.plot(data.index, data['Returns'])
+    plt.tight_layout()
+    fig.savefig(output)
+    plt.close(fig)
+
+
+if __name__ == '__main__':
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 3000000
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else tempfile.mkdtemp()
+    os.makedirs(output_dir, exist_ok=True)
+    data, states = simulate(n_rows)
+    print(f"{n_rows} minute bars, {int((np.diff(states) != 0).sum()) + 1} regime spells")
+
+    for name, plot in (('current', plot_current), ('fast', plot_regimes)):
+        output = os.path.join(output_dir, f'{name}.png')
+        start = time.time()
+        plot(data, states, output=output)
+        print(f"{name:>8}: {time.time() - start:7.2f}s  -> {output}")
@@ -0,0 +1,301 @@
+"""
+Benchmark suite for the indicator kernels, the universe scans and the HMM steps.
+
+Groups:
+- kernel:   Bankery, calculate_rsi and calculate_rsi_ift (EMA and SMA) on one
+            series of 1k, 100k and 1M bars
+- universe: the same functions called per symbol over a crypto (70), BIST (500)
+            and US (8000) sized universe of 1000 daily bars
+- panel:    the batched panel engines on the same universes
+- scan:     end-to-end scan.py wall time per market against the offline replay feed
+- hmm:      feature preparation, training and prediction on the hourly BTC dataset
+
+Every case is run up to --repeat times (fewer when it exceeds the time budget)
+and the best and median times are written as JSON. With --baseline, the run is
+compared with an earlier JSON file and fails (exit code 1) when a case got
+slower than the threshold allows.
+
+Usage:
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --baseline before.json --threshold 0.2
+    python benchmarks/suite.py --groups kernel panel --quick
+"""
+
+# Import required libraries
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+INDICATORS = os.path.join(ROOT, 'indicators')
+DATA_SCIENCE = os.path.join(ROOT, 'data_science')
+sys.path.insert(0, INDICATORS)
+sys.path.insert(0, DATA_SCIENCE)
+
+GROUPS = ['kernel', 'universe', 'panel', 'scan', 'hmm']
+SERIES_LENGTHS = [1000, 100000, 1000000]
+UNIVERSES = {'crypto': 70, 'turkey': 500, 'america': 8000}
+HMM_DATASET = os.path.join(ROOT, 'datasets', 'modified_bitcoin_data_hourly_1.csv')
+
+
+def random_bars(n_bars, rng):
+    """
+    Return a DataFrame of random-walk OHLC bars.
+    """
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+    open_ = close * (1 + rng.normal(0, 0.005, n_bars))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, n_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, n_bars)))
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close})
+
+
+def measure(func, repeat=3, budget=10.0):
+    """
+    Time a callable.
+
+    Parameters:
+    - func: Callable with no arguments.
+    - repeat: Maximum number of runs.
+    - budget: Stop repeating once the runs so far took longer than this (seconds).
+
+    Returns:
+    - A dictionary with the best and median time (seconds) and the number of runs.
+    """
+    times = []
+    while len(times) < repeat and (not times or sum(times) < budget):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'seconds': min(times), 'median': float(np.median(times)), 'runs': len(times)}
+
+
+def indicator_functions():
+    # Name -> function of one OHLC DataFrame
+    from strategies import Bankery, calculate_rsi, calculate_rsi_ift
+
+    return {
+        'Bankery': Bankery,
+        'calculate_rsi': calculate_rsi,
+        'calculate_rsi_ift_ema': lambda data: calculate_rsi_ift(data, smoothing='ema'),
+        'calculate_rsi_ift_sma': lambda data: calculate_rsi_ift(data, smoothing='sma'),
+    }
+
+
+def kernel_cases(lengths):
+    rng = np.random.default_rng(0)
+    functions = indicator_functions()
+    for n_bars in lengths:
+        data = random_bars(n_bars, rng)
+        for name, func in functions.items():
+            yield f"kernel/{name}/{n_bars}", (lambda func=func, data=data: func(data))
+
+
+def universe_frames(n_symbols, n_bars=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return [(f"S{i:05d}", random_bars(n_bars, rng)) for i in range(n_symbols)]
+
+
+def universe_cases(universes):
+    functions = indicator_functions()
+    for market, n_symbols in universes.items():
+        frames = universe_frames(n_symbols)
+        for name, func in functions.items():
+            yield (f"universe/{name}/{n_symbols}",
+                   lambda func=func, frames=frames: [func(data) for _, data in frames])
+
+
+def panel_cases(universes):
+    from panel import stack_panel, bankery_panel, rsi_panel, rsi_ift_panel
+
+    for market, n_symbols in universes.items():
+        frames = universe_frames(n_symbols)
+        yield f"panel/stack_panel/{n_symbols}", lambda frames=frames: stack_panel(frames)
+        _, panel = stack_panel(frames)
+        close = panel['close']
+        yield f"panel/bankery_panel/{n_symbols}", lambda panel=panel: bankery_panel(panel)
+        yield f"panel/rsi_panel/{n_symbols}", lambda close=close: rsi_panel(close)
+        yield f"panel/rsi_ift_panel_ema/{n_symbols}", lambda close=close: rsi_ift_panel(close, smoothing='ema')
+        yield f"panel/rsi_ift_panel_sma/{n_symbols}", lambda close=close: rsi_ift_panel(close, smoothing='sma')
+
+
+def run_replay_scan(market, n_symbols, latency=0.0):
+    """
+    Run scan.py for a market against the replay feed in a fresh process.
+
+    Returns:
+    - The scan's end-to-end time in seconds (without the interpreter start-up).
+    """
+    command = [sys.executable, 'replay_feed.py', '--symbols', str(n_symbols), '--latency', str(latency),
+               '--quiet', 'scan.py', '--market', market, '--no-history']
+    process = subprocess.run(command, cwd=INDICATORS, capture_output=True, text=True)
+    match = re.search(r'([\d.]+)s end to end', process.stderr)
+    if process.returncode != 0 or match is None:
+        raise RuntimeError(f"scan of {market} failed:\n{process.stderr}")
+    return float(match.group(1))
+
+
+def scan_cases(universes, latency=0.0):
+    for market, n_symbols in universes.items():
+        def scan(market=market, n_symbols=n_symbols):
+            scan.times.append(run_replay_scan(market, n_symbols, latency))
+        scan.times = []  # Times measured inside the scan processes, reported instead of the outer ones
+        yield f"scan/{market}/{n_symbols}", scan
+
+
+def hmm_cases(path=HMM_DATASET):
+    from hmm import load_and_preprocess_data, train_hmm, predict_states
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        data = load_and_preprocess_data(path)  # Also builds the columnar copy once
+    state = {}
+
+    def features():
+        with contextlib.redirect_stdout(io.StringIO()):
+            load_and_preprocess_data(path)
+
+    def train():
+        with contextlib.redirect_stdout(io.StringIO()):
+            state['model'], state['scaler'] = train_hmm(data, n_components=3, n_restarts=1)
+
+    def predict():
+        with contextlib.redirect_stdout(io.StringIO()):
+            predict_states(state['model'], data, state['scaler'])
+
+    yield f"hmm/features/{len(data)}", features
+    yield f"hmm/train/{len(data)}", train
+    yield f"hmm/predict/{len(data)}", predict
+
+
+def run_suite(groups=GROUPS, quick=False, repeat=3, budget=10.0, latency=0.0, verbose=True):
+    """
+    Run the selected benchmark groups.
+
+    Parameters:
+    - groups: Names of the groups to run (see GROUPS).
+    - quick: Skip the largest series length and universe.
+    - repeat: Maximum number of runs per case.
+    - budget: Time budget per case (seconds) after which no more runs are started.
+    - latency: Per-request latency of the replay feed in the scan group (seconds).
+    - verbose: Print every case as it finishes.
+
+    Returns:
+    - A dictionary {'meta': ..., 'results': {case: timing}} ready to be written as JSON.
+    """
+    lengths = SERIES_LENGTHS[:-1] if quick else SERIES_LENGTHS
+    universes = dict(list(UNIVERSES.items())[:-1]) if quick else UNIVERSES
+    factories = {
+        'kernel': lambda: kernel_cases(lengths),
+        'universe': lambda: universe_cases(universes),
+        'panel': lambda: panel_cases(universes),
+        'scan': lambda: scan_cases(universes, latency),
+        'hmm': lambda: hmm_cases(),
+    }
+
+    results = {}
+    for group in groups:
+        for name, func in factories[group]():
+            timing = measure(func, repeat, budget)
+            if hasattr(func, 'times'):
+                timing = {'seconds': min(func.times), 'median': float(np.median(func.times)), 'runs': len(func.times)}
+            results[name] = timing
+            if verbose:
+                print(f"{name:<45} {timing['seconds']:10.4f}s  (median {timing['median']:.4f}s, "
+                      f"{timing['runs']} runs)", flush=True)
+    return {'meta': environment(groups, quick, repeat), 'results': results}
+
+
+def environment(groups, quick, repeat):
+    """
+    Describe the machine, library versions and code version of a run.
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.platform(),
+        'cpus': os.cpu_count(),
+        'groups': list(groups),
+        'quick': quick,
+        'repeat': repeat,
+    }
+
+
+def compare(results, baseline, threshold=0.2, min_seconds=0.005):
+    """
+    Compare a run with a baseline run.
+
+    Parameters:
+    - results, baseline: Dictionaries returned by run_suite (or read from their JSON files).
+    - threshold: Allowed relative slowdown (0.2 = 20% slower).
+    - min_seconds: Cases faster than this in the baseline are reported but never fail (timer noise).
+
+    Returns:
+    - A tuple (table, regressions): a DataFrame of the common cases with their ratio
+      new/baseline, and the list of cases slower than the threshold allows.
+    """
+    rows = []
+    for name, timing in results['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['seconds']
+        after = timing['seconds']
+        ratio = after / before if before > 0 else float('inf')
+        regression = before >= min_seconds and ratio > 1 + threshold
+        rows.append({'case': name, 'baseline': before, 'current': after, 'ratio': ratio, 'regression': regression})
+    table = pd.DataFrame(rows, columns=['case', 'baseline', 'current', 'ratio', 'regression'])
+    return table, list(table.loc[table['regression'], 'case'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the indicator kernels, scans and HMM steps.")
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=GROUPS, help="Groups of cases to run.")
+    parser.add_argument('--quick', action='store_true', help="Skip the 1M-bar series and the 8000-symbol universe.")
+    parser.add_argument('--repeat', type=int, default=3, help="Maximum number of runs per case.")
+    parser.add_argument('--budget', type=float, default=10.0,
+                        help="Stop repeating a case once its runs took this long (seconds).")
+    parser.add_argument('--latency', type=float, default=0.0, help="Replay feed latency per request in the scans.")
+    parser.add_argument('--output', default=os.path.join(ROOT, 'benchmarks', 'results', 'latest.json'),
+                        help="JSON file the results are written to.")
+    parser.add_argument('--baseline', help="JSON file of an earlier run to compare with.")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="Fail when a case is more than this fraction slower than the baseline.")
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help="Baseline cases faster than this never fail the comparison.")
+    args = parser.parse_args()
+
+    run = run_suite(args.groups, args.quick, args.repeat, args.budget, args.latency)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(run, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        table, regressions = compare(run, baseline, args.threshold, args.min_seconds)
+        pd.set_option('display.max_rows', None)
+        print(table.to_string(index=False))
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}:")
+            for name in regressions:
+                print(f"  {name}")
+            sys.exit(1)
+        print(f"\nNo case slower than the baseline by more than {args.threshold:.0%}.")
@@ -0,0 +1,96 @@
+"""
+On-disk checkpoints for staged pipelines.
+
+Every stage output is pickled to '<root>/<stage>.pkl' next to a '<stage>.json'
+holding the key it was computed from. A stage's key is a hash of its
+parameters and of the keys of its inputs, so changing a file or a setting
+invalidates that stage and everything downstream of it, while unchanged stages
+are loaded from disk instead of recomputed.
+"""
+
+# Import required libraries
+import hashlib
+import json
+import os
+import pickle
+import time
+
+
+def make_key(*parts):
+    """
+    Return a hash of JSON-serializable parts (parameters and upstream keys).
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def file_key(path):
+    """
+    Return a key identifying the current version of a file (path, size and modification time).
+    """
+    stat = os.stat(path)
+    return make_key(os.path.abspath(path), stat.st_size, stat.st_mtime)
+
+
+class CheckpointStore:
+    """
+    Directory of stage outputs keyed by their inputs.
+    """
+
+    def __init__(self, root):
+        """
+        Parameters:
+        - root: Directory holding the checkpoints.
+        """
+        self.root = root
+
+    def _paths(self, stage):
+        return os.path.join(self.root, stage + '.pkl'), os.path.join(self.root, stage + '.json')
+
+    def has(self, stage, key):
+        """
+        Return True if the stage has a checkpoint computed from this key.
+        """
+        pkl_path, json_path = self._paths(stage)
+        if not (os.path.exists(pkl_path) and os.path.exists(json_path)):
+            return False
+        with open(json_path) as f:
+            return json.load(f).get('key') == key
+
+    def load(self, stage):
+        pkl_path, _ = self._paths(stage)
+        with open(pkl_path, 'rb') as f:
+            return pickle.load(f)
+
+    def save(self, stage, key, value, seconds=None):
+        """
+        Store a stage output atomically (the .json is written last, so a crash never
+        leaves a checkpoint that looks valid but is incomplete).
+        """
+        os.makedirs(self.root, exist_ok=True)
+        pkl_path, json_path = self._paths(stage)
+        with open(pkl_path + '.tmp', 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(pkl_path + '.tmp', pkl_path)
+        with open(json_path + '.tmp', 'w') as f:
+            json.dump({'key': key, 'saved': time.time(), 'seconds': seconds}, f)
+        os.replace(json_path + '.tmp', json_path)
+
+    def run(self, stage, key, compute, force=False):
+        """
+        Return the stage output, loading it when its key matches and computing it otherwise.
+
+        Parameters:
+        - stage: Stage name.
+        - key: Key of the stage inputs (see make_key).
+        - compute: Function with no arguments computing the output.
+        - force: Recompute even when the checkpoint is up to date.
+        """
+        if not force and self.has(stage, key):
+            print(f"[{stage}] up to date, loaded from checkpoint")
+            return self.load(stage)
+        print(f"[{stage}] running...")
+        start = time.time()
+        value = compute()
+        self.save(stage, key, value, seconds=time.time() - start)
+        print(f"[{stage}] done in {time.time() - start:.1f}s, checkpoint saved")
+        return value
@@ -1,23 +1,135 @@
-import pandas as pd
+"""
+Clean an exchange CSV export in constant memory.
+
+The file is read in chunks; every chunk has its columns dropped, renamed and
+rounded, and is written to a temporary chunk file. Exports are newest-first,
+so the output is put together by writing the chunks back in reverse order,
+each one reversed, without ever holding the whole file in memory.
+
+Usage (defaults reproduce the hourly Bitstamp conversion):
+    python data_cleaning.py
+    python data_cleaning.py export.csv cleaned.csv --chunksize 500000 \
+        --rename date=Date open=Open high=High low=Low close=Close volume=Volume
+"""
+
+# Import required libraries
+import argparse
+import os
+import shutil
+import tempfile
 import time
 
-# Load the CSV file
-#data = pd.read_csv('/home/umut/trade/data/bitcoin_2018-01-28_2024-10-28.csv')
-data = pd.read_csv('/home/umut/trade/data/Bitstamp_BTCUSD_1h.csv')
+import pandas as pd
+
+INPUT_PATH = '/home/umut/trade/data/Bitstamp_BTCUSD_1h.csv'
+OUTPUT_PATH = '/home/umut/trade/data/modified_bitcoin_data_hourly_1.csv'
+DROP_COLUMNS = ['unix', 'symbol', 'Volume BTC']
+ROUND_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def clean_chunk(chunk, drop=(), keep=None, rename=None, round_columns=(), decimals=2):
+    """
+    Apply the column selection, renaming and rounding to one chunk.
+
+    Parameters:
+    - chunk: DataFrame chunk of the input file.
+    - drop: Columns to drop.
+    - keep: Columns to keep, in this order (defaults to all remaining columns).
+    - rename: Dictionary of old name -> new name, applied after the selection.
+    - round_columns: Columns to round (names before renaming); dropped ones are skipped.
+    - decimals: Number of decimal places.
+
+    Returns:
+    - The cleaned chunk.
+    """
+    chunk = chunk.drop(columns=list(drop))
+    if keep:
+        chunk = chunk[list(keep)]
+    round_columns = [column for column in round_columns if column in chunk]
+    if round_columns:
+        chunk[round_columns] = chunk[round_columns].round(decimals)
+    if rename:
+        chunk = chunk.rename(columns=rename)
+    return chunk
+
+
+def convert(input_path, output_path, reverse=True, chunksize=200000, **options):
+    """
+    Stream 'input_path' through clean_chunk into 'output_path'.
+
+    Parameters:
+    - input_path: CSV export to clean.
+    - output_path: Cleaned CSV file.
+    - reverse: Reverse the row order (newest-first exports become chronological).
+    - chunksize: Number of rows held in memory at once.
+    - options: Passed to clean_chunk.
+
+    Returns:
+    - The number of rows written.
+    """
+    folder = os.path.dirname(os.path.abspath(output_path))
+    tmp_dir = tempfile.mkdtemp(prefix='data_cleaning_', dir=folder)
+    try:
+        header, parts, n_rows = None, [], 0
+        # Rounded columns are read as floats in every chunk, so that a chunk of whole
+        # numbers is not written as integers
+        dtype = {column: 'float64' for column in options.get('round_columns', ())}
+        for index, chunk in enumerate(pd.read_csv(input_path, chunksize=chunksize, dtype=dtype)):
+            chunk = clean_chunk(chunk, **options)
+            if reverse:
+                chunk = chunk.iloc[::-1]
+            if header is None:
+                header = chunk.iloc[:0].to_csv(index=False)
+            part = os.path.join(tmp_dir, f'{index:06d}.csv')
+            chunk.to_csv(part, index=False, header=False)
+            parts.append(part)
+            n_rows += len(chunk)
+
+        # Concatenate the chunk files; reversing their order completes the row reversal
+        tmp_path = os.path.join(tmp_dir, 'output.csv')
+        with open(tmp_path, 'w', newline='') as out:
+            out.write(header or '')
+            for part in (reversed(parts) if reverse else parts):
+                with open(part, newline='') as f:
+                    shutil.copyfileobj(f, out)
+        os.replace(tmp_path, output_path)
+        return n_rows
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def parse_rename(pairs):
+    # 'old=new' pairs to a dictionary
+    rename = {}
+    for pair in pairs or []:
+        old, sep, new = pair.partition('=')
+        if not sep:
+            raise ValueError(f"Expected old=new, got {pair!r}")
+        rename[old] = new
+    return rename
+
 
-# Drop unnecessary columns
-#data = data.drop(columns=['End', 'Market_Cap'])
-data = data.drop(columns=['unix', 'symbol', 'Volume BTC'])
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean an exchange CSV export in constant memory.")
+    parser.add_argument('input', nargs='?', default=INPUT_PATH, help="CSV export to clean.")
+    parser.add_argument('output', nargs='?', default=OUTPUT_PATH, help="Cleaned CSV file.")
+    parser.add_argument('--drop', nargs='*', default=DROP_COLUMNS, help="Columns to drop.")
+    parser.add_argument('--keep', nargs='*', help="Columns to keep, in order (defaults to all but the dropped ones).")
+    parser.add_argument('--rename', nargs='*', help="Renames as old=new pairs.")
+    parser.add_argument('--round', nargs='*', default=ROUND_COLUMNS, dest='round_columns', help="Columns to round.")
+    parser.add_argument('--decimals', type=int, default=2, help="Number of decimal places.")
+    parser.add_argument('--keep-order', action='store_true', help="Do not reverse the rows.")
+    parser.add_argument('--chunksize', type=int, default=200000, help="Number of rows held in memory at once.")
+    args = parser.parse_args(argv)
 
-# Reverse the rows of the DataFrame
-data = data.iloc[::-1].reset_index(drop=True)
+    start = time.time()
+    n_rows = convert(args.input, args.output, reverse=not args.keep_order, chunksize=args.chunksize,
+                     drop=args.drop, keep=args.keep, rename=parse_rename(args.rename),
+                     round_columns=args.round_columns, decimals=args.decimals)
 
-# Round the numeric columns to two decimal places
-#data[['Open', 'High', 'Low', 'Close', 'Volume']] = data[['Open', 'High', 'Low', 'Close', 'Volume']].round(2)
-data[['open', 'high', 'low', 'close', 'volume']] = data[['open', 'high', 'low', 'close', 'volume']].round(2)
+    # Display
+    print(f"Data has been saved to '{os.path.basename(args.output)}' ({n_rows} rows, {time.time() - start:.1f}s).")
 
-# Save the modified dataframe to a new CSV file
-data.to_csv('/home/umut/trade/data/modified_bitcoin_data_hourly_1.csv', index=False)
 
-# Display
-print("Data has been saved to 'modified_bitcoin_data_hourly_1.csv'.")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Columnar, memory-mapped copies of the CSV datasets.
+
+Every CSV is converted once into one raw .npy file per column plus a small
+schema.json, stored in a 'columnar/<name>/' directory next to the CSV. Loading
+then opens only the requested columns memory-mapped instead of re-parsing the
+whole text file. The copy is rebuilt automatically when the CSV changes.
+
+Usage: python dataset_store.py ../datasets/*.csv
+"""
+
+# Import required libraries
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Column names parsed as datetimes when converting
+DATE_COLUMNS = ('date', 'datetime', 'start', 'end', 'time', 'timestamp')
+
+
+def columnar_dir(csv_path):
+    """
+    Return the directory holding the columnar copy of a CSV file.
+    """
+    folder, name = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(folder, 'columnar', os.path.splitext(name)[0])
+
+
+def _source_stamp(csv_path):
+    stat = os.stat(csv_path)
+    return {'source_size': stat.st_size, 'source_mtime': stat.st_mtime}
+
+
+def read_schema(csv_path):
+    """
+    Return the schema of the columnar copy of a CSV file, or None if there is no
+    up-to-date copy.
+    """
+    path = os.path.join(columnar_dir(csv_path), 'schema.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        schema = json.load(f)
+    if os.path.exists(csv_path) and any(schema.get(key) != value for key, value in _source_stamp(csv_path).items()):
+        return None
+    return schema
+
+
+def _column_kind(name, values):
+    if name.lower() in DATE_COLUMNS:
+        return 'datetime64[ns]'
+    if pd.api.types.is_numeric_dtype(values):
+        return 'float64'
+    return 'str'
+
+
+def convert(csv_path, chunksize=100000):
+    """
+    Convert a CSV file into typed .npy columns and a JSON schema.
+
+    The file is read in chunks, so its size is not limited by memory. Numeric
+    columns are stored as float64, date columns (see DATE_COLUMNS) as
+    datetime64[ns] and the others as fixed-width strings.
+
+    Parameters:
+    - csv_path: Path of the CSV file.
+    - chunksize: Number of rows parsed at once.
+
+    Returns:
+    - The schema of the columnar copy.
+    """
+    folder = columnar_dir(csv_path)
+    os.makedirs(folder, exist_ok=True)
+
+    # Count the rows first so the numeric columns can be written in place
+    with open(csv_path, 'rb') as f:
+        n_rows = max(sum(1 for _ in f) - 1, 0)
+
+    columns, arrays, strings = [], {}, {}
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        if not columns:
+            for index, name in enumerate(chunk.columns):
+                kind = _column_kind(name, chunk[name])
+                columns.append({'name': name, 'dtype': kind, 'file': f'{index}.npy'})
+                if kind == 'str':
+                    strings[name] = []
+                else:
+                    arrays[name] = np.lib.format.open_memmap(os.path.join(folder, f'{index}.tmp.npy'),
+                                                             mode='w+', dtype=kind, shape=(n_rows,))
+        stop = start + len(chunk)
+        for column in columns:
+            name = column['name']
+            if column['dtype'] == 'str':
+                strings[name].append(chunk[name].astype(str).to_numpy())
+            elif column['dtype'] == 'float64':
+                arrays[name][start:stop] = pd.to_numeric(chunk[name], errors='coerce').to_numpy(dtype='float64')
+            else:
+                arrays[name][start:stop] = pd.to_datetime(chunk[name]).to_numpy(dtype='datetime64[ns]')
+        start = stop
+
+    # Blank trailing lines are counted but not parsed
+    for column in columns:
+        name, path = column['name'], os.path.join(folder, column['file'])
+        if column['dtype'] == 'str':
+            values = np.concatenate(strings[name]) if strings[name] else np.array([], dtype=str)
+            np.save(path, values.astype(str))
+        else:
+            values = arrays.pop(name)
+            values.flush()
+            if start < n_rows:
+                np.save(path, np.asarray(values[:start]))
+                del values
+                os.remove(os.path.join(folder, column['file'].replace('.npy', '.tmp.npy')))
+            else:
+                del values
+                os.replace(os.path.join(folder, column['file'].replace('.npy', '.tmp.npy')), path)
+
+    schema = {'source': os.path.abspath(csv_path), 'rows': start, 'columns': columns}
+    schema.update(_source_stamp(csv_path))
+    tmp_path = os.path.join(folder, 'schema.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(schema, f, indent=2)
+    os.replace(tmp_path, os.path.join(folder, 'schema.json'))
+    return schema
+
+
+def load_dataset(csv_path, columns=None, mmap=True):
+    """
+    Load a dataset from its columnar copy, converting the CSV first if needed.
+
+    Parameters:
+    - csv_path: Path of the CSV file.
+    - columns: List of columns to read (defaults to all of them).
+    - mmap: Open the numeric columns memory-mapped instead of reading them.
+
+    Returns:
+    - A DataFrame with the requested columns, like pd.read_csv(csv_path, usecols=columns).
+    """
+    schema = read_schema(csv_path)
+    if schema is None:
+        schema = convert(csv_path)
+    stored = {column['name']: column for column in schema['columns']}
+    if columns is None:
+        columns = list(stored)
+    missing = [name for name in columns if name not in stored]
+    if missing:
+        raise KeyError(f"Columns not in {csv_path}: {missing}")
+
+    folder = columnar_dir(csv_path)
+    values = {}
+    for name in columns:
+        column = stored[name]
+        mode = 'r' if mmap and column['dtype'] != 'str' else None
+        values[name] = np.load(os.path.join(folder, column['file']), mmap_mode=mode)
+    return pd.DataFrame(values, columns=columns, copy=False)
+
+
+if __name__ == '__main__':
+    for path in sys.argv[1:]:
+        schema = convert(path)
+        print(f"{path}: {schema['rows']} rows, {len(schema['columns'])} columns -> {columnar_dir(path)}")
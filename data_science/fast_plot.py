@@ -0,0 +1,122 @@
+"""
+Fast rendering of long price / regime series.
+
+- Regime shading is drawn from run-length encoded spans: one rectangle per
+  spell, all spells of a state in a single collection, instead of a
+  fill_between over every bar for every state.
+- Price and returns are downsampled by min/max binning, which keeps every
+  spike of the series visible with a few thousand points.
+- With an output file the figure is rendered by the Agg backend directly, so
+  no GUI (or display) is needed.
+"""
+
+# Import required libraries
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from regime_analytics import run_lengths
+
+
+def minmax_downsample(x, y, n_bins=2000):
+    """
+    Keep the minimum and the maximum of y in each of n_bins equal-width bins.
+
+    Parameters:
+    - x, y: NumPy arrays of the same length (x sorted).
+    - n_bins: Number of bins; the result has at most 2 * n_bins points.
+
+    Returns:
+    - A tuple (x, y) of the kept points, in their original order.
+    """
+    n = len(y)
+    if n <= 2 * n_bins:
+        return x, y
+    size = n // n_bins
+    full = size * n_bins
+    blocks = y[:full].reshape(n_bins, size)
+    offsets = np.arange(n_bins) * size
+    keep = [offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1)]
+    if full < n:
+        tail = y[full:]
+        keep.append(np.array([full + tail.argmin(), full + tail.argmax()]))
+    keep = np.unique(np.concatenate(keep))
+    return x[keep], y[keep]
+
+
+def _numeric_x(index):
+    # Datetime indexes are converted to matplotlib date numbers, others used as is
+    if np.issubdtype(np.asarray(index).dtype, np.datetime64):
+        return mdates.date2num(np.asarray(index)), True
+    return np.asarray(index, dtype=float), False
+
+
+def shade_regimes(ax, x, states, n_components=None, alpha=0.3):
+    """
+    Shade every regime spell across the full height of the axes.
+
+    Parameters:
+    - ax: Matplotlib axes.
+    - x: Numeric x positions of the bars.
+    - states: Array of regime labels aligned with x.
+    - n_components: Number of states (defaults to the largest label + 1).
+    - alpha: Transparency of the shading.
+    """
+    starts, lengths, values = run_lengths(states)
+    ends = np.append(x[starts[1:]], x[-1]) if len(x) else x
+    n_components = n_components or (int(values.max()) + 1 if len(values) else 0)
+    for state in range(n_components):
+        mask = values == state
+        spans = list(zip(x[starts[mask]], ends[mask] - x[starts[mask]]))
+        ax.broken_barh(spans, (0, 1), transform=ax.get_xaxis_transform(), alpha=alpha,
+                       color=f'C{state}', label=f'State {state}', linewidth=0)
+
+
+def plot_regimes(data, states, n_components=None, output=None, n_bins=2000, dpi=100):
+    """
+    Plot the price with regime shading and the returns below it.
+
+    Parameters:
+    - data: DataFrame with 'Close' and 'Returns' columns, aligned with 'states'.
+    - states: Array of regime labels.
+    - n_components: Number of states (defaults to the largest label + 1).
+    - output: Image file to write (rendered headless); if None, the figure is shown with pyplot.
+    - n_bins: Number of min/max bins of the downsampled lines.
+    - dpi: Resolution of the written image.
+
+    Returns:
+    - The Matplotlib figure.
+    """
+    x, is_date = _numeric_x(data.index)
+    states = np.asarray(states)
+
+    if output is None:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=(15, 10))
+    else:
+        fig = Figure(figsize=(15, 10))
+        FigureCanvasAgg(fig)
+    ax1 = fig.add_subplot(2, 1, 1)
+    ax2 = fig.add_subplot(2, 1, 2, sharex=ax1)
+
+    ax1.plot(*minmax_downsample(x, data['Close'].to_numpy(), n_bins), color='black', linewidth=0.8)
+    shade_regimes(ax1, x, states, n_components)
+    ax1.set_title('Bitcoin Price and HMM States')
+    ax1.set_ylabel('Price')
+    ax1.legend(loc='upper left')  # 'best' would test every span and line point
+
+    ax2.plot(*minmax_downsample(x, data['Returns'].to_numpy(), n_bins), linewidth=0.6)
+    ax2.set_title('Bitcoin Returns')
+    ax2.set_ylabel('Returns')
+    ax2.set_xlabel('Date')
+    if is_date:
+        ax2.xaxis_date()
+
+    fig.tight_layout()
+    if output is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+    else:
+        fig.savefig(output, dpi=dpi)
+    return fig
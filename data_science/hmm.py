@@ -1,20 +1,28 @@
 import pandas as pd
 import numpy as np
 from hmmlearn import hmm # pip install hmmlearn
-import matplotlib.pyplot as plt
 from sklearn.preprocessing import StandardScaler
 import time
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
-# Hidden Markov Model for training
+from dataset_store import load_dataset
+from model_cache import ModelCache, rescale_model, warm_start
+from checkpoints import CheckpointStore, file_key, make_key
+from regime_analytics import analyze_regimes
+from fast_plot import plot_regimes
+from hmm_scalable import scaled_features, fit_minibatch, fit_segmented
 
-print("Starting Bitcoin HMM analysis...")
+# Hidden Markov Model for training
 
 # Load and preprocess data
 def load_and_preprocess_data(file_path):
     print(f"Loading data from {file_path}...")
 
-    # Read CSV and reverse the DataFrame to chronological order
-    df = pd.read_csv(file_path)
+    # Read only the needed columns from the memory-mapped columnar copy of the CSV
+    # (converted on the first run and whenever the CSV changes)
+    df = load_dataset(file_path, columns=['Close', 'Volume'])
 
     # Parse 'Start' as datetime and set as index
     print("Creating datetime index...")
@@ -37,19 +45,91 @@ def load_and_preprocess_data(file_path):
     print(f"Data preprocessed. Shape: {df.shape}")
     return df
 
-# Train HMM
-def train_hmm(data, n_components=3):
+# Fit one EM restart (module level so it can run in a worker process)
+def fit_restart(X_scaled, n_components, seed, n_iter=100):
+    start = time.time()
+    model = hmm.GaussianHMM(n_components=n_components, covariance_type="full", n_iter=n_iter, random_state=seed)
+    model.fit(X_scaled)
+    stats = {
+        'seed': seed,
+        'log_likelihood': model.score(X_scaled),
+        'iterations': model.monitor_.iter,
+        'converged': model.monitor_.converged,
+        'seconds': time.time() - start,
+    }
+    return model, stats
+
+# Run several EM restarts in parallel and keep the one with the best log-likelihood
+def fit_restarts(X_scaled, n_components=3, n_restarts=8, n_jobs=None, seed=42, n_iter=100):
+    seeds = [seed + i for i in range(n_restarts)]
+    if n_restarts == 1:
+        results = [fit_restart(X_scaled, n_components, seeds[0], n_iter)]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs or min(n_restarts, os.cpu_count() or 1)) as pool:
+            results = list(pool.map(fit_restart, [X_scaled] * n_restarts, [n_components] * n_restarts,
+                                    seeds, [n_iter] * n_restarts))
+
+    stats = pd.DataFrame([restart_stats for _, restart_stats in results])
+    best = int(stats['log_likelihood'].idxmax())
+    stats['best'] = stats.index == best
+    return results[best][0], stats
+
+# Train HMM (reusing the model cache when the data and settings did not change; refit=True ignores cached fits)
+# scalable='segmented' or 'minibatch' trains on float32 segments of 'segment_rows' rows (see hmm_scalable.py)
+def train_hmm(data, n_components=3, n_restarts=1, n_jobs=None, cache=None, scalable=None, segment_rows=None,
+              refit=False):
     print(f"Training HMM with {n_components} components...")
     features=['Returns', 'Volatility', 'Volume_Change']
+
+    settings = {'features': features, 'n_components': n_components, 'covariance_type': 'full',
+                'n_iter': 100, 'n_restarts': n_restarts, 'seed': 42}
+    if scalable is not None:
+        # No float64 copy of the history: the float32 scaled matrix is trained on and is the cache key
+        settings.update({'scalable': scalable, 'segment_rows': segment_rows})
+        X_scaled, scaler = scaled_features(data, features)
+        if cache is not None and not refit:
+            cached = cache.load(X_scaled, settings)
+            if cached is not None:
+                print("Loaded HMM and scaler from the model cache")
+                return cached
+
+        print(f"Fitting Hmm model on segments ({scalable})...")
+        options = {'segment_length': segment_rows} if segment_rows else {}
+        if scalable == 'minibatch':
+            model, _ = fit_minibatch(X_scaled, n_components=n_components, **options)
+        else:
+            model = fit_segmented(X_scaled, n_components=n_components, **options)
+        if cache is not None:
+            cache.save(X_scaled, settings, model, scaler)
+        print("HMM training completed")
+        return model, scaler
+
     X = data[features].values
+    if cache is not None and not refit:
+        cached = cache.load(X, settings)
+        if cached is not None:
+            print("Loaded HMM and scaler from the model cache")
+            return cached
 
     print("Normalizing features...")
     scaler = StandardScaler()
     X_scaled = scaler.fit_transform(X)
 
-    print("Fitting Hmm model...")
-    model = hmm.GaussianHMM(n_components=n_components, covariance_type="full", n_iter=100, random_state=42)
-    model.fit(X_scaled)
+    previous = cache.find_prefix(X, settings) if cache is not None and not refit else None
+    if previous is not None:
+        # Only new bars were appended: continue EM from the cached fit of the older bars
+        previous_model, previous_scaler, rows = previous
+        print(f"Warm-starting EM from the cached fit on the first {rows} rows...")
+        model = warm_start(rescale_model(previous_model, previous_scaler, scaler), X_scaled, n_iter=100)
+        print(f"Converged: {model.monitor_.converged} after {model.monitor_.iter} iterations")
+    else:
+        print(f"Fitting Hmm model ({n_restarts} restart(s))...")
+        model, stats = fit_restarts(X_scaled, n_components=n_components, n_restarts=n_restarts, n_jobs=n_jobs)
+        print("Convergence of each restart:")
+        print(stats.to_string(index=False))
+
+    if cache is not None:
+        cache.save(X, settings, model, scaler)
 
     print("HMM training completed")
     return model, scaler
@@ -66,74 +146,128 @@ def predict_states(model, data, scaler):
     print(f"States predicted. Unique states: {np.unique(states)}")
     return states
 
-# Analyze states
-def analyzes_states(data, states):
+# Analyze states (one vectorized pass, see regime_analytics.py)
+def analyzes_states(data, states, n_components=None):
     print("Analyzing states...")
-    df_analysis = data.copy()
-    df_analysis['State'] = states
-
-    for state in range(model.n_components):
-        print(f"\nAnalyzing State {state}:")
-        state_data = df_analysis[df_analysis['State'] == state]
-        print(state_data[['Returns', 'Volatility', 'Volume_Change']].describe())
-        print(f"Number of periods in State {state}: {len(state_data)}")
-
-# Plot results
-def plot_results(data, states):
+    analytics = analyze_regimes(data, states, n_components)
+
+    print("\nFeature statistics per state:")
+    for feature in ['Returns', 'Volatility', 'Volume_Change']:
+        print(f"\n{feature}:")
+        print(analytics['stats'][feature])
+    print("\nRegime spells (durations in bars):")
+    print(analytics['spells'])
+    print("\nEmpirical transition matrix:")
+    print(analytics['transitions'])
+    print("\nForward returns after regime switches:")
+    print(analytics['switch_returns'])
+    return analytics
+
+# Plot results (regime spans and downsampled lines, see fast_plot; written to 'output' without a GUI if given)
+def plot_results(data, states, n_components=None, output=None):
     print("Plotting results...")
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10), sharex=True)
-
-    ax1.plot(data.index, data['Close'])
-    ax1.set_title('Bitcoin Price and HMM States')
-    ax1.set_ylabel('Price')
-
     print(f"Length of data index: {len(data.index)}")
     print(f"Length of states: {len(states)}")
-
-    for state in range(model.n_components):
-        mask = (states == state)
-        ax1.fill_between(data.index, data['Close'].min(), data['Close'].max(),
-                         where=mask, alpha=0.3, label=f'State {state}')
-    
-    ax1.legend()
-
-    ax2.plot(data.index, data['Returns'])
-    ax2.set_title('Bitcoin Returns')
-    ax2.set_ylabel('Returns')
-    ax2.set_xlabel('Date')
-
-    plt.tight_layout()
-    print("Showing plot...")
-    plt.show()
-
-# Main execution
-print("Starting main execution...")
-file_path = '/home/umut/trade/data/modified_bitcoin_data_hourly_1.csv'
-data = load_and_preprocess_data(file_path)
-
-# Passing in the above data to a training HMM model
-print("Training HMM model...")
-model, scaler = train_hmm(data)
-
-print("Predicting states...")
-states = predict_states(model, data, scaler)
-time.sleep(124781)
-
-print("Analyzing states...")
-analyzes_states(data, states)
-
-print("Plotting results...")
-plot_results(data, states)
-
-print("Printing transition matrix...")
-print("Transition Matrix:")
-print(model.transmat_)
-
-print("\nPrinting means and covariances of each state...")
-for i in range(model.n_components):
-    print(f"State {i}:")
-    print("Mean:", model.means_[i])
-    print("Covariance:", model.covars_[i])
-    print()
-
-print("Bitcoin HMM analysis completed.")
+    plot_regimes(data, states, n_components, output=output)
+    if output is not None:
+        print(f"Plot written to {output}")
+
+# Stages of the analysis; each one is skipped when its inputs did not change. The fitted model is
+# kept by the model cache (which also warm-starts EM when bars were only appended), every other
+# stage output by a checkpoint
+STAGES = ['features', 'train', 'predict', 'analyze', 'plot']
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datasets', 'checkpoints', 'hmm')
+
+def run_pipeline(file_path, stages=STAGES, force=(), n_components=3, n_restarts=8, pause=0,
+                 checkpoint_dir=CHECKPOINT_DIR, plot_file=None, scalable=None, segment_rows=None):
+    store = CheckpointStore(checkpoint_dir)
+    results = {}
+
+    # Every stage output is computed (or loaded from its checkpoint) only when a selected stage needs it
+    def features():
+        if 'features' not in results:
+            key = make_key('features', file_key(file_path))
+            results['features'] = (store.run('features', key, lambda: load_and_preprocess_data(file_path),
+                                             force='features' in force), key)
+        return results['features']
+
+    def model_key():
+        # Identity of the model, known without training: the data, the settings and the number of
+        # forced refits (so that '--force train' also invalidates the predictions of the old model)
+        if 'model_key' not in results:
+            settings_key = make_key('train', features()[1], n_components, n_restarts, scalable, segment_rows)
+            refits = store.load('refits') if store.has('refits', settings_key) else 0
+            if 'train' in force:
+                refits += 1
+                store.save('refits', settings_key, refits)
+            results['model_key'] = make_key(settings_key, refits)
+        return results['model_key']
+
+    def trained():
+        # The fitted model is kept by the model cache, not by a checkpoint
+        if 'train' not in results:
+            data, _ = features()
+            results['train'] = train_hmm(data, n_components=n_components, n_restarts=n_restarts, cache=ModelCache(),
+                                         scalable=scalable, segment_rows=segment_rows, refit='train' in force)
+        return results['train']
+
+    def predicted():
+        # The model is only loaded (or trained) when the predictions must be recomputed
+        if 'predict' not in results:
+            data, data_key = features()
+            key = make_key('predict', data_key, model_key())
+
+            def predict():
+                model, scaler = trained()
+                return predict_states(model, data, scaler)
+
+            results['predict'] = (store.run('predict', key, predict, force='predict' in force), key)
+        return results['predict']
+
+    if 'features' in stages:
+        features()
+    if 'train' in stages:
+        model_key()
+        model, _ = trained()
+        print("Transition Matrix:")
+        print(model.transmat_)
+        print("\nPrinting means and covariances of each state...")
+        for i in range(model.n_components):
+            print(f"State {i}:")
+            print("Mean:", model.means_[i])
+            print("Covariance:", model.covars_[i])
+            print()
+    if 'predict' in stages:
+        predicted()
+    if pause:
+        # Optional wait before the analysis (the script used to sleep here unconditionally)
+        print(f"Pausing for {pause} seconds...")
+        time.sleep(pause)
+    if 'analyze' in stages:
+        analyzes_states(features()[0], predicted()[0], n_components)
+    if 'plot' in stages:
+        plot_results(features()[0], predicted()[0], n_components, output=plot_file)
+
+# Main execution (guarded so that worker processes can import this module)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bitcoin HMM regime analysis as a checkpointed stage pipeline.")
+    parser.add_argument('file', nargs='?', default='/home/umut/trade/data/modified_bitcoin_data_hourly_1.csv',
+                        help="OHLCV CSV file with 'Close' and 'Volume' columns.")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES,
+                        help="Stages to run; the outputs they need are loaded from their checkpoints.")
+    parser.add_argument('--force', nargs='*', choices=STAGES, default=[], help="Recompute these stages.")
+    parser.add_argument('--n-components', type=int, default=3, help="Number of hidden states.")
+    parser.add_argument('--restarts', type=int, default=8, help="Number of parallel EM restarts.")
+    parser.add_argument('--pause', type=float, default=0, help="Seconds to wait between predict and analyze.")
+    parser.add_argument('--checkpoints', default=CHECKPOINT_DIR, help="Checkpoint directory.")
+    parser.add_argument('--plot-file', help="Write the plot to this image file instead of showing it.")
+    parser.add_argument('--scalable', choices=['segmented', 'minibatch'],
+                        help="Train on float32 segments (full EM, or mini-batch EM for very long histories).")
+    parser.add_argument('--segment-rows', type=int, help="Rows per segment with --scalable.")
+    args = parser.parse_args()
+
+    print("Starting Bitcoin HMM analysis...")
+    run_pipeline(args.file, stages=args.stages, force=args.force, n_components=args.n_components,
+                 n_restarts=args.restarts, pause=args.pause, checkpoint_dir=args.checkpoints,
+                 plot_file=args.plot_file, scalable=args.scalable, segment_rows=args.segment_rows)
+    print("Bitcoin HMM analysis completed.")
@@ -0,0 +1,173 @@
+"""
+Online regime tracking with a fitted HMM, one bar at a time.
+
+predict_states in hmm.py runs Viterbi over the whole history, so labelling a
+new bar means re-decoding every row. RegimeTracker instead keeps the
+forward-filtered state probabilities, P(state | bars so far), and updates them
+in constant time per bar. The features of hmm.py (Returns, 24-bar Volatility,
+Volume_Change) are maintained incrementally as well.
+
+Filtered probabilities only use past bars, so the labels can differ from the
+Viterbi path, which also looks at later bars.
+"""
+
+# Import required libraries
+from collections import deque
+
+import numpy as np
+
+
+class RollingStd:
+    """
+    Sample standard deviation over a fixed window, updated in O(1) per value.
+    """
+
+    def __init__(self, window=24):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+
+    def update(self, value):
+        """
+        Add a value (dropping the oldest one once the window is full) and return the
+        standard deviation, or NaN until the window is full.
+        """
+        self.values.append(value)
+        n = len(self.values)
+        delta = value - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (value - self.mean)
+        if n > self.window:
+            old = self.values.popleft()
+            delta = old - self.mean
+            self.mean -= delta / self.window
+            self.m2 -= delta * (old - self.mean)
+        if len(self.values) < self.window:
+            return np.nan
+        return float(np.sqrt(max(self.m2, 0.0) / (self.window - 1)))
+
+
+class RegimeTracker:
+    """
+    Forward-filtered HMM regime probabilities for a live bar stream.
+    """
+
+    def __init__(self, model, scaler, window=24):
+        """
+        Parameters:
+        - model: Fitted hmmlearn GaussianHMM with full covariances (see hmm.train_hmm).
+        - scaler: Fitted StandardScaler of the features.
+        - window: Window of the rolling volatility, as in load_and_preprocess_data.
+        """
+        self.model = model
+        self.scaler = scaler
+        self.center = getattr(scaler, 'mean_', None)
+        self.scale = getattr(scaler, 'scale_', None)
+        with np.errstate(divide='ignore'):  # Impossible transitions become -inf
+            self.log_transmat = np.log(model.transmat_)
+            self.log_startprob = np.log(model.startprob_)
+
+        # Per-state precision matrices and normalizing constants of the Gaussian emissions,
+        # with hmmlearn's fallback for (nearly) singular covariances
+        self.means = np.asarray(model.means_)
+        n_features = self.means.shape[1]
+        self.precisions = np.empty((len(self.means), n_features, n_features))
+        self.log_norm = np.empty(len(self.means))
+        for state, covar in enumerate(np.asarray(model.covars_)):
+            try:
+                chol = np.linalg.cholesky(covar)
+            except np.linalg.LinAlgError:
+                chol = np.linalg.cholesky(covar + model.min_covar * np.eye(n_features))
+            inv_chol = np.linalg.inv(chol)
+            self.precisions[state] = inv_chol.T @ inv_chol
+            self.log_norm[state] = -0.5 * n_features * np.log(2 * np.pi) - np.log(np.diag(chol)).sum()
+
+        self.volatility = RollingStd(window)
+        self.last_close = None
+        self.last_volume = None
+        self.log_alpha = None  # Log of the filtered state probabilities
+        self.bars = 0
+
+    def features(self, close, volume):
+        """
+        Update the incremental features with a new bar.
+
+        Returns:
+        - The [Returns, Volatility, Volume_Change] row, or None while it is incomplete
+          (the rows load_and_preprocess_data drops).
+        """
+        row = None
+        if self.last_close is not None:
+            returns = close / self.last_close - 1
+            volume_change = volume / self.last_volume - 1 if self.last_volume else np.inf
+            volatility = self.volatility.update(returns)
+            row = np.array([returns, volatility, volume_change])
+            if not np.isfinite(row).all():
+                row = None
+        self.last_close, self.last_volume = close, volume
+        return row
+
+    def log_emission(self, x):
+        # Log-density of a scaled feature row under every state's Gaussian
+        diff = x - self.means
+        mahalanobis = np.einsum('ki,kij,kj->k', diff, self.precisions, diff)
+        return self.log_norm - 0.5 * mahalanobis
+
+    def update(self, close, volume):
+        """
+        Feed one new bar.
+
+        Parameters:
+        - close: Closing price of the bar.
+        - volume: Volume of the bar.
+
+        Returns:
+        - The filtered state probabilities after this bar (a NumPy array), or None
+          while the features are still warming up.
+        """
+        row = self.features(close, volume)
+        if row is None:
+            return None
+        # Same as scaler.transform, without its per-call validation overhead
+        x = row
+        if self.center is not None:
+            x = x - self.center
+        if self.scale is not None:
+            x = x / self.scale
+        log_b = self.log_emission(x)
+        if self.log_alpha is None:
+            log_alpha = self.log_startprob + log_b
+        else:
+            log_alpha = np.logaddexp.reduce(self.log_alpha[:, None] + self.log_transmat, axis=0) + log_b
+        self.log_alpha = log_alpha - np.logaddexp.reduce(log_alpha)
+        self.bars += 1
+        return self.probabilities
+
+    def run(self, closes, volumes):
+        """
+        Feed a sequence of bars (e.g., the history before going live).
+
+        Returns:
+        - A (bars x states) array of filtered probabilities, NaN for warm-up bars.
+        """
+        out = np.full((len(closes), self.model.n_components), np.nan)
+        for i, (close, volume) in enumerate(zip(closes, volumes)):
+            probabilities = self.update(float(close), float(volume))
+            if probabilities is not None:
+                out[i] = probabilities
+        return out
+
+    @property
+    def probabilities(self):
+        """
+        Filtered state probabilities after the last bar, or None before the first one.
+        """
+        return None if self.log_alpha is None else np.exp(self.log_alpha)
+
+    @property
+    def state(self):
+        """
+        Most likely current regime, or None before the first filtered bar.
+        """
+        return None if self.log_alpha is None else int(np.argmax(self.log_alpha))
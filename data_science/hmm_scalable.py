@@ -0,0 +1,154 @@
+"""
+Scalable EM training for the regime HMM on long (minute-level) histories.
+
+train_hmm passes one long float64 feature matrix to GaussianHMM.fit, so every
+EM iteration runs forward-backward over all rows and the working memory grows
+with the history. Here the history is:
+
+- stored as float32 (half the memory of the feature matrix),
+- cut into fixed-length segments passed to hmmlearn as separate sequences
+  ('lengths'), so no forward-backward lattice is longer than one segment,
+- trained by mini-batch EM: every pass runs a few EM iterations on a random
+  subset of segments, starting from the current parameters, and blends the
+  result into them with a decaying step size.
+
+Only one batch is converted to float64 at a time, so memory is bounded by the
+batch size rather than by the length of the history.
+"""
+
+# Import required libraries
+import time
+
+import numpy as np
+from hmmlearn import hmm
+from sklearn.preprocessing import StandardScaler
+
+FEATURES = ['Returns', 'Volatility', 'Volume_Change']
+
+
+def scaled_features(data, features=FEATURES, dtype=np.float32, chunk_rows=1000000):
+    """
+    Standardize the features into a float32 matrix without a float64 copy of the history.
+
+    Parameters:
+    - data: DataFrame from load_and_preprocess_data.
+    - features: Feature columns.
+    - dtype: Storage type of the scaled matrix.
+    - chunk_rows: Number of rows scaled at once.
+
+    Returns:
+    - A tuple (X_scaled, scaler).
+    """
+    scaler = StandardScaler()
+    for start in range(0, len(data), chunk_rows):
+        # Slice the rows first: data[features] would copy every feature column of the whole history
+        scaler.partial_fit(data.iloc[start:start + chunk_rows][features].to_numpy(dtype=np.float64))
+    X_scaled = np.empty((len(data), len(features)), dtype=dtype)
+    for start in range(0, len(data), chunk_rows):
+        chunk = data.iloc[start:start + chunk_rows][features].to_numpy(dtype=np.float64)
+        X_scaled[start:start + len(chunk)] = scaler.transform(chunk)
+    return X_scaled, scaler
+
+
+def segment_bounds(n_rows, segment_length):
+    """
+    Return the (start, stop) row ranges of consecutive segments covering n_rows.
+    """
+    starts = np.arange(0, n_rows, segment_length)
+    return np.stack([starts, np.minimum(starts + segment_length, n_rows)], axis=1)
+
+
+def _batch(X, bounds):
+    # Gather segments into one float64 array plus their lengths
+    lengths = bounds[:, 1] - bounds[:, 0]
+    batch = np.empty((lengths.sum(), X.shape[1]), dtype=np.float64)
+    offset = 0
+    for (start, stop), length in zip(bounds, lengths):
+        batch[offset:offset + length] = X[start:stop]
+        offset += length
+    return batch, lengths
+
+
+def score_segments(model, X, segment_length=50000, batch_segments=20):
+    """
+    Log-likelihood of X treated as independent segments, computed batch by batch.
+    """
+    bounds = segment_bounds(len(X), segment_length)
+    total = 0.0
+    for i in range(0, len(bounds), batch_segments):
+        batch, lengths = _batch(X, bounds[i:i + batch_segments])
+        total += model.score(batch, lengths)
+    return total
+
+
+def fit_minibatch(X, n_components=3, segment_length=5000, batch_segments=40, n_passes=20, iter_per_pass=3,
+                  decay=0.6, tol=1e-4, seed=42, verbose=True):
+    """
+    Fit a full-covariance GaussianHMM by mini-batch EM over segments of X.
+
+    Parameters:
+    - X: (rows x features) scaled feature matrix (float32 is fine).
+    - n_components: Number of hidden states.
+    - segment_length: Rows per segment (sequence boundary for hmmlearn).
+    - batch_segments: Segments per pass; batch_segments * segment_length bounds the memory.
+    - n_passes: Maximum number of passes.
+    - iter_per_pass: EM iterations run on each batch.
+    - decay: Step size of pass t is (t + 1) ** -decay (the first pass takes the batch fit as is).
+    - tol: Stop when the mean per-row log-likelihood of a batch improves by less than this.
+    - seed: Seed of the initialization and of the batch sampling.
+    - verbose: Print one line per pass.
+
+    Returns:
+    - A tuple (model, history): the fitted model and a list of per-pass dictionaries.
+    """
+    rng = np.random.default_rng(seed)
+    bounds = segment_bounds(len(X), segment_length)
+    model, history, previous = None, [], None
+    for t in range(n_passes):
+        start = time.time()
+        chosen = np.sort(rng.choice(len(bounds), size=min(batch_segments, len(bounds)), replace=False))
+        batch, lengths = _batch(X, bounds[chosen])
+
+        step = (t + 1) ** -decay
+        fitted = hmm.GaussianHMM(n_components=n_components, covariance_type='full', n_iter=iter_per_pass,
+                                 random_state=seed, init_params='' if model is not None else 'stmc')
+        if model is not None:
+            fitted.startprob_ = model.startprob_
+            fitted.transmat_ = model.transmat_
+            fitted.means_ = model.means_
+            fitted.n_features = X.shape[1]
+            fitted._covars_ = model.covars_  # Skip the setter's validation, as in model_cache
+        fitted.fit(batch, lengths)
+
+        if model is None:
+            model = fitted
+        else:
+            # Blend the batch fit into the current parameters (convex combinations stay valid)
+            model.startprob_ = (1 - step) * model.startprob_ + step * fitted.startprob_
+            model.transmat_ = (1 - step) * model.transmat_ + step * fitted.transmat_
+            model.means_ = (1 - step) * model.means_ + step * fitted.means_
+            model._covars_ = (1 - step) * model.covars_ + step * fitted.covars_
+
+        log_likelihood = model.score(batch, lengths) / len(batch)
+        history.append({'pass': t, 'rows': len(batch), 'step': step, 'log_likelihood_per_row': log_likelihood,
+                        'seconds': time.time() - start})
+        if verbose:
+            print(f"Pass {t}: {len(batch)} rows, step {step:.3f}, log-likelihood/row {log_likelihood:.5f}")
+        if previous is not None and abs(log_likelihood - previous) < tol:
+            break
+        previous = log_likelihood
+    return model, history
+
+
+def fit_segmented(X, n_components=3, segment_length=50000, n_iter=100, seed=42):
+    """
+    Full-data EM with the history cut into independent segments ('lengths').
+
+    This keeps every forward-backward pass short, but converts all of X to float64
+    once; use fit_minibatch when that does not fit in memory.
+    """
+    bounds = segment_bounds(len(X), segment_length)
+    batch, lengths = _batch(X, bounds)
+    model = hmm.GaussianHMM(n_components=n_components, covariance_type='full', n_iter=n_iter, random_state=seed)
+    model.fit(batch, lengths)
+    return model
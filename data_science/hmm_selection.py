@@ -0,0 +1,113 @@
+"""
+Parallel model-order selection for the regime HMM.
+
+Fits GaussianHMMs with 2..K states in parallel and compares them by BIC, AIC
+and out-of-sample log-likelihood on a time-ordered split: the first bars are
+used for fitting, the last ones for testing. The features are scaled once
+(with statistics of the training bars only) and written to a .npy file that
+every worker opens memory-mapped, so the matrix is shared, not copied.
+
+Usage: python hmm_selection.py ../datasets/modified_bitcoin_data_hourly_1.csv --max-components 6
+"""
+
+# Import required libraries
+import argparse
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from hmm import fit_restart, load_and_preprocess_data
+
+FEATURES = ['Returns', 'Volatility', 'Volume_Change']
+
+
+def _fit_order(path, split, n_components, seed, n_iter):
+    # Worker: open the shared matrix memory-mapped and fit one model order
+    X = np.load(path, mmap_mode='r')
+    X_train, X_test = X[:split], X[split:]
+    model, stats = fit_restart(X_train, n_components, seed, n_iter)
+    test_log_likelihood = model.score(X_test) if len(X_test) else np.nan
+    stats.update({
+        'n_components': n_components,
+        'train_log_likelihood': stats.pop('log_likelihood'),
+        'test_log_likelihood': test_log_likelihood,
+        'test_log_likelihood_per_bar': test_log_likelihood / max(len(X_test), 1),
+        'bic': model.bic(X_train),
+        'aic': model.aic(X_train),
+    })
+    return model, stats
+
+
+def select_n_components(data, max_components=6, min_components=2, test_fraction=0.2, criterion='bic',
+                        n_jobs=None, seed=42, n_iter=100):
+    """
+    Fit every model order in parallel and pick the best one.
+
+    Parameters:
+    - data: DataFrame from load_and_preprocess_data, in chronological order.
+    - max_components, min_components: Range of numbers of hidden states to try.
+    - test_fraction: Fraction of the last bars held out for the out-of-sample score.
+    - criterion: 'bic' or 'aic' (lowest wins) or 'test' (highest out-of-sample
+      log-likelihood wins).
+    - n_jobs: Number of processes (defaults to the number of CPUs).
+    - seed, n_iter: EM settings, as in hmm.fit_restart.
+
+    Returns:
+    - A tuple (model, scaler, table): the chosen model, the scaler fitted on the
+      training bars, and a DataFrame comparing every model order.
+    """
+    X = data[FEATURES].values
+    split = int(len(X) * (1 - test_fraction))
+    scaler = StandardScaler().fit(X[:split])
+
+    orders = list(range(min_components, max_components + 1))
+    tmp_dir = tempfile.mkdtemp(prefix='hmm_selection_')
+    try:
+        # One scaled matrix on disk, opened read-only and memory-mapped by every worker
+        path = os.path.join(tmp_dir, 'X_scaled.npy')
+        np.save(path, scaler.transform(X))
+        with ProcessPoolExecutor(max_workers=n_jobs or min(len(orders), os.cpu_count() or 1)) as pool:
+            results = list(pool.map(_fit_order, [path] * len(orders), [split] * len(orders), orders,
+                                    [seed] * len(orders), [n_iter] * len(orders)))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    table = pd.DataFrame([stats for _, stats in results])
+    table = table[['n_components', 'bic', 'aic', 'train_log_likelihood', 'test_log_likelihood',
+                   'test_log_likelihood_per_bar', 'iterations', 'converged', 'seconds']]
+    if criterion == 'test':
+        best = int(table['test_log_likelihood'].idxmax())
+    elif criterion in ('bic', 'aic'):
+        best = int(table[criterion].idxmin())
+    else:
+        raise ValueError(f"Unknown criterion: {criterion!r} (expected 'bic', 'aic' or 'test')")
+    table['chosen'] = table.index == best
+    return results[best][0], scaler, table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Choose the number of HMM regimes by BIC/AIC and held-out likelihood.")
+    parser.add_argument('file', help="OHLCV CSV file with 'Close' and 'Volume' columns.")
+    parser.add_argument('--min-components', type=int, default=2)
+    parser.add_argument('--max-components', type=int, default=6)
+    parser.add_argument('--test-fraction', type=float, default=0.2, help="Fraction of the last bars held out.")
+    parser.add_argument('--criterion', choices=['bic', 'aic', 'test'], default='bic')
+    parser.add_argument('--workers', type=int, help="Number of processes.")
+    args = parser.parse_args(argv)
+
+    data = load_and_preprocess_data(args.file)
+    model, _, table = select_n_components(data, args.max_components, args.min_components, args.test_fraction,
+                                          args.criterion, n_jobs=args.workers)
+    pd.set_option('display.width', 200)
+    print(table.to_string(index=False))
+    print(f"\nChosen number of regimes ({args.criterion}): {model.n_components}")
+    return model, table
+
+
+if __name__ == '__main__':
+    main()
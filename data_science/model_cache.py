@@ -0,0 +1,212 @@
+"""
+Content-addressed on-disk cache for fitted HMMs and their scalers.
+
+An entry is keyed by a hash of the feature matrix and of the training settings
+(feature list, n_components, EM settings), so an unchanged dataset reloads its
+model instantly instead of refitting. Each entry is a .npz file with the model
+parameters and the scaler statistics plus a .json file with its metadata.
+
+When the features only grew by appended bars, the entry fitted on the shorter
+prefix is found and EM is warm-started from its parameters. Entries are evicted
+by age and, oldest first, when the cache grows over its size limit.
+"""
+
+# Import required libraries
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+from hmmlearn import hmm
+from sklearn.preprocessing import StandardScaler
+
+# Default location of the cache, next to the datasets
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datasets', 'models')
+
+
+def hash_array(X):
+    """
+    Return the SHA-256 of an array's shape, dtype and contents.
+    """
+    X = np.ascontiguousarray(X)
+    digest = hashlib.sha256(f"{X.shape}{X.dtype.str}".encode())
+    digest.update(memoryview(X).cast('B'))
+    return digest.hexdigest()
+
+
+def hash_settings(settings):
+    """
+    Return the SHA-256 of a JSON-serializable settings dictionary.
+    """
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+def rescale_model(model, old_scaler, new_scaler):
+    """
+    Express a model fitted on features scaled by 'old_scaler' in the space of 'new_scaler'.
+
+    Both scalers standardize the same raw features, so the change of space is the
+    affine map x_new = (x_old * old_scale + old_mean - new_mean) / new_scale.
+    """
+    ratio = old_scaler.scale_ / new_scaler.scale_
+    model.means_ = (model.means_ * old_scaler.scale_ + old_scaler.mean_ - new_scaler.mean_) / new_scaler.scale_
+    # Set the stored matrices directly: the public setter rejects the nearly singular
+    # covariances EM can produce (hmmlearn adds min_covar when it evaluates them)
+    model._covars_ = model.covars_ * np.outer(ratio, ratio)
+    return model
+
+
+def warm_start(model, X_scaled, n_iter=100):
+    """
+    Continue EM from the parameters of an already fitted model.
+
+    Returns:
+    - A new GaussianHMM initialized from 'model' and fitted on 'X_scaled'.
+    """
+    warm = hmm.GaussianHMM(n_components=model.n_components, covariance_type=model.covariance_type,
+                           n_iter=n_iter, init_params='', params='stmc')
+    warm.startprob_ = model.startprob_
+    warm.transmat_ = model.transmat_
+    warm.means_ = model.means_
+    warm.n_features = model.means_.shape[1]
+    warm._covars_ = model.covars_
+    warm.fit(X_scaled)
+    return warm
+
+
+class ModelCache:
+    """
+    On-disk cache of (GaussianHMM, StandardScaler) pairs keyed by data and settings.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=256 * 1024 ** 2, max_age_days=30):
+        """
+        Parameters:
+        - root: Directory holding the cache entries.
+        - max_bytes: Total size above which the least recently used entries are evicted.
+        - max_age_days: Entries not used for this many days are evicted.
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+
+    def _paths(self, key):
+        return os.path.join(self.root, key + '.npz'), os.path.join(self.root, key + '.json')
+
+    def key(self, X, settings):
+        """
+        Return the cache key of a feature matrix and its training settings.
+        """
+        return hash_settings({'data': hash_array(X), 'settings': hash_settings(settings)})
+
+    def load(self, X, settings):
+        """
+        Return the cached (model, scaler) for exactly this data and these settings, or None.
+        """
+        npz_path, json_path = self._paths(self.key(X, settings))
+        if not (os.path.exists(npz_path) and os.path.exists(json_path)):
+            return None
+        with open(json_path) as f:
+            meta = json.load(f)
+        with np.load(npz_path) as arrays:
+            model, scaler = self._build(meta, arrays)
+        # The modification time records the last use, for the eviction
+        os.utime(npz_path)
+        os.utime(json_path)
+        return model, scaler
+
+    def find_prefix(self, X, settings):
+        """
+        Find the entry fitted on the longest strict prefix of X with the same settings.
+
+        Returns:
+        - A tuple (model, scaler, rows) or None.
+        """
+        if not os.path.isdir(self.root):
+            return None
+        settings_hash = hash_settings(settings)
+        candidates = []
+        for name in os.listdir(self.root):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.root, name)) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if meta.get('settings_hash') == settings_hash and meta['rows'] < len(X):
+                candidates.append(meta)
+        for meta in sorted(candidates, key=lambda meta: -meta['rows']):
+            if hash_array(X[:meta['rows']]) == meta['data_hash']:
+                with np.load(self._paths(meta['key'])[0]) as arrays:
+                    model, scaler = self._build(meta, arrays)
+                return model, scaler, meta['rows']
+        return None
+
+    def save(self, X, settings, model, scaler):
+        """
+        Store a fitted model and scaler, then evict old entries.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        key = self.key(X, settings)
+        npz_path, json_path = self._paths(key)
+        meta = {
+            'key': key,
+            'data_hash': hash_array(X),
+            'settings_hash': hash_settings(settings),
+            'settings': settings,
+            'rows': len(X),
+            'n_components': model.n_components,
+            'covariance_type': model.covariance_type,
+            'created': time.time(),
+        }
+        tmp_path = npz_path + '.tmp.npz'
+        np.savez(tmp_path, startprob=model.startprob_, transmat=model.transmat_, means=model.means_,
+                 covars=model.covars_, scaler_mean=scaler.mean_, scaler_scale=scaler.scale_,
+                 scaler_var=scaler.var_, scaler_samples=np.asarray(scaler.n_samples_seen_))
+        os.replace(tmp_path, npz_path)
+        with open(json_path + '.tmp', 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(json_path + '.tmp', json_path)
+        self.evict()
+
+    def _build(self, meta, arrays):
+        model = hmm.GaussianHMM(n_components=meta['n_components'], covariance_type=meta['covariance_type'])
+        model.n_features = arrays['means'].shape[1]
+        model.startprob_ = arrays['startprob']
+        model.transmat_ = arrays['transmat']
+        model.means_ = arrays['means']
+        model._covars_ = arrays['covars']  # As in rescale_model, skip the setter's validation
+
+        scaler = StandardScaler()
+        scaler.mean_ = arrays['scaler_mean']
+        scaler.scale_ = arrays['scaler_scale']
+        scaler.var_ = arrays['scaler_var']
+        scaler.n_samples_seen_ = arrays['scaler_samples'].item()
+        scaler.n_features_in_ = len(scaler.mean_)
+        return model, scaler
+
+    def evict(self):
+        """
+        Remove entries older than max_age_days, then the least recently used ones
+        until the cache fits in max_bytes.
+        """
+        if not os.path.isdir(self.root):
+            return
+        entries = {}
+        for name in os.listdir(self.root):
+            key, ext = os.path.splitext(name)
+            if ext in ('.npz', '.json') and not key.endswith('.tmp'):
+                stat = os.stat(os.path.join(self.root, name))
+                size, used = entries.get(key, (0, 0.0))
+                entries[key] = (size + stat.st_size, max(used, stat.st_mtime))
+
+        now = time.time()
+        total = sum(size for size, _ in entries.values())
+        for key, (size, used) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if now - used > self.max_age or total > self.max_bytes:
+                for path in self._paths(key):
+                    if os.path.exists(path):
+                        os.remove(path)
+                total -= size
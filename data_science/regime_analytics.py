@@ -0,0 +1,134 @@
+"""
+Vectorized analytics of a regime (hidden state) sequence.
+
+Everything is computed from the states array in a few array passes, without
+copying the frame or filtering it once per state:
+
+- per-state feature statistics (one groupby),
+- regime spells from a run-length encoding (count, mean/median/max duration),
+- the empirical transition matrix (one bincount over consecutive pairs),
+- forward returns after each regime switch, per (from, to) pair.
+
+All functions return DataFrames; nothing is printed.
+"""
+
+# Import required libraries
+import numpy as np
+import pandas as pd
+
+FEATURES = ['Returns', 'Volatility', 'Volume_Change']
+
+
+def run_lengths(states):
+    """
+    Run-length encode a states array.
+
+    Returns:
+    - A tuple (starts, lengths, values) of NumPy arrays, one entry per spell.
+    """
+    states = np.asarray(states)
+    if len(states) == 0:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, states[:0]
+    starts = np.flatnonzero(np.concatenate(([True], states[1:] != states[:-1])))
+    lengths = np.diff(np.concatenate((starts, [len(states)])))
+    return starts, lengths, states[starts]
+
+
+def state_stats(data, states, features=FEATURES):
+    """
+    Per-state statistics of the features (count, mean, std, min, quartiles, max).
+
+    Returns:
+    - A DataFrame indexed by state with (feature, statistic) columns.
+    """
+    return data[features].groupby(np.asarray(states)).describe()
+
+
+def spell_stats(states, n_components=None):
+    """
+    Duration statistics of the regime spells, in bars.
+
+    Returns:
+    - A DataFrame indexed by state with the number of spells, their mean, median
+      and maximum length, and the share of all bars spent in the state.
+    """
+    _, lengths, values = run_lengths(states)
+    n_components = n_components or (int(values.max()) + 1 if len(values) else 0)
+    spells = pd.DataFrame({'state': values, 'length': lengths})
+    table = spells.groupby('state')['length'].agg(['count', 'mean', 'median', 'max'])
+    table.columns = ['spells', 'mean_duration', 'median_duration', 'max_duration']
+    table['share_of_time'] = spells.groupby('state')['length'].sum() / max(len(states), 1)
+    return table.reindex(range(n_components))
+
+
+def transition_matrix(states, n_components=None):
+    """
+    Empirical transition probabilities between consecutive bars.
+
+    Returns:
+    - A DataFrame with 'from' states as rows and 'to' states as columns.
+    """
+    states = np.asarray(states, dtype=np.int64)
+    n_components = n_components or (int(states.max()) + 1 if len(states) else 0)
+    counts = np.bincount(states[:-1] * n_components + states[1:],
+                         minlength=n_components * n_components).reshape(n_components, n_components)
+    totals = counts.sum(axis=1, keepdims=True)
+    probabilities = np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+    return pd.DataFrame(probabilities, index=pd.Index(range(n_components), name='from'),
+                        columns=pd.Index(range(n_components), name='to'))
+
+
+def switch_returns(close, states, horizons=(1, 6, 24)):
+    """
+    Forward returns after every regime switch, summarized per (from, to) pair.
+
+    The return over horizon h is close[t + h] / close[t] - 1, where t is the first
+    bar of the new regime; switches too close to the end are left out for that h.
+
+    Returns:
+    - A DataFrame indexed by (from, to) with the number of switches and, per horizon,
+      the mean and median forward return and the share of positive ones.
+    """
+    close = np.asarray(close, dtype=float)
+    starts, _, values = run_lengths(states)
+    switches = pd.DataFrame({'from': values[:-1], 'to': values[1:]})
+    at = starts[1:]
+    columns = {}
+    for h in horizons:
+        ahead = at + h
+        forward = np.full(len(at), np.nan)
+        valid = ahead < len(close)
+        forward[valid] = close[ahead[valid]] / close[at[valid]] - 1
+        switches[f'return_{h}'] = forward
+        columns[f'mean_{h}'] = (f'return_{h}', 'mean')
+        columns[f'median_{h}'] = (f'return_{h}', 'median')
+        columns[f'positive_{h}'] = (f'return_{h}', lambda r: (r.dropna() > 0).mean())
+    grouped = switches.groupby(['from', 'to'])
+    table = grouped.agg(**columns)
+    table.insert(0, 'switches', grouped.size())
+    return table
+
+
+def analyze_regimes(data, states, n_components=None, features=FEATURES, horizons=(1, 6, 24)):
+    """
+    Compute all regime analytics at once.
+
+    Parameters:
+    - data: DataFrame with the features and a 'Close' column, aligned with 'states'.
+    - states: Array of regime labels (e.g., from predict_states).
+    - n_components: Number of states of the model (defaults to the largest label + 1).
+    - features: Feature columns to describe.
+    - horizons: Forward-return horizons in bars.
+
+    Returns:
+    - A dictionary with 'stats', 'spells', 'transitions' and 'switch_returns' DataFrames.
+    """
+    states = np.asarray(states)
+    n_components = n_components or int(states.max()) + 1
+    return {
+        'stats': state_stats(data, states, features),
+        'spells': spell_stats(states, n_components),
+        'transitions': transition_matrix(states, n_components),
+        'switch_returns': switch_returns(data['Close'].to_numpy(), states, horizons),
+    }
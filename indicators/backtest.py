@@ -0,0 +1,175 @@
+"""
+Vectorized historical backtester for the scanner signals.
+
+The entry signals come from the same indicator functions the scanners use
+(strategies.py). Positions, returns, equity, drawdown and the per-trade
+statistics are then derived with array operations only, so a long hourly
+history is processed in milliseconds.
+
+A trade opens at the close of the bar where the entry signal fires and is held
+for 'hold' bars, or until an exit signal fires when 'exits' is given. A signal
+that fires while a trade is open extends it (no pyramiding).
+
+Usage: python backtest.py ../datasets/modified_bitcoin_data_hourly_1.csv --strategy rsi --hold 24
+"""
+
+# Import required libraries
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from strategies import Bankery, calculate_rsi, calculate_rsi_ift
+
+
+def _fired(condition):
+    # True on the bars where a condition switches from False to True
+    condition = condition.fillna(False).astype(bool)
+    return condition & ~condition.shift(1, fill_value=False)
+
+
+def bankery_entries(data):
+    """
+    Bankery bottom signal: 'Entry' switches from False to True.
+    """
+    return _fired(Bankery(data)['Entry'])
+
+def rsi_entries(data, length=14, level=30):
+    """
+    RSI crosses above 'level' from below.
+    """
+    rsi = calculate_rsi(data[['close']].copy(), length=length)['RSI']
+    return (rsi.shift(1) < level) & (rsi >= level)
+
+def ift_entries(data, smoothing='sma', level=-0.5):
+    """
+    IFT on RSI (RSI 5, smoothing 9) drops to 'level' or below.
+    """
+    ift = calculate_rsi_ift(data[['close']].copy(), rsi_length=5, smoothing_length=9, smoothing=smoothing)['IFT_RSI']
+    return _fired(ift <= level)
+
+ENTRIES = {
+    'bankery': bankery_entries,
+    'rsi': rsi_entries,
+    'ift_bist': lambda data: ift_entries(data, smoothing='sma'),
+    'ift_crypto': lambda data: ift_entries(data, smoothing='ema'),
+}
+
+
+def positions(entries, hold=24, exits=None):
+    """
+    Turn entry signals into a 0/1 long position per bar.
+
+    Parameters:
+    - entries: Boolean array, True on the bars where a trade opens (at the close).
+    - hold: Number of bars a trade is held; ignored when 'exits' is given.
+    - exits: Boolean array, True on the bars where an open trade is closed (optional).
+
+    Returns:
+    - A float array with 1.0 on the bars a position is held over (from the
+      close of the previous bar to the close of this bar), 0.0 elsewhere.
+    """
+    entries = np.asarray(entries, dtype=bool)
+    n = len(entries)
+    if exits is not None:
+        # Last event wins: 1 after an entry, 0 after an exit
+        exits = np.asarray(exits, dtype=bool)
+        events = np.where(entries, 1.0, np.where(exits, 0.0, np.nan))
+        held = pd.Series(events).ffill().fillna(0.0).to_numpy()
+    else:
+        # Held if an entry fired on any of the last 'hold' bars
+        counts = np.concatenate(([0], np.cumsum(entries)))
+        index = np.arange(n)
+        held = (counts[index + 1] - counts[np.maximum(index + 1 - hold, 0)] > 0).astype(float)
+    # A position taken at a bar's close earns the next bar's return
+    return np.concatenate(([0.0], held[:-1]))
+
+
+def run_backtest(data, entries, hold=24, exits=None, cost=0.0, bars_per_year=365 * 24):
+    """
+    Backtest a long-only strategy on one price history.
+
+    Parameters:
+    - data: DataFrame with a 'close' column.
+    - entries: Boolean array of entry signals, aligned with 'data'.
+    - hold, exits: See 'positions'.
+    - cost: Cost per side as a fraction of the price (e.g., 0.001 for 0.1%).
+    - bars_per_year: Number of bars in a year, used to annualize.
+
+    Returns:
+    - A tuple (bars, trades, stats): a DataFrame with the per-bar position,
+      return, equity and drawdown, a DataFrame with one row per trade, and a
+      dictionary of summary statistics.
+    """
+    close = data['close'].to_numpy(dtype=float)
+    position = positions(entries, hold=hold, exits=exits)
+
+    bar_return = np.zeros(len(close))
+    bar_return[1:] = close[1:] / close[:-1] - 1
+    # Both sides of a trade are charged inside it: on its first and on its last held bar
+    opened = position > np.concatenate(([0.0], position[:-1]))
+    closed = position > np.concatenate((position[1:], [0.0]))
+    strategy_return = position * bar_return - cost * (opened.astype(float) + closed)
+
+    equity = np.cumprod(1 + strategy_return)
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+
+    bars = pd.DataFrame({'position': position, 'return': strategy_return,
+                         'equity': equity, 'drawdown': drawdown}, index=data.index)
+
+    # Trades are the runs of held bars; their return is the equity ratio across the run
+    change = np.diff(np.concatenate(([0.0], position, [0.0])))
+    starts = np.flatnonzero(change > 0)
+    stops = np.flatnonzero(change < 0)
+    before = np.concatenate(([1.0], equity))[starts]
+    trade_return = equity[stops - 1] / before - 1
+    trades = pd.DataFrame({'entry_bar': starts - 1, 'exit_bar': stops - 1,
+                           'bars': stops - starts, 'return': trade_return})
+
+    years = len(close) / bars_per_year
+    std = strategy_return.std()
+    stats = {
+        'total_return': float(equity[-1] - 1) if len(equity) else 0.0,
+        'annual_return': float(equity[-1] ** (1 / years) - 1) if len(equity) and years > 0 else 0.0,
+        'sharpe': float(strategy_return.mean() / std * np.sqrt(bars_per_year)) if std > 0 else 0.0,
+        'max_drawdown': float(drawdown.min()) if len(drawdown) else 0.0,
+        'exposure': float(position.mean()) if len(position) else 0.0,
+        'trades': int(len(trades)),
+        'win_rate': float((trade_return > 0).mean()) if len(trades) else 0.0,
+        'avg_trade': float(trade_return.mean()) if len(trades) else 0.0,
+        'best_trade': float(trade_return.max()) if len(trades) else 0.0,
+        'worst_trade': float(trade_return.min()) if len(trades) else 0.0,
+        'buy_and_hold': float(close[-1] / close[0] - 1) if len(close) else 0.0,
+    }
+    return bars, trades, stats
+
+
+def load_prices(file_path):
+    """
+    Read an OHLCV CSV (e.g., the datasets/ files) with lower-case column names.
+    """
+    data = pd.read_csv(file_path)
+    data.columns = [column.lower() for column in data.columns]
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest a scanner signal on a price history.")
+    parser.add_argument('file', help="OHLCV CSV file in chronological order.")
+    parser.add_argument('--strategy', choices=sorted(ENTRIES), default='rsi', help="Entry signal.")
+    parser.add_argument('--hold', type=int, default=24, help="Number of bars each trade is held.")
+    parser.add_argument('--cost', type=float, default=0.001, help="Cost per side as a fraction of the price.")
+    parser.add_argument('--bars-per-year', type=int, default=365 * 24, help="Bars per year (hourly crypto by default).")
+    args = parser.parse_args(argv)
+
+    data = load_prices(args.file)
+    entries = ENTRIES[args.strategy](data)
+    _, trades, stats = run_backtest(data, entries, hold=args.hold, cost=args.cost, bars_per_year=args.bars_per_year)
+
+    for name, value in stats.items():
+        print(f"{name:>14}: {value:.4f}" if isinstance(value, float) else f"{name:>14}: {value}")
+    return stats
+
+
+if __name__ == '__main__':
+    main()
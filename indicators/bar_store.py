@@ -0,0 +1,284 @@
+"""
+Persistent local OHLCV bar store with incremental top-up fetches.
+
+Bars are kept on disk per (exchange, symbol, interval) as one raw .npy file per
+column plus a small meta.json, so they can be opened memory-mapped. On every
+scan only the bars newer than the last stored timestamp (plus a small overlap
+to refresh the still-forming last bar) are requested from the feed and merged
+into the stored history. When the overlapping bars no longer match the stored
+ones (the feed re-adjusted the history for a split or a dividend), the full
+history is fetched again.
+"""
+
+# Import required libraries
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# Default location of the store, next to the other datasets (the DATASETS_DIR environment variable moves them)
+DATASETS_DIR = os.environ.get('DATASETS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datasets'))
+DEFAULT_ROOT = os.path.join(DATASETS_DIR, 'bars')
+
+# Columns stored for every symbol (besides the datetime index)
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Columns compared when new bars overlap stored ones
+PRICES = ['open', 'high', 'low', 'close']
+
+# Length of one bar in seconds for each tvDatafeed Interval value
+INTERVAL_SECONDS = {
+    '1': 60, '3': 180, '5': 300, '15': 900, '30': 1800, '45': 2700,
+    '1H': 3600, '2H': 7200, '3H': 10800, '4H': 14400,
+    '1D': 86400, '1W': 7 * 86400, '1M': 28 * 86400,
+}
+
+
+def split_symbol(symbol, exchange):
+    """
+    Resolve the exchange of a symbol that may carry an 'EXCHANGE:' prefix.
+
+    Parameters:
+    - symbol: Symbol name, e.g. 'THYAO' or 'GATEIO:GOATUSDT'.
+    - exchange: Exchange used when the symbol has no prefix.
+
+    Returns:
+    - A tuple (exchange, symbol) without the prefix.
+    """
+    if ':' in symbol:
+        exchange, symbol = symbol.split(':', 1)
+    return exchange, symbol
+
+
+def interval_value(interval):
+    # Accept both tvDatafeed Interval members and their raw string values
+    return getattr(interval, 'value', interval)
+
+
+class BarStore:
+    """
+    On-disk OHLCV store keyed by (exchange, symbol, interval).
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, overlap=2):
+        """
+        Parameters:
+        - root: Directory holding the stored bars.
+        - overlap: Number of already stored bars re-fetched on every top-up, so that
+          the last (possibly incomplete) bar gets refreshed.
+        """
+        self.root = root
+        self.overlap = overlap
+
+    def _dir(self, exchange, symbol, interval):
+        exchange, symbol = split_symbol(symbol, exchange)
+        safe = symbol.replace('/', '_').replace('\\', '_')
+        return os.path.join(self.root, interval_value(interval), exchange, safe)
+
+    def read_meta(self, exchange, symbol, interval):
+        """
+        Return the metadata of a stored symbol, or None if nothing is stored.
+        """
+        path = os.path.join(self._dir(exchange, symbol, interval), 'meta.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def last_timestamp(self, exchange, symbol, interval):
+        """
+        Return the timestamp of the last stored bar, or None if nothing is stored.
+        """
+        meta = self.read_meta(exchange, symbol, interval)
+        if meta is None:
+            return None
+        return pd.Timestamp(meta['last_timestamp'])
+
+    def load(self, exchange, symbol, interval, mmap=True):
+        """
+        Load the stored bars of a symbol.
+
+        Parameters:
+        - exchange, symbol, interval: Key of the stored series.
+        - mmap: Open the column files memory-mapped instead of reading them.
+
+        Returns:
+        - A DataFrame shaped like tv.get_hist output (datetime index, 'symbol' and
+          OHLCV columns), or None if nothing is stored.
+        """
+        meta = self.read_meta(exchange, symbol, interval)
+        if meta is None:
+            return None
+        path = self._dir(exchange, symbol, interval)
+        mode = 'r' if mmap else None
+        index = pd.DatetimeIndex(np.load(os.path.join(path, 'datetime.npy'), mmap_mode=mode), name='datetime')
+        data = pd.DataFrame({'symbol': meta['symbol']}, index=index)
+        for column in COLUMNS:
+            data[column] = np.load(os.path.join(path, f'{column}.npy'), mmap_mode=mode)
+        return data
+
+    def save(self, exchange, symbol, interval, data, requested=None):
+        """
+        Write the full history of a symbol, replacing what was stored.
+
+        Parameters:
+        - exchange, symbol, interval: Key of the stored series.
+        - data: DataFrame shaped like tv.get_hist output.
+        - requested: Largest number of bars ever requested for this series.
+        """
+        path = self._dir(exchange, symbol, interval)
+        os.makedirs(path, exist_ok=True)
+
+        # Write every file under a temporary name first, then swap them in
+        arrays = {'datetime': data.index.values.astype('datetime64[ns]')}
+        for column in COLUMNS:
+            arrays[column] = data[column].to_numpy(dtype=np.float64)
+        for name, values in arrays.items():
+            tmp = os.path.join(path, f'{name}.tmp.npy')
+            np.save(tmp, values)
+            os.replace(tmp, os.path.join(path, f'{name}.npy'))
+
+        meta = {
+            'symbol': str(data['symbol'].iloc[-1]) if 'symbol' in data else f'{exchange}:{symbol}',
+            'last_timestamp': str(data.index[-1]),
+            'rows': len(data),
+            'requested': requested if requested is not None else len(data),
+        }
+        tmp = os.path.join(path, 'meta.tmp.json')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, 'meta.json'))
+
+    def bars_to_fetch(self, meta, interval, n_bars, now=None):
+        """
+        Work out how many bars must be requested to bring a stored series up to date.
+
+        Parameters:
+        - meta: Stored metadata (None if the symbol is not stored yet).
+        - interval: tvDatafeed Interval of the bars.
+        - n_bars: Number of bars the caller needs.
+        - now: Current time (defaults to pd.Timestamp.now()).
+
+        Returns:
+        - The number of bars to request; 'n_bars' means a full fetch.
+        """
+        if meta is None or meta['requested'] < n_bars:
+            return n_bars
+        now = pd.Timestamp.now() if now is None else now
+        elapsed = (now - pd.Timestamp(meta['last_timestamp'])).total_seconds()
+        missing = math.ceil(max(elapsed, 0) / INTERVAL_SECONDS[interval_value(interval)])
+        return min(n_bars, missing + self.overlap)
+
+    def merge(self, stored, new, rtol=1e-6):
+        """
+        Merge freshly fetched bars into the stored history.
+
+        The bars present in both are compared first: when the feed re-adjusted the
+        history (a split or a dividend), the stored prices no longer match and the
+        stored head must not be spliced onto the adjusted bars.
+
+        Parameters:
+        - stored: Stored bars (None if nothing is stored).
+        - new: Freshly fetched bars.
+        - rtol: Relative tolerance of the price comparison.
+
+        Returns:
+        - The merged DataFrame, or None if the new bars do not overlap the stored ones
+          (a gap) or their prices differ from the stored ones, so the history must be
+          fetched again in full.
+        """
+        if stored is None or len(stored) == 0:
+            return new
+        if new.index[0] > stored.index[-1]:
+            return None
+
+        # Every overlapping bar but the last stored one is final; the last one may still
+        # have been forming when it was stored, so only its open can be compared
+        last = stored.index[-1]
+        common = stored.index.intersection(new.index)
+        final = common[common < last]
+        if not np.allclose(stored.loc[final, PRICES].to_numpy(dtype=np.float64),
+                           new.loc[final, PRICES].to_numpy(dtype=np.float64), rtol=rtol, atol=0, equal_nan=True):
+            return None
+        if last in new.index and not np.isclose(stored.at[last, 'open'], new.at[last, 'open'], rtol=rtol, atol=0):
+            return None
+
+        # Fresh bars replace stored ones from their first timestamp on
+        head = stored[stored.index < new.index[0]]
+        return pd.concat([head, new[['symbol'] + COLUMNS]])
+
+    def stored_tail(self, exchange, symbol, interval, n_bars=1000):
+        """
+        Return the last 'n_bars' stored bars of a symbol, or None if nothing is stored.
+        """
+        data = self.load(exchange, symbol, interval)
+        return None if data is None else data.tail(n_bars)
+
+    def top_up(self, feed, symbol, exchange, interval, n_bars=1000, fallback=True):
+        """
+        Bring one symbol up to date using the given feed and return its last 'n_bars' bars.
+
+        Parameters:
+        - feed: Data feed object with a 'get_hist' method (e.g., TvDatafeed).
+        - symbol, exchange, interval: Key of the series.
+        - n_bars: Number of bars returned to the caller.
+        - fallback: Return the stored bars when the feed answers with no data (tvDatafeed
+          also returns None on transient errors, so an empty answer must not discard them).
+
+        Returns:
+        - A DataFrame shaped like tv.get_hist output, or None if neither the feed nor
+          the store (with 'fallback') had data.
+        """
+        # Request prefixed symbols (e.g., 'GATEIO:GOATUSDT', 'NYSE:UBER') from their own exchange
+        exchange, symbol = split_symbol(symbol, exchange)
+        meta = self.read_meta(exchange, symbol, interval)
+        count = self.bars_to_fetch(meta, interval, n_bars)
+        new = feed.get_hist(symbol=symbol, exchange=exchange, interval=interval, n_bars=count)
+        if new is None or len(new) == 0:
+            return self.stored_tail(exchange, symbol, interval, n_bars) if fallback and meta is not None else None
+
+        merged = None
+        if count < n_bars:
+            merged = self.merge(self.load(exchange, symbol, interval, mmap=False), new)
+        if merged is None:
+            # Nothing usable stored yet (or a gap): fetch the full history
+            if count < n_bars:
+                new = feed.get_hist(symbol=symbol, exchange=exchange, interval=interval, n_bars=n_bars)
+                if new is None or len(new) == 0:
+                    return self.stored_tail(exchange, symbol, interval, n_bars) if fallback else None
+            merged = new
+
+        requested = max(n_bars, meta['requested']) if meta is not None else n_bars
+        self.save(exchange, symbol, interval, merged, requested=requested)
+        return merged.tail(n_bars)
+
+    def fetch(self, engine, symbols, exchange, interval, n_bars=1000, offline=False):
+        """
+        Fetch bars for every symbol through the store.
+
+        Parameters:
+        - engine: FetchEngine used to run the top-up requests concurrently.
+        - symbols: List of symbols to fetch.
+        - exchange: Exchange name passed to get_hist (e.g., 'BIST', 'NASDAQ').
+        - interval: tvDatafeed Interval of the bars.
+        - n_bars: Number of bars returned per symbol.
+        - offline: Serve only what is stored, without any network request.
+
+        Returns:
+        - A list of (symbol, data, error) tuples in the same order as 'symbols',
+          matching FetchEngine.fetch. Symbols the feed still had no data for after
+          the engine's retries get their stored bars, if any.
+        """
+        if offline:
+            return [(symbol, self.stored_tail(exchange, symbol, interval, n_bars), None) for symbol in symbols]
+
+        # Empty answers reach the engine (so it backs off and retries); the stored bars are used afterwards
+        def top_up(feed, symbol):
+            return self.top_up(feed, symbol, exchange, interval, n_bars, fallback=False)
+
+        results = engine.map(top_up, symbols)
+        return [(symbol, self.stored_tail(exchange, symbol, interval, n_bars), None)
+                if data is None and error is None else (symbol, data, error)
+                for symbol, data, error in results]
@@ -4,80 +4,68 @@
 import numpy as np
 import pandas as pd
 from tvDatafeed import TvDatafeed, Interval
-from tradingview_screener import get_all_symbols
+from fetch_engine import FetchEngine
+from session_pool import SessionPool
+from bar_store import BarStore
+from streaming import StateStore, RSIIFTState
+from result_sink import ResultSink
+from universe import SymbolUniverse
 import warnings
-import pandas_ta as ta
 import matplotlib.pyplot as plt
 
 warnings.simplefilter(action='ignore')
 
-# Function to calculate RSI and apply Inverse Fisher Transform (IFT) on RSI with adjustable parameters
-def calculate_rsi_ift(data, rsi_length=5, smoothing_length=9):
-    """
-    Calculate the RSI and apply the Inverse Fisher Transform (IFT) on RSI with adjustable RSI and smoothing lengths.
-    """
-    # Calculate RSI
-    data['RSI'] = ta.rsi(data['close'], length=rsi_length)
-    
-    # Normalize RSI to the range [-1, 1] for IFT
-    normalized_rsi = 2 * (data['RSI'] - 50) / 100
-    
-    # Smooth the normalized RSI with a simple moving average (SMA)
-    smoothed_rsi = ta.sma(normalized_rsi, length=smoothing_length)
-    
-    # Apply the Inverse Fisher Transform
-    data['IFT_RSI'] = np.tanh(smoothed_rsi)
-    
-    return data
-
-# Initialize the data feed
-tv = TvDatafeed()
+# Initialize the concurrent fetch engine on a pool of 16 reusable TradingView sessions
+pool = SessionPool(TvDatafeed, size=16)
+engine = FetchEngine(lambda: pool, max_workers=pool.size, timeout=30)  # One worker per session
+store = BarStore()  # Local bar cache: only new bars are fetched on later runs
+states = StateStore()  # Saved indicator states: only bars since the last run are processed
 
 # Define the list of stocks to analyze (from the Turkish market)
-Hisseler = get_all_symbols(market='turkey')
+universe = SymbolUniverse()  # Cached symbol list; symbols that recently returned no data are skipped
+Hisseler = universe.select('turkey', exchanges=['BIST'])
 Hisseler = [symbol.replace('BIST:', '') for symbol in Hisseler]
 Hisseler = sorted(Hisseler)
 
-# DataFrame to store signals
+# Columnar sink to store signals
 Titles = ['Hisse Adı', 'Son Fiyat', 'IFT Buy Signal']
-df_signals = pd.DataFrame(columns=Titles)
+sink = ResultSink('bist_iftrsi', Titles)  # Rows are also recorded in the signal history
+
+# Fetch historical data for all stocks concurrently
+results = store.fetch(engine, Hisseler, exchange='BIST', interval=Interval.in_daily, n_bars=1000)
+universe.record_results('turkey', results, exchange='BIST', engine=engine)
 
 # Main loop to process each stock
-for hisse in Hisseler:
+for hisse, data, error in results:
     try:
-        # Fetch historical data
-        data = tv.get_hist(symbol=hisse, exchange='BIST', interval=Interval.in_daily, n_bars=1000)
+        if error is not None:
+            raise error
         data = data.reset_index()
 
         # Customize RSI length and smoothing length for different timeframes
         # For daily charts, use RSI length = 5 and smoothing length = 9
-        data = calculate_rsi_ift(data, rsi_length=5, smoothing_length=9)
-
-        # Prepare the data
-        data.rename(columns={'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}, inplace=True)
-        data.set_index('datetime', inplace=True)
-
-        # Remove rows with NaN values in IFT_RSI
-        data.dropna(subset=['IFT_RSI'], inplace=True)
-
-        # Extract the last data point
-        Signals = data.tail(1).reset_index()
+        # Resume the IFT on RSI from its saved state and get its last value
+        _, last_ift = states.resume('BIST', hisse, Interval.in_daily, 'ift_rsi_sma_5_9',
+                                    lambda: RSIIFTState(rsi_length=5, smoothing_length=9, smoothing='sma'), data)
 
         # Define the buy signal logic based on IFT of RSI being less than -0.5
-        Entry = Signals.loc[0, 'IFT_RSI'] < -0.5
+        Entry = last_ift < -0.5
         Entry = bool(Entry)
 
         # Get the last closing price
-        Last_Price = float(Signals.loc[0, 'Close'])
+        Last_Price = float(data['close'].iloc[-1])
 
-        # Append the results to the DataFrame
+        # Append the results to the signals sink
         L1 = [hisse, Last_Price, Entry]
-        df_signals.loc[len(df_signals)] = L1
+        sink.append(L1)
         print(L1)
     except Exception as e:
         print(f"Error processing {hisse}: {e}")
         pass
 
+# Flush the rows to the signal history and collect them in a DataFrame
+df_signals = sink.close()
+
 # Filter and display stocks with a buy signal
 df_True = df_signals[df_signals['IFT Buy Signal'] == True]
 
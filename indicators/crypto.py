@@ -6,33 +6,21 @@ This code scans cryptocurrencies where Inverse Fisher Transform (IFT) on RSI is
 import numpy as np
 import pandas as pd
 from tvDatafeed import TvDatafeed, Interval
+from fetch_engine import FetchEngine
+from session_pool import SessionPool
+from bar_store import BarStore
+from streaming import StateStore, RSIIFTState
+from result_sink import ResultSink
 import warnings
-import pandas_ta as ta
 import matplotlib.pyplot as plt
 
 warnings.simplefilter(action='ignore')
 
-# Function to calculate RSI and apply Inverse Fisher Transform (IFT) on RSI with adjustable parameters
-def calculate_rsi_ift(data, rsi_length=5, smoothing_length=9):
-    """
-    Calculate the RSI and apply the Inverse Fisher Transform (IFT) on RSI with adjustable RSI and smoothing lengths.
-    """
-    # Calculate RSI
-    data['RSI'] = ta.rsi(data['close'], length=rsi_length)
-    
-    # Normalize RSI
-    v1 = 0.1 * (data['RSI'] - 50)
-    
-    # Smooth v1 using an Exponential Moving Average (EMA)
-    v2 = ta.ema(v1, length=smoothing_length)
-    
-    # Apply the Inverse Fisher Transform
-    data['IFT_RSI'] = (np.exp(2 * v2) - 1) / (np.exp(2 * v2) + 1)
-    
-    return data
-
-# Initialize the data feed
-tv = TvDatafeed()
+# Initialize the concurrent fetch engine on a pool of 16 reusable TradingView sessions
+pool = SessionPool(TvDatafeed, size=16)
+engine = FetchEngine(lambda: pool, max_workers=pool.size, timeout=30)  # One worker per session
+store = BarStore()  # Local bar cache: only new bars are fetched on later runs
+states = StateStore()  # Saved indicator states: only bars since the last run are processed
 
 # Define the list of cryptocurrencies to analyze
 cryptos = ['BINANCE:BTCUSDT','BINANCE:ETHUSDT','BINANCE:LTCUSDT',
@@ -60,46 +48,43 @@ cryptos = ['BINANCE:BTCUSDT','BINANCE:ETHUSDT','BINANCE:LTCUSDT',
            'BINANCE:HIGHUSDT','BINANCE:DUSKUSDT','BINANCE:IOUSDT',
            'BINANCE:SNXUSDT']
 
-# DataFrame to store signals
+# Columnar sink to store signals
 Titles = ['Crypto Symbol', 'Last Price', 'IFT Signal']
-df_signals = pd.DataFrame(columns=Titles)
+sink = ResultSink('crypto', Titles)  # Rows are also recorded in the signal history
+
+# Fetch historical data for all cryptocurrencies concurrently
+results = store.fetch(engine, cryptos, exchange='BINANCE', interval=Interval.in_daily, n_bars=1000)
 
 # Main loop to process each cryptocurrency
-for crypto in cryptos:
+for crypto, data, error in results:
     try:
-        # Fetch historical data
-        data = tv.get_hist(symbol=crypto, exchange='BINANCE', interval=Interval.in_daily, n_bars=1000)
+        if error is not None:
+            raise error
         data = data.reset_index()
 
         # Customize RSI length and smoothing length for different timeframes
-        data = calculate_rsi_ift(data, rsi_length=5, smoothing_length=9)
-
-        # Prepare the data
-        data.rename(columns={'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}, inplace=True)
-        data.set_index('datetime', inplace=True)
-
-        # Remove rows with NaN values in IFT_RSI
-        data.dropna(subset=['IFT_RSI'], inplace=True)
-
-        # Extract the last data point
-        Signals = data.tail(1).reset_index()
+        # Resume the IFT on RSI from its saved state and get its last value
+        _, last_ift = states.resume('BINANCE', crypto, Interval.in_daily, 'ift_rsi_ema_5_9',
+                                    lambda: RSIIFTState(rsi_length=5, smoothing_length=9, smoothing='ema'), data)
 
         # Define the signal logic based on IFT of RSI being between -0.5 and +0.5
-        IFT_RSI_value = Signals.loc[0, 'IFT_RSI']
-        Entry = (-0.5 <= IFT_RSI_value <= 0.5)
+        Entry = (-0.5 <= last_ift <= 0.5)
         Entry = bool(Entry)  # Convert to boolean
 
         # Get the last closing price and convert to float
-        Last_Price = float(Signals.loc[0, 'Close'])
+        Last_Price = float(data['close'].iloc[-1])
 
-        # Append the results to the DataFrame
+        # Append the results to the signals sink
         L1 = [crypto, Last_Price, Entry]
-        df_signals.loc[len(df_signals)] = L1
+        sink.append(L1)
         print(L1)
     except Exception as e:
         print(f"Error processing {crypto}: {e}")
         pass
 
+# Flush the rows to the signal history and collect them in a DataFrame
+df_signals = sink.close()
+
 # Filter and display cryptocurrencies with the signal
 df_True = df_signals[df_signals['IFT Signal'] == True]
 
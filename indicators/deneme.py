@@ -1,6 +1,10 @@
 import numpy as np
 import pandas as pd
 from tvDatafeed import TvDatafeed, Interval
+from fetch_engine import FetchEngine
+from session_pool import SessionPool
+from bar_store import BarStore
+from result_sink import ResultSink
 import warnings
 import pandas_ta as ta
 import matplotlib.pyplot as plt
@@ -15,8 +19,10 @@ def calculate_rsi_ift(data, rsi_length=5, smoothing_length=9):
     data['IFT_RSI'] = (np.exp(2 * v2) - 1) / (np.exp(2 * v2) + 1)
     return data
 
-# Initialize the data feed
-tv = TvDatafeed()
+# Initialize the concurrent fetch engine on a pool of reusable TradingView sessions
+pool = SessionPool(TvDatafeed, size=16)
+engine = FetchEngine(lambda: pool, max_workers=pool.size, timeout=30)  # One worker per session
+store = BarStore()  # Local bar cache: only new bars are fetched on later runs
 
 # Define the list of cryptocurrencies to analyze
 cryptos = ['BINANCE:BTCUSDT','BINANCE:ETHUSDT','BINANCE:LTCUSDT',
@@ -36,8 +42,8 @@ cryptos = ['BINANCE:BTCUSDT','BINANCE:ETHUSDT','BINANCE:LTCUSDT',
            'BINANCE:FILUSDT','BINANCE:INJUSDT','BINANCE:ATOMUSDT',
            'BINANCE:SEIUSDT','BINANCE:RUNEUSDT','BINANCE:RAYUSDT']
 
-# DataFrame to store signals
-df_signals = pd.DataFrame(columns=['Crypto Symbol', 'Last Price', 'IFT Signal'])
+# Columnar sink to store signals
+sink = ResultSink('deneme', ['Crypto Symbol', 'Last Price', 'IFT Signal'])  # Rows are also recorded in the signal history
 
 # User input to choose the range of IFT_RSI to scan
 print("Select the range of IFT RSI to scan:")
@@ -50,9 +56,11 @@ if choice not in ['1', '2']:
     raise ValueError("Invalid choice. Please enter 1 or 2.")
 
 # Main loop to process each cryptocurrency
-for crypto in cryptos:
+results = store.fetch(engine, cryptos, exchange='BINANCE', interval=Interval.in_daily, n_bars=1000)
+for crypto, data, error in results:
     try:
-        data = tv.get_hist(symbol=crypto, exchange='BINANCE', interval=Interval.in_daily, n_bars=1000)
+        if error is not None:
+            raise error
         data = data.reset_index()
         data = calculate_rsi_ift(data, rsi_length=5, smoothing_length=9)
         data.rename(columns={'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}, inplace=True)
@@ -67,10 +75,13 @@ for crypto in cryptos:
             Entry = -0.5 <= IFT_RSI_value <= 0.5
 
         Last_Price = float(Signals.loc[0, 'Close'])
-        df_signals.loc[len(df_signals)] = [crypto, Last_Price, bool(Entry)]
+        sink.append([crypto, Last_Price, bool(Entry)])
     except Exception as e:
         print(f"Error processing {crypto}: {e}")
 
+# Flush the rows to the signal history and collect them in a DataFrame
+df_signals = sink.close()
+
 # Filter and display cryptocurrencies with the signal
 df_True = df_signals[df_signals['IFT Signal'] == True]
 print("\nSelected Cryptocurrencies:")
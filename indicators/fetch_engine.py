@@ -0,0 +1,244 @@
+"""
+Concurrent, rate-limited fetch engine shared by the scanners.
+
+The scanners used to call tv.get_hist one symbol at a time. FetchEngine runs
+many requests at once on a thread pool, caps the number of requests in flight,
+applies a per-request timeout and backs off when the feed starts failing.
+Results are always returned in the same order as the input symbols.
+"""
+
+# Import required libraries
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bar_store import split_symbol
+from scan_metrics import NULL_METRICS
+
+
+class EmptyResult(Exception):
+    """
+    Recorded (not raised) when a request returned no data.
+    """
+
+
+def is_empty(result):
+    # None, or a DataFrame (or any sized result) without rows
+    return result is None or (hasattr(result, '__len__') and len(result) == 0)
+
+
+class AdaptiveThrottle:
+    """
+    Limit the number of requests in flight and adapt it to the health of the feed.
+
+    Successes slowly raise the allowed concurrency back towards the maximum
+    (additive increase). Failures halve it and add a growing pause between
+    request starts (multiplicative decrease), so a rate-limited feed gets room
+    to recover instead of being hammered by every worker at once.
+    """
+
+    def __init__(self, max_in_flight=8, min_delay=0.0, max_delay=30.0):
+        """
+        Parameters:
+        - max_in_flight: Upper bound on the number of concurrent requests.
+        - min_delay: Pause (seconds) kept between request starts when the feed is healthy.
+        - max_delay: Largest pause (seconds) the back-off is allowed to reach.
+        """
+        self.max_in_flight = max_in_flight
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.limit = float(max_in_flight)
+        self.delay = min_delay
+        self.in_flight = 0
+        self._next_start = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """
+        Block until a request slot is free and the current pacing delay has passed.
+        """
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            # Reserve a start time so that concurrent workers are spaced by 'delay'
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.delay
+        wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+
+    def release(self, ok):
+        """
+        Free a request slot and adapt the limits.
+
+        Parameters:
+        - ok: True if the request succeeded, False if it failed or timed out.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if ok:
+                self.limit = min(self.max_in_flight, self.limit + 1.0 / max(self.limit, 1.0))
+                self.delay = max(self.min_delay, self.delay * 0.5)
+            else:
+                self.limit = max(1.0, self.limit / 2)
+                self.delay = min(self.max_delay, max(self.delay * 2, 0.1))
+            self._cond.notify_all()
+
+
+class FetchEngine:
+    """
+    Fetch historical data for many symbols concurrently.
+
+    TvDatafeed keeps its websocket on the instance, so one instance must not be
+    shared between threads. The engine therefore creates one feed per worker
+    thread through 'feed_factory' (for example the TvDatafeed class itself).
+    """
+
+    def __init__(self, feed_factory, max_workers=8, timeout=30.0, retries=2, empty_retries=1,
+                 min_delay=0.0, max_delay=30.0, metrics=None):
+        """
+        Parameters:
+        - feed_factory: Callable returning a new data feed object with a 'get_hist' method.
+        - max_workers: Maximum number of requests in flight.
+        - timeout: Per-request timeout in seconds (None disables it).
+        - retries: How many times a failed request is retried before giving up.
+        - empty_retries: How many times a request that returned no data is retried.
+        - min_delay: Pause (seconds) kept between request starts when the feed is healthy.
+        - max_delay: Largest back-off pause (seconds) between request starts.
+        - metrics: ScanMetrics recording the throttle wait and request time of every item
+          and the exception type of every failed or empty attempt (disabled if None).
+        """
+        self.feed_factory = feed_factory
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.retries = retries
+        self.empty_retries = empty_retries
+        self.throttle = AdaptiveThrottle(max_workers, min_delay, max_delay)
+        self.metrics = metrics or NULL_METRICS
+        # Attempt counters over the lifetime of the engine
+        self.failed_attempts = 0  # Exceptions and timeouts
+        self.empty_attempts = 0  # Answers without data
+        self.recovered = 0  # Items that returned data on a retry after an empty answer
+        self.failed_items = set()  # Items with at least one exception or timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _feed(self):
+        # Lazily create one feed object per worker thread
+        feed = getattr(self._local, 'feed', None)
+        if feed is None:
+            feed = self.feed_factory()
+            self._local.feed = feed
+        return feed
+
+    def _call(self, func, feed, item):
+        # Run the request directly, or on a helper thread when a timeout is set
+        if self.timeout is None:
+            return func(feed, item)
+
+        outcome = {}
+
+        def target():
+            try:
+                outcome['result'] = func(feed, item)
+            except Exception as e:
+                outcome['error'] = e
+
+        worker = threading.Thread(target=target, daemon=True)
+        worker.start()
+        worker.join(self.timeout)
+        if worker.is_alive():
+            # The hung call still owns this feed, so never reuse it
+            self._local.feed = None
+            raise TimeoutError(f"request timed out after {self.timeout} seconds")
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result']
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _run(self, func, item):
+        # Execute one request with throttling and retries.
+        # Exceptions and timeouts are retried up to 'retries' times. An empty answer (None)
+        # may be a symbol without data, but tvDatafeed also returns None on receive errors,
+        # timeouts and rate limiting, so it is a soft failure: it triggers the back-off and
+        # is retried up to 'empty_retries' times before being returned as "no data".
+        error = None
+        failures = empties = 0
+        metrics = self.metrics
+        while True:
+            queued = time.perf_counter()
+            self.throttle.acquire()
+            start = time.perf_counter()
+            metrics.record('throttle', item, start - queued)
+            ok = empty = False
+            try:
+                result = self._call(func, self._feed(), item)
+                empty = is_empty(result)
+                ok = not empty
+            except Exception as e:
+                error = e
+                metrics.error('fetch_attempt', item, e)
+            finally:
+                self.throttle.release(ok)
+                metrics.record('fetch', item, time.perf_counter() - start)
+
+            if ok:
+                if empties:
+                    self._count('recovered')
+                return result, None
+            if empty:
+                self._count('empty_attempts')
+                metrics.error('fetch_attempt', item, EmptyResult("no data returned"))
+                if empties >= self.empty_retries:
+                    return None, None
+                empties += 1
+            else:
+                self._count('failed_attempts')
+                with self._lock:
+                    self.failed_items.add(item)
+                if failures >= self.retries:
+                    return None, error
+                failures += 1
+
+    def map(self, func, items):
+        """
+        Apply 'func(feed, item)' to every item concurrently.
+
+        Parameters:
+        - func: Callable taking a feed object and one item, returning the fetched data.
+        - items: Iterable of items (for example symbols).
+
+        Returns:
+        - A list of (item, result, error) tuples in the same order as 'items'.
+          'result' is None when the request failed or the feed had no data;
+          'error' holds the last exception, if any.
+        """
+        items = list(items)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self._run, func, item) for item in items]
+            return [(item,) + future.result() for item, future in zip(items, futures)]
+
+    def fetch(self, symbols, exchange, interval, n_bars=1000):
+        """
+        Fetch historical bars for every symbol concurrently.
+
+        Parameters:
+        - symbols: List of symbols to fetch.
+        - exchange: Exchange name passed to get_hist (e.g., 'BIST', 'NASDAQ').
+        - interval: tvDatafeed Interval of the bars.
+        - n_bars: Number of bars to fetch per symbol.
+
+        Returns:
+        - A list of (symbol, data, error) tuples in the same order as 'symbols'.
+        """
+        def get_hist(feed, symbol):
+            # Prefixed symbols (e.g., 'GATEIO:GOATUSDT') are requested from their own exchange
+            symbol_exchange, symbol = split_symbol(symbol, exchange)
+            return feed.get_hist(symbol=symbol, exchange=symbol_exchange, interval=interval, n_bars=n_bars)
+
+        return self.map(get_hist, symbols)
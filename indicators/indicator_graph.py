@@ -0,0 +1,178 @@
+"""
+Indicator computation graph with shared subexpressions and memoization.
+
+Indicators are declared as nodes (an operation, its input nodes and its
+parameters). Two nodes built the same way, for example rsi(CLOSE, 5) declared
+by two different strategies, have the same key and are computed only once per
+symbol. Computed arrays are also kept in a bounded LRU cache keyed by the
+symbol, its last bar and the node key, so running several strategies costs
+little more than running the heaviest one.
+
+The operations are the same pandas/pandas_ta calls used in strategies.py, so
+the values are identical to the batch functions.
+"""
+
+# Import required libraries
+from collections import OrderedDict
+
+import numpy as np
+import pandas_ta as ta
+
+import strategies
+
+
+class Node:
+    """
+    One indicator in the graph.
+    """
+
+    def __init__(self, name, func, inputs=(), **params):
+        """
+        Parameters:
+        - name: Name of the operation; together with the inputs and the parameters
+          it identifies the node.
+        - func: Callable computing the node from its input values and parameters.
+        - inputs: Input nodes.
+        - params: Parameters passed to 'func' as keyword arguments.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = params
+        self.key = (name, tuple(node.key for node in self.inputs), tuple(sorted(params.items())))
+
+    def __repr__(self):
+        params = ', '.join(f'{k}={v}' for k, v in sorted(self.params.items()))
+        return f"{self.name}({params})"
+
+
+def column(name):
+    """
+    Source node reading a column of the bars (e.g., 'close').
+    """
+    return Node('column', None, column=name)
+
+def sma(node, length):
+    return Node('sma', strategies.sma, (node,), length=length)
+
+def ema(node, length):
+    return Node('ema', strategies.ema, (node,), length=length)
+
+def ta_sma(node, length):
+    return Node('ta_sma', lambda series, length: ta.sma(series, length=length), (node,), length=length)
+
+def ta_ema(node, length):
+    # pandas_ta EMA, seeded with the SMA of the first 'length' values
+    return Node('ta_ema', lambda series, length: ta.ema(series, length=length), (node,), length=length)
+
+def rolling_min(node, window):
+    return Node('rolling_min', lambda series, window: series.rolling(window=window).min(), (node,), window=window)
+
+def rolling_max(node, window):
+    return Node('rolling_max', lambda series, window: series.rolling(window=window).max(), (node,), window=window)
+
+def rsi(node, length):
+    return Node('rsi', lambda series, length: ta.rsi(series, length=length), (node,), length=length)
+
+def apply(name, func, *inputs, **params):
+    """
+    Node computed by an arbitrary function of other nodes; 'name' must identify 'func'.
+    """
+    return Node(name, func, inputs, **params)
+
+
+# Source columns
+OPEN, HIGH, LOW, CLOSE = column('open'), column('high'), column('low'), column('close')
+
+
+def bankery_nodes():
+    """
+    Return the (fundtrend, bullbearline, entry) nodes of the Bankery indicator.
+    """
+    min_low_27 = rolling_min(LOW, 27)
+    percentage_change = apply('bankery_percentage', lambda close, low, high: (close - low) / (high - low) * 100,
+                              CLOSE, min_low_27, rolling_max(HIGH, 27))
+    sma1 = sma(percentage_change, 5)
+    sma2 = sma(sma1, 3)
+    fundtrend = apply('bankery_fundtrend', lambda sma1, sma2: (3 * sma1 - 2 * sma2 - 50) * 1.032 + 50, sma1, sma2)
+
+    typ = apply('typical_price', lambda close, high, low, open_: (2 * close + high + low + open_) / 5,
+                CLOSE, HIGH, LOW, OPEN)
+    lol = rolling_min(LOW, 34)
+    hoh = rolling_max(HIGH, 34)
+    bullbearline = ema(apply('bankery_range', lambda typ, lol, hoh: ((typ - lol) / (hoh - lol) * 100), typ, lol, hoh), 13)
+
+    entry = apply('bankery_entry', lambda fundtrend, bullbearline: (fundtrend > bullbearline) & (bullbearline < 25),
+                  fundtrend, bullbearline)
+    return fundtrend, bullbearline, entry
+
+def rsi_ift_node(rsi_length=5, smoothing_length=9, smoothing='ema'):
+    """
+    Return the IFT-RSI node, matching 'strategies.calculate_rsi_ift'.
+    """
+    base = rsi(CLOSE, rsi_length)
+    if smoothing == 'sma':
+        normalized = apply('rsi_normalized', lambda r: 2 * (r - 50) / 100, base)
+        return apply('tanh', np.tanh, ta_sma(normalized, smoothing_length))
+    if smoothing == 'ema':
+        v2 = ta_ema(apply('rsi_v1', lambda r: 0.1 * (r - 50), base), smoothing_length)
+        return apply('ift', lambda v2: (np.exp(2 * v2) - 1) / (np.exp(2 * v2) + 1), v2)
+    raise ValueError(f"Unknown smoothing: {smoothing!r} (expected 'ema' or 'sma')")
+
+
+class Evaluator:
+    """
+    Evaluate nodes for a symbol, computing shared nodes once and caching results.
+    """
+
+    def __init__(self, cache_size=4096):
+        """
+        Parameters:
+        - cache_size: Maximum number of node results kept in the LRU cache.
+        """
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _fingerprint(self, data):
+        # The last bar may still be forming, so its close is part of the key
+        last = data.index[-1] if 'datetime' not in data else data['datetime'].iloc[-1]
+        return (len(data), str(last), float(data['close'].iloc[-1]))
+
+    def evaluate(self, symbol, data, nodes):
+        """
+        Compute the given nodes for one symbol.
+
+        Parameters:
+        - symbol: Symbol name (part of the cache key).
+        - data: DataFrame of bars with 'open', 'high', 'low', 'close' columns.
+        - nodes: Iterable of nodes to compute.
+
+        Returns:
+        - A dictionary mapping each requested node key to its value (a Pandas Series).
+        """
+        prefix = (symbol,) + self._fingerprint(data)
+        values = {}
+
+        def compute(node):
+            if node.key in values:
+                return values[node.key]
+            cache_key = prefix + (node.key,)
+            if node.func is None:
+                # Source columns are read directly and never cached
+                value = data[node.params['column']]
+            elif cache_key in self.cache:
+                self.cache.move_to_end(cache_key)
+                self.hits += 1
+                value = self.cache[cache_key]
+            else:
+                self.misses += 1
+                value = node.func(*[compute(child) for child in node.inputs], **node.params)
+                self.cache[cache_key] = value
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            values[node.key] = value
+            return value
+
+        return {node.key: compute(node) for node in nodes}
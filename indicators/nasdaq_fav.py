@@ -1,24 +1,22 @@
 import numpy as np
-import pandas as pd
 from tvDatafeed import TvDatafeed, Interval
+from fetch_engine import FetchEngine
+from session_pool import SessionPool
+from bar_store import BarStore
+from streaming import StateStore, RSIState
+from result_sink import ResultSink
 from tradingview_screener import get_all_symbols
 import warnings
-import pandas_ta as ta
 import matplotlib.pyplot as plt
 
 warnings.simplefilter(action='ignore')
 
-# Function to calculate RSI
-def calculate_rsi(data, length=14):
-    """
-    Calculate the Relative Strength Index (RSI) for the given data.
-    """
-    data['RSI'] = ta.rsi(data['close'], length=length)
-    return data
-
-# Initialize the data feed (use guest mode or provide credentials)
-tv = TvDatafeed()  # For guest mode
-# tv = TvDatafeed(username='your_username', password='your_password')  # For authenticated mode
+# Initialize the concurrent fetch engine (use guest mode or provide credentials)
+pool = SessionPool(TvDatafeed, size=16)  # For guest mode
+# pool = SessionPool(lambda: TvDatafeed(username='your_username', password='your_password'), size=16)  # For authenticated mode
+engine = FetchEngine(lambda: pool, max_workers=pool.size, timeout=30)  # One worker per session
+store = BarStore()  # Local bar cache: only new bars are fetched on later runs
+states = StateStore()  # Saved indicator states: only bars since the last run are processed
 
 # Define the list of stocks to analyze
 Hisseler = ['NASDAQ:NVDA', 'NASDAQ:AMZN', 'NASDAQ:MSFT', 'NASDAQ:AMD', 'NASDAQ:MRVL',
@@ -28,48 +26,44 @@ Hisseler = ['NASDAQ:NVDA', 'NASDAQ:AMZN', 'NASDAQ:MSFT', 'NASDAQ:AMD', 'NASDAQ:M
 Hisseler = [symbol.replace('NASDAQ:', '') for symbol in Hisseler if symbol.startswith('NASDAQ:')]
 Hisseler = sorted(Hisseler)
 
-# DataFrame to store signals
+# Columnar sink to store signals
 Titles = ['Stock Symbol', 'Last Price', 'RSI Buy Signal']
-df_signals = pd.DataFrame(columns=Titles)
+sink = ResultSink('nasdaq_fav', Titles)  # Rows are also recorded in the signal history
+
+# Fetch historical data for all stocks concurrently
+results = store.fetch(engine, Hisseler, exchange='NASDAQ', interval=Interval.in_daily, n_bars=1000)
 
 # Main loop to process each stock
-for hisse in Hisseler:
+for hisse, data, error in results:
     try:
-        # Fetch historical data
-        data = tv.get_hist(symbol=hisse, exchange='NASDAQ', interval=Interval.in_daily, n_bars=1000)
+        if error is not None:
+            raise error
         data = data.reset_index()
         
-        # Calculate RSI
-        data = calculate_rsi(data)
-        
-        # Prepare the data
-        data.rename(columns={'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}, inplace=True)
-        data.set_index('datetime', inplace=True)
-        
-        # Remove rows with NaN values in RSI
-        data.dropna(subset=['RSI'], inplace=True)
-        
-        # Extract the last two data points
-        Signals = data.tail(2).reset_index()
-        
+        # Resume the RSI from its saved state and get its last two values
+        previous_rsi, last_rsi = states.resume('NASDAQ', hisse, Interval.in_daily, 'rsi_14', lambda: RSIState(14), data)
+
         # Define the buy signal logic for RSI
         # Signal when RSI crosses above 30 (from oversold territory)
-        Entry = (Signals.loc[0, 'RSI'] < 30) & (Signals.loc[1, 'RSI'] >= 30)
-        
-        # Get the last closing price and convert to float
-        Last_Price = float(Signals.loc[1, 'Close'])
+        Entry = (previous_rsi < 30) & (last_rsi >= 30)
 
         # Convert Entry to a native boolean
         Entry = bool(Entry)
-        
-        # Append the results to the DataFrame
+
+        # Get the last closing price
+        Last_Price = float(data['close'].iloc[-1])
+
+        # Append the results to the signals sink
         L1 = [hisse, Last_Price, Entry]
-        df_signals.loc[len(df_signals)] = L1
+        sink.append(L1)
         print(L1)
     except Exception as e:
         print(f"Error processing {hisse}: {e}")
         pass
 
+# Flush the rows to the signal history and collect them in a DataFrame
+df_signals = sink.close()
+
 # Filter and display stocks with a buy signal
 df_True = df_signals[df_signals['RSI Buy Signal'] == True]
 print("\nStocks with RSI Buy Signal:")
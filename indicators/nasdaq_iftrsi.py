@@ -2,6 +2,10 @@
 import numpy as np
 import pandas as pd
 from tvDatafeed import TvDatafeed, Interval
+from fetch_engine import FetchEngine
+from session_pool import SessionPool
+from bar_store import BarStore
+from result_sink import ResultSink
 from tradingview_screener import get_all_symbols
 import warnings
 import pandas_ta as ta
@@ -24,9 +28,11 @@ def calculate_rsi_ift(data, length=14):
     
     return data
 
-# Initialize the data feed (use guest mode or provide credentials)
-tv = TvDatafeed()  # For guest mode
-# tv = TvDatafeed(username='your_username', password='your_password')  # For authenticated mode
+# Initialize the concurrent fetch engine (use guest mode or provide credentials)
+pool = SessionPool(TvDatafeed, size=16)  # For guest mode
+# pool = SessionPool(lambda: TvDatafeed(username='your_username', password='your_password'), size=16)  # For authenticated mode
+engine = FetchEngine(lambda: pool, max_workers=pool.size, timeout=30)  # One worker per session
+store = BarStore()  # Local bar cache: only new bars are fetched on later runs
 
 # Define the list of stocks to analyze
 Hisseler = ['NASDAQ:NVDA', 'NASDAQ:AMZN', 'NASDAQ:MSFT', 'NASDAQ:AMD', 'NASDAQ:MRVL',
@@ -36,15 +42,18 @@ Hisseler = ['NASDAQ:NVDA', 'NASDAQ:AMZN', 'NASDAQ:MSFT', 'NASDAQ:AMD', 'NASDAQ:M
 #Hisseler = [symbol.replace('NASDAQ:', '') for symbol in Hisseler if symbol.startswith('NASDAQ:')]
 Hisseler = sorted(Hisseler)
 
-# DataFrame to store signals
+# Columnar sink to store signals
 Titles = ['Stock Symbol', 'Last Price', 'IFT Buy Signal']
-df_signals = pd.DataFrame(columns=Titles)
+sink = ResultSink('nasdaq_iftrsi', Titles)  # Rows are also recorded in the signal history
+
+# Fetch historical data for all stocks concurrently
+results = store.fetch(engine, Hisseler, exchange='NASDAQ', interval=Interval.in_daily, n_bars=1000)
 
 # Main loop to process each stock
-for hisse in Hisseler:
+for hisse, data, error in results:
     try:
-        # Fetch historical data
-        data = tv.get_hist(symbol=hisse, exchange='NASDAQ', interval=Interval.in_daily, n_bars=1000)
+        if error is not None:
+            raise error
         data = data.reset_index()
         
         # Calculate RSI and IFT on RSI
@@ -69,14 +78,17 @@ for hisse in Hisseler:
         # Convert Entry to a native boolean
         Entry = bool(Entry)
         
-        # Append the results to the DataFrame
+        # Append the results to the signals sink
         L1 = [hisse, Last_Price, Entry]
-        df_signals.loc[len(df_signals)] = L1
+        sink.append(L1)
         print(L1)
     except Exception as e:
         print(f"Error processing {hisse}: {e}")
         pass
 
+# Flush the rows to the signal history and collect them in a DataFrame
+df_signals = sink.close()
+
 # Filter and display stocks with a buy signal
 df_True = df_signals[df_signals['IFT Buy Signal'] == True]
 print("\nStocks with IFT RSI below -0.5:")
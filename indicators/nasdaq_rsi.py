@@ -1,36 +1,28 @@
 # Import required libraries
 import numpy as np
-import pandas as pd
 from tvDatafeed import TvDatafeed, Interval
-from tradingview_screener import get_all_symbols
+from fetch_engine import FetchEngine
+from session_pool import SessionPool
+from bar_store import BarStore
+from streaming import StateStore, RSIState
+from result_sink import ResultSink
+from universe import SymbolUniverse
 import warnings
-import pandas_ta as ta
 
 # Suppress warnings to keep the output clean
 warnings.simplefilter(action='ignore')
 
-# Function to calculate RSI
-def calculate_rsi(data, length=14):
-    """
-    Calculate the Relative Strength Index (RSI) for the given data.
-
-    Parameters:
-    - data: DataFrame containing stock data with a 'close' price column.
-    - length: The period over which to calculate the RSI.
-
-    Returns:
-    - The DataFrame with an added 'RSI' column.
-    """
-    # Use pandas_ta to calculate RSI
-    data['RSI'] = ta.rsi(data['close'], length=length)
-    return data
-
-# Initialize the data feed from TradingView
-tv = TvDatafeed()
+# Initialize the concurrent fetch engine on a pool of 16 reusable TradingView sessions
+pool = SessionPool(TvDatafeed, size=16)
+engine = FetchEngine(lambda: pool, max_workers=pool.size, timeout=30)  # One worker per session
+store = BarStore()  # Local bar cache: only new bars are fetched on later runs
+states = StateStore()  # Saved indicator states: only bars since the last run are processed
 
 # Define the list of stocks to analyze
-# Get all symbols from the American market
-symbols = get_all_symbols(market='america')
+# Get the listed symbols of the American market from the cached universe (symbols that recently
+# returned no data are skipped); NYSE/AMEX names keep their prefix and are requested from their own exchange
+universe = SymbolUniverse()
+symbols = universe.select('america', exchanges=['NASDAQ', 'NYSE', 'AMEX'])
 
 # Remove the 'NASDAQ:' prefix from symbols (if present)
 symbols = [symbol.replace('NASDAQ:', '') for symbol in symbols]
@@ -38,20 +30,27 @@ symbols = [symbol.replace('NASDAQ:', '') for symbol in symbols]
 # Sort the list of symbols alphabetically
 symbols = sorted(symbols)
 
-# DataFrame to store signals
+# Columnar sink to store signals
 columns = ['Stock Name', 'Last Price', 'RSI Buy Signal']
-df_signals = pd.DataFrame(columns=columns)
+sink = ResultSink('nasdaq_rsi', columns)  # Rows are also recorded in the signal history
+
+# Fetch historical data for all stock symbols concurrently (results keep the symbol order)
+results = store.fetch(
+    engine,
+    symbols,
+    exchange='NASDAQ',
+    interval=Interval.in_daily,
+    n_bars=1000  # Fetch the last 1000 daily data points
+)
+universe.record_results('america', results, exchange='NASDAQ', engine=engine)
 
 # Main loop to process each stock symbol
-for symbol in symbols:
+for symbol, data, error in results:
     try:
-        # Fetch historical data for the stock symbol
-        data = tv.get_hist(
-            symbol=symbol,
-            exchange='NASDAQ',
-            interval=Interval.in_daily,
-            n_bars=1000  # Fetch the last 1000 daily data points
-        )
+        # Re-raise the fetch error so it is reported like any other failure
+        if error is not None:
+            raise error
+
         # Check if data is returned
         if data is None or data.empty:
             print(f"No data for {symbol}")
@@ -60,43 +59,25 @@ for symbol in symbols:
         # Reset index to make 'datetime' a column
         data = data.reset_index()
 
-        # Calculate RSI and add it to the DataFrame
-        data = calculate_rsi(data)
-
-        # Rename columns to standard format for consistency
-        data.rename(columns={
-            'open': 'Open',
-            'high': 'High',
-            'low': 'Low',
-            'close': 'Close',
-            'volume': 'Volume'
-        }, inplace=True)
-
-        # Set 'datetime' as the index
-        data.set_index('datetime', inplace=True)
-
-        # Remove rows with NaN values in 'RSI' (usually the first few rows)
-        data.dropna(subset=['RSI'], inplace=True)
-
-        # Ensure we have at least two data points after dropping NaNs
+        # Ensure we have at least two data points
         if len(data) < 2:
-            print(f"Not enough data for {symbol} after dropping NaNs")
+            print(f"Not enough data for {symbol}")
             continue
 
-        # Extract the last two data points to check for RSI crossing above 30
-        Signals = data.tail(2).reset_index()
+        # Resume the RSI from its saved state and get its last two values
+        previous_rsi, last_rsi = states.resume('NASDAQ', symbol, Interval.in_daily, 'rsi_14', lambda: RSIState(14), data)
 
         # Define the buy signal logic for RSI
         # Signal when RSI crosses above 30 (from oversold territory)
-        Entry = (Signals.loc[0, 'RSI'] < 30) and (Signals.loc[1, 'RSI'] >= 30)
+        Entry = (previous_rsi < 30) and (last_rsi >= 30)
         Entry = bool(Entry)
 
         # Get the last closing price and convert to float
-        Last_Price = float(Signals.loc[1, 'Close'])
+        Last_Price = float(data['close'].iloc[-1])
 
-        # Append the results to the DataFrame
+        # Append the results to the signals sink
         row = [symbol, Last_Price, Entry]
-        df_signals.loc[len(df_signals)] = row
+        sink.append(row)
 
         # Print the result for the current stock
         print(row)
@@ -105,6 +86,9 @@ for symbol in symbols:
         print(f"Error processing {symbol}: {e}")
         pass
 
+# Flush the rows to the signal history and collect them in a DataFrame
+df_signals = sink.close()
+
 # Filter and display stocks with a buy signal
 df_true = df_signals[df_signals['RSI Buy Signal'] == True]
 
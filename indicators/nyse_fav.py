@@ -1,47 +1,17 @@
 import numpy as np
-import pandas as pd
 from tvDatafeed import TvDatafeed, Interval
-from tradingview_screener import get_all_symbols
+from fetch_engine import FetchEngine
+from session_pool import SessionPool
+from bar_store import BarStore
+from panel import scan_bankery
+from result_sink import ResultSink
 import warnings
 
 warnings.simplefilter(action='ignore')
 
-# Standart Moving Average
-def sma(series, length):
-    """
-    Calculate the Simple Moving Average (SMA) for a given series.
-    """
-    return series.rolling(window=length).mean()
-
-# Exponential Moving Average
-def ema(series, length):
-    """
-    Calculate the Exponential Moving Average (EMA) for a given series.
-    """
-    return series.ewm(span=length, adjust=False).mean()
-
-
-def Bankery(data):
-    df=data.copy()
-    close_minus_rolling_min = data['close'] - pd.Series(data['low']).rolling(window=27).min()
-    percentage_change = close_minus_rolling_min / (pd.Series(data['high']).rolling(window=27).max() - pd.Series(data['low']).rolling(window=27).min()) * 100
-
-    sma1 = sma(percentage_change, 5)
-    sma2 = sma(sma1, 3)
-
-    fundtrend = (3 * sma1 - 2 * sma2 - 50) * 1.032 + 50
-
-    typ = (2 * data['close'] + data['high'] + data['low'] + data['open']) / 5
-    lol = pd.Series(data['low']).rolling(window=34).min()
-    hoh = pd.Series(data['high']).rolling(window=34).max()
-    bullbearline = ema((typ - lol) / (hoh - lol) * 100, 13)
-    bankerentry = (fundtrend > bullbearline) & (bullbearline < 25)
-    df['Entry'] = (bankerentry==True)
-    return df
-
-
-tv = TvDatafeed()
-Hisseler = get_all_symbols(market='america')
+pool = SessionPool(TvDatafeed, size=16)
+engine = FetchEngine(lambda: pool, max_workers=pool.size, timeout=30)  # One worker per session
+store = BarStore()  # Local bar cache: only new bars are fetched on later runs
 Hisseler = ['NYSE:UBER', 'NYSE:LLY', 'NYSE:BABA', 'NYSE:DELL', 'NYSE:TMO',
             'NYSE:WMT', 'NYSE:MA', 'NYSE:V', 'NYSE:SPOT', 'NYSE:DIS']
 
@@ -51,26 +21,27 @@ Hisseler = sorted(Hisseler)
 
 # Raporlama için kullanılacak başlıklar
 Titles = ['Hisse Adı', 'Son Fiyat','Dip Sinyali']
-df_signals = pd.DataFrame(columns=Titles)
+sink = ResultSink('nyse_fav', Titles)  # Rows are also recorded in the signal history
 
-for hisse in Hisseler:
+results = store.fetch(engine, Hisseler, exchange='NYSE', interval=Interval.in_daily, n_bars=1000)
+frames = []
+for hisse, data, error in results:
     try:
-        data = tv.get_hist(symbol=hisse, exchange='NYSE', interval=Interval.in_daily, n_bars=1000)
+        if error is not None:
+            raise error
         data = data.reset_index()
-        Banker = Bankery(data)
-        Banker.rename(columns={'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'}, inplace=True)
-        Banker.set_index('datetime', inplace=True)
-        Buy = False
-        Signals = Banker.tail(2)
-        Signals = Signals.reset_index()
-
-        Entry = (Signals.loc[0, 'Entry'] == False) & (Signals.loc[1, 'Entry'] == True)
-        Last_Price = Signals.loc[1, 'Close']
-        L1 = [hisse, Last_Price,Entry]
-        df_signals.loc[len(df_signals)] = L1
-        print(L1)
+        if len(data) >= 2:
+            frames.append((hisse, data))
     except:
         pass
 
+# Bankery for all stocks in one batched pass
+for L1 in scan_bankery(frames):
+    sink.append(L1)
+    print(L1)
+
+# Flush the rows to the signal history and collect them in a DataFrame
+df_signals = sink.close()
+
 df_True = df_signals[(df_signals['Dip Sinyali'] == True)]
 print(df_True)
\ No newline at end of file
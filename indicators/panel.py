@@ -0,0 +1,167 @@
+"""
+Vectorized cross-sectional panel engine for the Bankery indicator.
+
+Instead of calling Bankery once per symbol, every symbol's OHLC is stacked into
+2D NumPy arrays (symbols x bars) and the indicator is computed for the whole
+universe in one batched pass. Series are right-aligned (the last bar of every
+symbol sits in the last column) and shorter histories are NaN-padded on the
+left, so each row sees exactly the bars it would see on its own.
+
+The rolling and EWM steps run through the same pandas kernels as Bankery
+(column by column on a bars x symbols frame), and the arithmetic is done in the
+same order, so the results are bit-for-bit identical to the per-symbol function.
+"""
+
+# Import required libraries
+import numpy as np
+import pandas as pd
+
+
+def stack_panel(frames, columns=('open', 'high', 'low', 'close')):
+    """
+    Stack per-symbol DataFrames into right-aligned, NaN-padded 2D arrays.
+
+    Parameters:
+    - frames: List of (symbol, DataFrame) pairs; each DataFrame has the OHLC columns.
+    - columns: Columns to stack.
+
+    Returns:
+    - A tuple (symbols, panel) where 'panel' maps each column name to a
+      (symbols x bars) float64 array.
+    """
+    symbols = [symbol for symbol, _ in frames]
+    n_bars = max((len(data) for _, data in frames), default=0)
+    panel = {column: np.full((len(frames), n_bars), np.nan) for column in columns}
+    for row, (_, data) in enumerate(frames):
+        for column in columns:
+            values = data[column].to_numpy()
+            panel[column][row, n_bars - len(values):] = values
+    return symbols, panel
+
+
+def _rolling(values, window, how):
+    # Run a pandas rolling aggregation along the bars axis of a (symbols x bars) array
+    frame = pd.DataFrame(values.T)
+    return getattr(frame.rolling(window=window), how)().to_numpy().T
+
+
+def _ema(values, length):
+    # Same EWM as strategies.ema, applied along the bars axis
+    frame = pd.DataFrame(values.T)
+    return frame.ewm(span=length, adjust=False).mean().to_numpy().T
+
+
+def bankery_panel(panel):
+    """
+    Compute the Bankery lines and entry signal for every symbol at once.
+
+    Parameters:
+    - panel: Dictionary of (symbols x bars) arrays with 'open', 'high', 'low', 'close'.
+
+    Returns:
+    - A tuple (fundtrend, bullbearline, entry) of (symbols x bars) arrays.
+    """
+    high, low, close, open_ = panel['high'], panel['low'], panel['close'], panel['open']
+
+    # Percentage position of the close within the 27-bar range
+    rolling_min = _rolling(low, 27, 'min')
+    close_minus_rolling_min = close - rolling_min
+    rolling_range = _rolling(high, 27, 'max') - rolling_min
+    percentage_change = (close_minus_rolling_min / rolling_range) * 100
+
+    # 'fundtrend' from two stacked SMAs
+    sma1 = _rolling(percentage_change, 5, 'mean')
+    sma2 = _rolling(sma1, 3, 'mean')
+    fundtrend = (3 * sma1 - 2 * sma2 - 50) * 1.032 + 50
+
+    # 'bullbearline' from the typical price within the 34-bar range
+    typ = (2 * close + high + low + open_) / 5
+    lol = _rolling(low, 34, 'min')
+    hoh = _rolling(high, 34, 'max')
+    bullbearline = _ema(((typ - lol) / (hoh - lol) * 100), 13)
+
+    entry = (fundtrend > bullbearline) & (bullbearline < 25)
+    return fundtrend, bullbearline, entry
+
+
+def scan_bankery(frames):
+    """
+    Run the Bankery bottom-signal scan over a whole universe in one pass.
+
+    Parameters:
+    - frames: List of (symbol, DataFrame) pairs with at least two bars each.
+
+    Returns:
+    - A list of [symbol, last price, entry] rows in input order, where 'entry' is
+      True when the Entry signal switched from False to True on the last bar.
+    """
+    if not frames:
+        return []
+    symbols, panel = stack_panel(frames)
+    _, _, entry = bankery_panel(panel)
+    crossed = ~entry[:, -2] & entry[:, -1]
+    last_price = panel['close'][:, -1]
+    return [[symbol, float(price), bool(signal)]
+            for symbol, price, signal in zip(symbols, last_price, crossed)]
+
+
+def rsi_panel(close, length=14):
+    """
+    Compute the RSI of every symbol at once, matching 'ta.rsi(close, length)'.
+
+    Parameters:
+    - close: (symbols x bars) array of closing prices.
+    - length: The period over which to calculate the RSI.
+
+    Returns:
+    - A (symbols x bars) array of RSI values.
+    """
+    negative = pd.DataFrame(close.T).diff(1)
+    positive = negative.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+    alpha = 1.0 / length
+    positive_avg = positive.ewm(alpha=alpha, min_periods=length).mean()
+    negative_avg = negative.ewm(alpha=alpha, min_periods=length).mean()
+    return (100 * positive_avg / (positive_avg + negative_avg.abs())).to_numpy().T
+
+
+def _leading_nans(values):
+    # Number of NaN padding bars in front of every row
+    valid = ~np.isnan(values)
+    return np.where(valid.any(axis=1), valid.argmax(axis=1), values.shape[1])
+
+
+def _presma_ema(values, length, offsets):
+    # EMA seeded with the SMA of the first 'length' bars of every row, like 'ta.ema'.
+    # 'offsets' is the number of padding bars of every row, where its own series starts.
+    seeded = np.full_like(values, np.nan)
+    for offset in np.unique(offsets):
+        if offset + length > values.shape[1]:
+            continue
+        rows = offsets == offset
+        window = values[rows, offset:offset + length]
+        seeded[rows, offset + length - 1] = np.where(np.isnan(window), 0., window).sum(axis=1) / length
+        seeded[rows, offset + length:] = values[rows, offset + length:]
+    return _ema(seeded, length)
+
+
+def rsi_ift_panel(close, rsi_length=5, smoothing_length=9, smoothing='ema'):
+    """
+    Compute the IFT on RSI of every symbol at once, matching 'strategies.calculate_rsi_ift'.
+
+    Parameters:
+    - close: (symbols x bars) array of closing prices.
+    - rsi_length, smoothing_length, smoothing: Same as in calculate_rsi_ift.
+
+    Returns:
+    - A (symbols x bars) array of IFT_RSI values.
+    """
+    rsi = rsi_panel(close, rsi_length)
+    if smoothing == 'sma':
+        smoothed = _rolling(2 * (rsi - 50) / 100, smoothing_length, 'mean')
+        return np.tanh(smoothed)
+    if smoothing == 'ema':
+        v2 = _presma_ema(0.1 * (rsi - 50), smoothing_length, _leading_nans(close))
+        return (np.exp(2 * v2) - 1) / (np.exp(2 * v2) + 1)
+    raise ValueError(f"Unknown smoothing: {smoothing!r} (expected 'ema' or 'sma')")
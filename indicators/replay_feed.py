@@ -0,0 +1,362 @@
+"""
+Offline replay data feed: a stand-in for TvDatafeed without any network access.
+
+ReplayFeed has the same get_hist(symbol, exchange, interval, n_bars) interface
+and returns frames shaped like tvDatafeed's (datetime index, 'symbol' and
+OHLCV columns). Bars are served from, in this order:
+
+- CSV files mapped to symbols (e.g. the bitcoin files in datasets/),
+- a bar store directory (bars saved by earlier live scans, see bar_store.py),
+- a synthetic OHLCV generator, deterministic per (seed, symbol, interval).
+
+Every request can be delayed (latency + random jitter), fail with an
+exception, come back empty, or hang, with configurable probabilities, so the
+fetch engine's timeouts, retries and back-off are exercised as well.
+
+Run as a script, it executes any scanner against the replay feed and a
+synthetic symbol universe, with the bar store, indicator states and signal
+history redirected to a temporary folder:
+
+    python replay_feed.py --symbols 5000 --latency 0.05 --jitter 0.02 scan.py --market america --no-history
+    python replay_feed.py --symbols 5000 --error-rate 0.02 --quiet nasdaq_rsi.py
+"""
+
+# Import required libraries
+import argparse
+import enum
+import importlib
+import os
+import runpy
+import sys
+import tempfile
+import threading
+import time
+import types
+import zlib
+from contextlib import redirect_stdout
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, INTERVAL_SECONDS, interval_value, split_symbol
+
+# Exchange of the symbols returned for each market by tradingview_screener.get_all_symbols
+MARKET_EXCHANGES = {'turkey': 'BIST', 'america': 'NASDAQ', 'crypto': 'BINANCE'}
+
+# Last bar of the synthetic histories (fixed, so that runs are reproducible)
+SYNTHETIC_END = '2024-10-28'
+
+
+class Interval(enum.Enum):
+    """
+    Same members and values as tvDatafeed.Interval, used when tvDatafeed is not installed.
+    """
+    in_1_minute = "1"
+    in_3_minute = "3"
+    in_5_minute = "5"
+    in_15_minute = "15"
+    in_30_minute = "30"
+    in_45_minute = "45"
+    in_1_hour = "1H"
+    in_2_hour = "2H"
+    in_3_hour = "3H"
+    in_4_hour = "4H"
+    in_daily = "1D"
+    in_weekly = "1W"
+    in_monthly = "1M"
+
+
+def _bar_seconds(interval):
+    return INTERVAL_SECONDS.get(interval_value(interval), 86400)
+
+
+def synthetic_bars(full_symbol, interval, n_bars, seed=0, history=5000, end=SYNTHETIC_END):
+    """
+    Generate the last n_bars of a deterministic random-walk OHLCV history.
+
+    The whole history (of 'history' bars) only depends on the seed, the symbol and
+    the interval, so requests of different lengths see the same bars.
+
+    Parameters:
+    - full_symbol: 'EXCHANGE:SYMBOL' name (also used as the 'symbol' column).
+    - interval: tvDatafeed Interval (or its value) of the bars.
+    - n_bars: Number of bars returned.
+    - seed: Seed shared by all symbols.
+    - history: Length of the generated history.
+    - end: Timestamp of the last bar.
+
+    Returns:
+    - A DataFrame shaped like tv.get_hist output.
+    """
+    key = f"{full_symbol}|{interval_value(interval)}".encode()
+    rng = np.random.default_rng([seed, zlib.crc32(key)])
+    volatility = rng.uniform(0.01, 0.04)
+    close = rng.uniform(5, 500) * np.exp(np.cumsum(rng.normal(0, volatility, history)))
+    open_ = np.concatenate(([close[0]], close[:-1])) * np.exp(rng.normal(0, volatility / 4, history))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, volatility / 2, history)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, volatility / 2, history)))
+    volume = rng.lognormal(12, 1, history).round()
+
+    n = min(n_bars, history)
+    index = pd.date_range(end=pd.Timestamp(end), periods=history, freq=pd.Timedelta(seconds=_bar_seconds(interval)),
+                          name='datetime')[-n:]
+    return pd.DataFrame({'symbol': full_symbol, 'open': open_[-n:], 'high': high[-n:], 'low': low[-n:],
+                         'close': close[-n:], 'volume': volume[-n:]}, index=index)
+
+
+@lru_cache(maxsize=None)
+def load_csv_bars(path):
+    """
+    Read an OHLCV CSV file (any column case, 'datetime'/'date' or 'unix' time column) in ascending time order.
+
+    Returns:
+    - A DataFrame with a datetime index and open/high/low/close/volume columns.
+    """
+    data = pd.read_csv(path, encoding='utf-8-sig')
+    data.columns = [column.strip().lower() for column in data.columns]
+    if 'datetime' in data:
+        index = pd.to_datetime(data['datetime'])
+    elif 'date' in data:
+        index = pd.to_datetime(data['date'])
+    else:
+        index = pd.to_datetime(data['unix'], unit='s')
+    data = data[['open', 'high', 'low', 'close', 'volume']].astype(float)
+    data.index = pd.DatetimeIndex(index, name='datetime')
+    data = data[~data.index.duplicated(keep='last')].sort_index()
+    return data
+
+
+class ReplayStats:
+    """
+    Thread-safe counters of a replay run (requests, bars, injected errors and empty answers).
+    """
+
+    def __init__(self):
+        self.counts = {'requests': 0, 'bars': 0, 'errors': 0, 'empty': 0}
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def attempt(self, full_symbol):
+        # Number of earlier requests for this symbol
+        with self._lock:
+            count = self._attempts.get(full_symbol, 0)
+            self._attempts[full_symbol] = count + 1
+            return count
+
+    def add(self, name, amount=1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def __repr__(self):
+        return ', '.join(f"{name}={count}" for name, count in self.counts.items())
+
+
+class ReplayFeed:
+    """
+    Offline data feed with the TvDatafeed.get_hist interface.
+
+    Instances are cheap; like TvDatafeed, one instance is meant to be used by one
+    thread (FetchEngine creates one per worker). Counters are shared by all
+    instances through 'stats'.
+    """
+
+    def __init__(self, csv_files=None, bars_root=None, synthetic=True, seed=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, empty_rate=0.0, hang_rate=0.0, hang_seconds=60.0, stats=None):
+        """
+        Parameters:
+        - csv_files: Dictionary mapping symbols (with or without 'EXCHANGE:') to OHLCV CSV files.
+        - bars_root: Bar store directory to replay stored bars from (None to skip).
+        - synthetic: Generate bars for symbols found nowhere else (otherwise they get None, as unknown symbols do).
+        - seed: Seed of the synthetic bars and of the injected delays and faults.
+        - latency: Fixed delay of every request, in seconds.
+        - jitter: Mean of an extra exponential delay, in seconds.
+        - error_rate: Probability that a request raises ConnectionError.
+        - empty_rate: Probability that a request returns None (no data).
+        - hang_rate: Probability that a request blocks for 'hang_seconds' (for timeout testing).
+        - hang_seconds: Duration of a hung request.
+        - stats: Shared ReplayStats (a new one if None).
+        """
+        self.csv_files = csv_files or {}
+        self.bars_root = bars_root
+        self.synthetic = synthetic
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.empty_rate = empty_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.stats = stats if stats is not None else ReplayStats()
+
+    def _source(self, exchange, symbol, interval, n_bars):
+        # First source holding the symbol, or None
+        full_symbol = f"{exchange}:{symbol}"
+        path = self.csv_files.get(full_symbol, self.csv_files.get(symbol))
+        if path is not None:
+            data = load_csv_bars(path).tail(n_bars).copy()
+            data.insert(0, 'symbol', full_symbol)
+            return data
+        if self.bars_root is not None:
+            data = BarStore(self.bars_root).load(exchange, symbol, interval, mmap=False)
+            if data is not None:
+                return data.tail(n_bars)
+        if self.synthetic:
+            return synthetic_bars(full_symbol, interval, n_bars, seed=self.seed)
+        return None
+
+    def get_hist(self, symbol, exchange='NSE', interval=Interval.in_daily, n_bars=10, fut_contract=None,
+                 extended_session=False):
+        """
+        Return the last n_bars bars of a symbol, after the configured delay and fault injection.
+
+        Parameters:
+        - symbol: Symbol name, optionally with an 'EXCHANGE:' prefix.
+        - exchange: Exchange used when the symbol has no prefix.
+        - interval: tvDatafeed Interval of the bars.
+        - n_bars: Number of bars.
+        - fut_contract, extended_session: Accepted for compatibility and ignored.
+
+        Returns:
+        - A DataFrame shaped like tv.get_hist output, or None if there is no data.
+        """
+        exchange, symbol = split_symbol(symbol, exchange)
+        # Faults and delays depend on the symbol and its attempt number only, not on thread timing
+        attempt = self.stats.attempt(f"{exchange}:{symbol}")
+        rng = np.random.default_rng([self.seed, zlib.crc32(f"{exchange}:{symbol}".encode()), attempt])
+        u = rng.random(3)
+        delay = self.latency + (rng.exponential(self.jitter) if self.jitter > 0 else 0.0)
+        if u[0] < self.hang_rate:
+            delay += self.hang_seconds
+        if delay > 0:
+            time.sleep(delay)
+
+        if u[1] < self.error_rate:
+            self.stats.add('errors')
+            raise ConnectionError(f"injected connection error for {exchange}:{symbol}")
+        if u[2] < self.empty_rate:
+            self.stats.add('empty')
+            return None
+
+        data = self._source(exchange, symbol, interval, n_bars)
+        if data is None:
+            self.stats.add('empty')
+            return None
+        self.stats.add('requests')
+        self.stats.add('bars', len(data))
+        return data
+
+
+def synthetic_universe(n_symbols, exchange):
+    """
+    Return n_symbols distinct 'EXCHANGE:SYMBOL' names (e.g. 'NASDAQ:S0001').
+    """
+    width = max(4, len(str(n_symbols - 1)))
+    return [f"{exchange}:S{i:0{width}d}" for i in range(n_symbols)]
+
+
+def install(n_symbols=None, **feed_options):
+    """
+    Make 'tvDatafeed' (and, with n_symbols, 'tradingview_screener') imports resolve to the replay feed.
+
+    Must be called before the scanner imports them. TvDatafeed(...) then returns a
+    ReplayFeed built with 'feed_options' (whatever username/password is passed), and
+    get_all_symbols(market) returns a synthetic universe of n_symbols symbols.
+
+    Returns:
+    - The ReplayStats shared by all feeds.
+    """
+    stats = feed_options.pop('stats', None) or ReplayStats()
+    try:
+        from tvDatafeed import Interval as interval_enum
+    except ImportError:
+        interval_enum = Interval
+
+    def TvDatafeed(username=None, password=None, *args, **kwargs):
+        return ReplayFeed(stats=stats, **feed_options)
+
+    module = types.ModuleType('tvDatafeed')
+    module.TvDatafeed = TvDatafeed
+    module.Interval = interval_enum
+    sys.modules['tvDatafeed'] = module
+
+    if n_symbols is not None:
+        def get_all_symbols(market='america'):
+            return synthetic_universe(n_symbols, MARKET_EXCHANGES.get(market, market.upper()))
+
+        screener = types.ModuleType('tradingview_screener')
+        screener.get_all_symbols = get_all_symbols
+        sys.modules['tradingview_screener'] = screener
+    return stats
+
+
+def run_scanner(script, args=(), n_symbols=None, datasets_dir=None, quiet=False, **feed_options):
+    """
+    Run a scanner script against the replay feed and return its wall time.
+
+    Parameters:
+    - script: Path of the scanner (e.g. 'scan.py', 'nasdaq_rsi.py').
+    - args: Command-line arguments of the scanner.
+    - n_symbols: Size of the synthetic universe returned by get_all_symbols (None keeps the real screener).
+    - datasets_dir: Folder for the bar store, indicator states and signal history
+      (a new temporary folder if None, so every run starts cold and real data is untouched).
+    - quiet: Discard the scanner's output.
+    - feed_options: ReplayFeed settings (latency, jitter, error_rate, ...).
+
+    Returns:
+    - A tuple (seconds, stats).
+    """
+    os.environ['DATASETS_DIR'] = datasets_dir or tempfile.mkdtemp(prefix='replay_')
+    for name in ('bar_store', 'streaming', 'result_sink', 'universe'):
+        # Modules imported before the folder was set still point at the real datasets
+        if name in sys.modules:
+            importlib.reload(sys.modules[name])
+    stats = install(n_symbols, **feed_options)
+    script = os.path.abspath(script)
+    sys.path.insert(0, os.path.dirname(script))
+    sys.argv = [script] + list(args)
+
+    start = time.perf_counter()
+    if quiet:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            runpy.run_path(script, run_name='__main__')
+    else:
+        runpy.run_path(script, run_name='__main__')
+    return time.perf_counter() - start, stats
+
+
+def parse_csv_mapping(items):
+    # 'SYMBOL=path' pairs from the command line
+    mapping = {}
+    for item in items or []:
+        symbol, path = item.split('=', 1)
+        mapping[symbol] = path
+    return mapping
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run a scanner against the offline replay feed.")
+    parser.add_argument('--symbols', type=int, help="Size of the synthetic universe (default: the real screener).")
+    parser.add_argument('--csv', action='append', metavar='SYMBOL=PATH',
+                        help="Serve a symbol from a CSV file (repeatable).")
+    parser.add_argument('--bars', help="Replay stored bars from this bar store directory.")
+    parser.add_argument('--no-synthetic', action='store_true', help="Return no data for symbols found nowhere else.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic bars and injected faults.")
+    parser.add_argument('--latency', type=float, default=0.0, help="Fixed delay per request (seconds).")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Mean extra exponential delay per request (seconds).")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Probability of a connection error.")
+    parser.add_argument('--empty-rate', type=float, default=0.0, help="Probability of an empty answer.")
+    parser.add_argument('--hang-rate', type=float, default=0.0, help="Probability of a hung request.")
+    parser.add_argument('--hang-seconds', type=float, default=60.0, help="Duration of a hung request (seconds).")
+    parser.add_argument('--datasets', help="Datasets folder of the run (default: a new temporary folder).")
+    parser.add_argument('--quiet', action='store_true', help="Hide the scanner output.")
+    parser.add_argument('script', help="Scanner script to run.")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="Arguments passed to the scanner.")
+    args = parser.parse_args()
+
+    seconds, stats = run_scanner(args.script, args.args, n_symbols=args.symbols, datasets_dir=args.datasets,
+                                 quiet=args.quiet, csv_files=parse_csv_mapping(args.csv), bars_root=args.bars,
+                                 synthetic=not args.no_synthetic, seed=args.seed, latency=args.latency,
+                                 jitter=args.jitter, error_rate=args.error_rate, empty_rate=args.empty_rate,
+                                 hang_rate=args.hang_rate, hang_seconds=args.hang_seconds)
+    print(f"{os.path.basename(args.script)}: {seconds:.2f}s end to end ({stats})", file=sys.stderr)
@@ -0,0 +1,219 @@
+"""
+Columnar result sink for the scanners, with a local SQLite signal history.
+
+Rows are appended into one Python list per column (O(1) per row, instead of
+growing a DataFrame with 'df.loc[len(df)] = row') and written to SQLite in
+batches. Every row is stored with the timestamp of the run, so past signals can
+be queried without re-scanning, e.g. the symbols that fired a Bankery bottom
+signal on each of the last three days:
+
+    python result_sink.py "Bottom Signal" --days 3
+"""
+
+# Import required libraries
+import argparse
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+# Default location of the signal history, next to the other datasets (the DATASETS_DIR environment variable moves them)
+DATASETS_DIR = os.environ.get('DATASETS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datasets'))
+DEFAULT_PATH = os.path.join(DATASETS_DIR, 'signals.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    run_at TEXT NOT NULL,
+    scanner TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    last_price REAL,
+    signal TEXT NOT NULL,
+    value INTEGER
+);
+CREATE INDEX IF NOT EXISTS signals_by_signal ON signals (signal, run_at);
+CREATE INDEX IF NOT EXISTS signals_by_symbol ON signals (symbol, run_at);
+"""
+
+
+def connect(path=DEFAULT_PATH):
+    """
+    Open the signal history, creating the database and its table if needed.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class ResultSink:
+    """
+    Collect the rows of one scanner run and record them in the signal history.
+
+    Rows follow the scanners' layout: the symbol, the last price and then one
+    column per signal.
+    """
+
+    def __init__(self, scanner, columns, path=DEFAULT_PATH, batch_size=1000, run_at=None):
+        """
+        Parameters:
+        - scanner: Name of the scanner, stored with every row (e.g., 'bist').
+        - columns: Column titles; the first is the symbol, the second the last price,
+          the others are signals.
+        - path: SQLite file of the signal history, or None to keep the rows in memory only.
+        - batch_size: Number of rows written to SQLite at once.
+        - run_at: Timestamp of the run (defaults to now).
+        """
+        self.scanner = scanner
+        self.columns = list(columns)
+        self.path = path
+        self.batch_size = batch_size
+        self.run_at = (run_at or datetime.now()).isoformat(timespec='seconds')
+        self.buffers = [[] for _ in self.columns]
+        self.flushed = 0
+        self.connection = None
+
+    def __len__(self):
+        return len(self.buffers[0])
+
+    def append(self, row):
+        """
+        Append one row (a list with one value per column).
+        """
+        for buffer, value in zip(self.buffers, row):
+            buffer.append(value)
+        if len(self) - self.flushed >= self.batch_size:
+            self.flush()
+
+    def extend(self, table):
+        """
+        Append every row of a DataFrame whose columns are the sink's columns.
+        """
+        for buffer, column in zip(self.buffers, self.columns):
+            buffer.extend(table[column].tolist())
+        if len(self) - self.flushed >= self.batch_size:
+            self.flush()
+
+    def frame(self):
+        """
+        Return all rows appended so far as a DataFrame.
+        """
+        return pd.DataFrame(dict(zip(self.columns, self.buffers)), columns=self.columns)
+
+    def flush(self):
+        """
+        Write the rows appended since the last flush to the signal history.
+        """
+        if self.path is None or self.flushed == len(self):
+            return
+        symbols, prices = self.buffers[0], self.buffers[1]
+        records = []
+        for signal, values in zip(self.columns[2:], self.buffers[2:]):
+            for row in range(self.flushed, len(self)):
+                value = values[row]
+                records.append((self.run_at, self.scanner, str(symbols[row]),
+                                None if prices[row] is None else float(prices[row]),
+                                signal, None if value is None else int(bool(value))))
+        if self.connection is None:
+            self.connection = connect(self.path)
+        with self.connection:
+            self.connection.executemany("INSERT INTO signals VALUES (?, ?, ?, ?, ?, ?)", records)
+        self.flushed = len(self)
+
+    def close(self):
+        """
+        Flush the remaining rows, close the database and return all rows as a DataFrame.
+        """
+        self.flush()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        return self.frame()
+
+
+def history(signal=None, symbol=None, scanner=None, since=None, path=DEFAULT_PATH):
+    """
+    Read recorded signals.
+
+    Parameters:
+    - signal: Signal column title to select (e.g., 'Bottom Signal'), or None for all.
+    - symbol: Symbol to select, or None for all.
+    - scanner: Scanner to select, or None for all.
+    - since: Earliest run timestamp or date (ISO string), or None.
+    - path: SQLite file of the signal history.
+
+    Returns:
+    - A DataFrame with 'run_at', 'scanner', 'symbol', 'last_price', 'signal' and 'value'.
+    """
+    conditions, parameters = [], []
+    for column, value in (('signal', signal), ('symbol', symbol), ('scanner', scanner)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            parameters.append(value)
+    if since is not None:
+        conditions.append("run_at >= ?")
+        parameters.append(since)
+    query = "SELECT * FROM signals"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    connection = connect(path)
+    try:
+        return pd.read_sql_query(query + " ORDER BY run_at, symbol", connection, params=parameters)
+    finally:
+        connection.close()
+
+
+def consecutive_signals(signal, days=3, scanner=None, path=DEFAULT_PATH):
+    """
+    Return the symbols whose signal fired on each of the last 'days' scanned days.
+
+    Parameters:
+    - signal: Signal column title (e.g., 'Bottom Signal').
+    - days: Number of consecutive scanned days.
+    - scanner: Scanner to select, or None for all.
+    - path: SQLite file of the signal history.
+
+    Returns:
+    - A sorted list of symbols.
+    """
+    scanner_filter = "AND scanner = ?" if scanner is not None else ""
+    parameters = [signal] + ([scanner] if scanner is not None else [])
+    query = f"""
+        WITH recent AS (
+            SELECT DISTINCT substr(run_at, 1, 10) AS day FROM signals
+            WHERE signal = ? {scanner_filter}
+            ORDER BY day DESC LIMIT ?
+        )
+        SELECT symbol FROM signals
+        WHERE signal = ? {scanner_filter} AND value = 1
+          AND substr(run_at, 1, 10) IN (SELECT day FROM recent)
+        GROUP BY symbol
+        HAVING COUNT(DISTINCT substr(run_at, 1, 10)) = (SELECT COUNT(*) FROM recent)
+           AND (SELECT COUNT(*) FROM recent) = ?
+        ORDER BY symbol
+    """
+    connection = connect(path)
+    try:
+        rows = connection.execute(query, parameters + [days] + parameters + [days]).fetchall()
+    finally:
+        connection.close()
+    return [symbol for symbol, in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the recorded scanner signals.")
+    parser.add_argument('signal', help="Signal column title, e.g. 'Bottom Signal' or 'bankery'.")
+    parser.add_argument('--days', type=int, default=3, help="Number of consecutive scanned days.")
+    parser.add_argument('--scanner', help="Only consider this scanner.")
+    parser.add_argument('--path', default=DEFAULT_PATH, help="SQLite file of the signal history.")
+    args = parser.parse_args(argv)
+
+    symbols = consecutive_signals(args.signal, days=args.days, scanner=args.scanner, path=args.path)
+    print(f"Symbols with '{args.signal}' on each of the last {args.days} scanned days:")
+    for symbol in symbols:
+        print(symbol)
+    return symbols
+
+
+if __name__ == '__main__':
+    main()
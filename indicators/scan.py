@@ -0,0 +1,298 @@
+"""
+Unified scanner: fetch each symbol once and evaluate many strategies on it.
+
+The per-market scripts (bist.py, bist_rsi.py, bist_iftrsi.py, ...) each download
+the same history separately. This command fetches every symbol of a market or
+watchlist once and runs all selected strategies on the same in-memory bars,
+printing one combined table with a column per strategy.
+
+Examples:
+    python scan.py --market turkey
+    python scan.py --market crypto --strategies ift_crypto ift_range
+    python scan.py --exchange NASDAQ --symbols NVDA AMD MU --strategies rsi bankery
+    python scan.py --market turkey --tail    # fetch and compute only the warm-up window
+    python scan.py --market turkey --metrics timings.json    # per-stage and per-symbol timings
+"""
+
+# Import required libraries
+import argparse
+import warnings
+
+import pandas as pd
+from tvDatafeed import TvDatafeed, Interval
+
+from fetch_engine import FetchEngine, EmptyResult
+from session_pool import SessionPool
+from bar_store import BarStore
+from panel import scan_bankery
+from indicator_graph import Evaluator, CLOSE, rsi, rsi_ift_node
+from tail_eval import evaluate_tail, verify_tail, warmup
+from result_sink import ResultSink
+from scan_metrics import ScanMetrics, NULL_METRICS
+from universe import SymbolUniverse
+
+warnings.simplefilter(action='ignore')
+
+# Cryptocurrencies scanned by the crypto scripts
+CRYPTOS = ['BINANCE:BTCUSDT', 'BINANCE:ETHUSDT', 'BINANCE:LTCUSDT',
+           'BINANCE:SOLUSDT', 'BINANCE:BNBUSDT', 'BINANCE:TAOUSDT',
+           'GATEIO:GOATUSDT', 'BINANCE:MANAUSDT', 'BINANCE:AVAXUSDT',
+           'BINANCE:SUIUSDT', 'BINANCE:IMXUSDT', 'BINANCE:FTMUSDT',
+           'BINANCE:FLOWUSDT', 'BINANCE:FLOKIUSDT', 'BINANCE:BONKUSDT',
+           'BINANCE:PORTALUSDT', 'BINANCE:PEPEUSDT', 'BINANCE:SHIBUSDT',
+           'BINANCE:DOGEUSDT', 'BINANCE:RENDERUSDT', 'BINANCE:PYTHUSDT',
+           'BINANCE:ARBUSDT', 'BINANCE:VETUSDT', 'BINANCE:ETHFIUSDT',
+           'BINANCE:XRPUSDT', 'BINANCE:FETUSDT', 'BINANCE:ICPUSDT',
+           'BINANCE:NEARUSDT', 'BINANCE:DOTUSDT', 'BINANCE:ADAUSDT',
+           'BINANCE:SXPUSDT', 'BINANCE:AXSUSDT', 'BINANCE:ROSEUSDT',
+           'BINANCE:ARKUSDT', 'BINANCE:APTUSDT', 'BINANCE:ALTUSDT',
+           'BINANCE:TRXUSDT', 'BINANCE:LINKUSDT', 'BINANCE:BCHUSDT',
+           'BINANCE:UNIUSDT', 'BINANCE:ETCUSDT', 'BINANCE:WIFUSDT',
+           'BINANCE:OPUSDT', 'BINANCE:FILUSDT', 'BINANCE:ATOMUSDT',
+           'BINANCE:SEIUSDT', 'BINANCE:RUNEUSDT', 'BINANCE:RAYUSDT',
+           'BINANCE:GRTUSDT', 'BINANCE:INJUSDT', 'BINANCE:ORDIUSDT',
+           'GATEIO:POPCATUSDT', 'BINANCE:PENDLEUSDT', 'BINANCE:ARKMUSDT',
+           'BINANCE:CYBERUSDT', 'BINANCE:EDUUSDT', 'BINANCE:RDNTUSDT',
+           'BINANCE:IDUSDT', 'BINANCE:WLDUSDT', 'BINANCE:PIXELUSDT',
+           'BINANCE:JUPUSDT', 'BINANCE:TIAUSDT', 'BINANCE:SKLUSDT',
+           'BINANCE:APEUSDT', 'GATEIO:CATUSDT', 'BINANCE:OMUSDT',
+           'BINANCE:HIGHUSDT', 'BINANCE:DUSKUSDT', 'BINANCE:IOUSDT',
+           'BINANCE:SNXUSDT']
+
+# Default exchange and strategies of every market
+MARKETS = {
+    'turkey': ('BIST', ['bankery', 'rsi', 'ift_bist']),
+    'america': ('NASDAQ', ['bankery', 'rsi']),
+    'crypto': ('BINANCE', ['ift_crypto', 'ift_range']),
+}
+
+
+def rsi_cross(values):
+    """
+    RSI(14) crosses above 30 (from oversold territory) on the last bar.
+    """
+    values = values.dropna()
+    return bool((values.iloc[-2] < 30) & (values.iloc[-1] >= 30))
+
+def ift_bist(ift):
+    """
+    IFT on RSI (RSI 5, SMA 9) is below -0.5, as in bist_iftrsi.py.
+    """
+    return bool(ift.dropna().iloc[-1] < -0.5)
+
+def ift_crypto(ift):
+    """
+    IFT on RSI (RSI 5, EMA 9) is less than or equal to -0.5, as in crypto_iftrsi.py.
+    """
+    return bool(ift.dropna().iloc[-1] <= -0.5)
+
+def ift_range(ift):
+    """
+    IFT on RSI (RSI 5, EMA 9) is between -0.5 and +0.5, as in crypto.py.
+    """
+    return bool(-0.5 <= ift.dropna().iloc[-1] <= 0.5)
+
+def bankery(frames):
+    # Bankery bottom signal for the whole universe in one batched pass
+    return [entry for _, _, entry in scan_bankery(frames)]
+
+# Per-symbol strategies: the indicator node they read and the rule turning it into a signal.
+# Identical nodes (e.g., RSI(close, 5) behind all IFT variants) are computed once per symbol.
+GRAPH_STRATEGIES = {
+    'rsi': (rsi(CLOSE, 14), rsi_cross),
+    'ift_bist': (rsi_ift_node(rsi_length=5, smoothing_length=9, smoothing='sma'), ift_bist),
+    'ift_crypto': (rsi_ift_node(rsi_length=5, smoothing_length=9, smoothing='ema'), ift_crypto),
+    'ift_range': (rsi_ift_node(rsi_length=5, smoothing_length=9, smoothing='ema'), ift_range),
+}
+
+# Universe-level strategies: take a list of (symbol, DataFrame) pairs and return one signal per symbol
+UNIVERSE_STRATEGIES = {
+    'bankery': bankery,
+}
+
+STRATEGIES = sorted(list(GRAPH_STRATEGIES) + list(UNIVERSE_STRATEGIES))
+
+# Exchanges scanned in every screener market (other listings, e.g. OTC, are skipped before fetching)
+MARKET_EXCHANGES = {
+    'turkey': ['BIST'],
+    'america': ['NASDAQ', 'NYSE', 'AMEX'],
+}
+
+
+def market_symbols(market):
+    """
+    Return the symbols of a market, without the exchange prefix where the scripts strip it.
+    """
+    if market == 'crypto':
+        return list(CRYPTOS)
+
+    # Cached list without the symbols that recently returned no data; other exchanges keep their prefix
+    symbols = SymbolUniverse().select(market, exchanges=MARKET_EXCHANGES.get(market))
+    if market == 'turkey':
+        symbols = [symbol.replace('BIST:', '') for symbol in symbols]
+    else:
+        symbols = [symbol.replace('NASDAQ:', '') for symbol in symbols]
+    return sorted(symbols)
+
+
+def run_scan(results, strategies, evaluator=None, tail=False, metrics=None):
+    """
+    Evaluate every strategy on already fetched bars.
+
+    Parameters:
+    - results: List of (symbol, data, error) tuples as returned by FetchEngine/BarStore.
+    - strategies: List of strategy names (see STRATEGIES).
+    - evaluator: indicator_graph.Evaluator whose cache is reused between scans (optional).
+    - tail: If True, evaluate every strategy on its warm-up window only (see tail_eval.py).
+    - metrics: ScanMetrics recording the time, errors and received bars per symbol and stage (optional).
+
+    Returns:
+    - A DataFrame with 'Symbol', 'Last Price' and one column per strategy.
+    """
+    metrics = metrics or NULL_METRICS
+
+    # Collect the fetched histories, reporting the symbols that could not be fetched
+    frames = []
+    for symbol, data, error in results:
+        try:
+            if error is not None:
+                metrics.error('fetch', symbol, error)
+                raise error
+            if data is None or len(data) == 0:
+                # The feed answered without data: a fetch outcome, not an error of the scan
+                metrics.error('fetch', symbol, EmptyResult("no data returned"))
+                print(f"No data for {symbol}")
+                continue
+            metrics.received(symbol, data)
+            with metrics.time('prepare', symbol):
+                if not tail:
+                    data = data.reset_index()
+                if len(data) < 2:
+                    raise ValueError("not enough data")
+            frames.append((symbol, data))
+        except Exception as e:
+            print(f"Error processing {symbol}: {e}")
+
+    table = pd.DataFrame({
+        'Symbol': [symbol for symbol, _ in frames],
+        'Last Price': [float(data['close'].iloc[-1]) for _, data in frames],
+    })
+
+    if tail:
+        # All strategies for the whole universe on the stacked warm-up windows
+        with metrics.time('tail'):
+            evaluated = evaluate_tail(frames, strategies)
+        for name, signals in evaluated.items():
+            table[name] = signals
+        return table
+
+    # Per-symbol strategies share one indicator graph evaluation
+    evaluator = evaluator or Evaluator()
+    graph = [name for name in strategies if name in GRAPH_STRATEGIES]
+    nodes = [GRAPH_STRATEGIES[name][0] for name in graph]
+    signals = {name: [] for name in graph}
+    for symbol, data in frames:
+        try:
+            with metrics.time('compute', symbol):
+                values = evaluator.evaluate(symbol, data, nodes)
+        except Exception as e:
+            print(f"Error processing {symbol}: {e}")
+            values = {}
+        for name in graph:
+            node, rule = GRAPH_STRATEGIES[name]
+            try:
+                with metrics.time('signal', symbol):
+                    signals[name].append(rule(values[node.key]))
+            except Exception as e:
+                print(f"Error processing {symbol} ({name}): {e}")
+                signals[name].append(None)
+
+    for name in strategies:
+        if name in signals:
+            table[name] = signals[name]
+        else:
+            # Universe-wide (panel) strategies are timed as a whole
+            with metrics.time(f'universe:{name}'):
+                table[name] = UNIVERSE_STRATEGIES[name](frames)
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch each symbol once and evaluate several strategies on it.")
+    parser.add_argument('--market', choices=sorted(MARKETS), help="Scan every symbol of a market.")
+    parser.add_argument('--symbols', nargs='+', help="Scan these symbols (a watchlist).")
+    parser.add_argument('--watchlist', help="File with one symbol per line.")
+    parser.add_argument('--exchange', help="Exchange of the watchlist symbols (defaults to the market's exchange).")
+    parser.add_argument('--strategies', nargs='+', choices=STRATEGIES,
+                        help="Strategies to evaluate (defaults to the market's strategies).")
+    parser.add_argument('--n-bars', type=int, default=1000, help="Number of daily bars per symbol.")
+    parser.add_argument('--workers', type=int, default=16, help="Maximum number of requests in flight.")
+    parser.add_argument('--sessions', type=int, default=16,
+                        help="Number of TradingView sessions kept open (also caps --workers).")
+    parser.add_argument('--offline', action='store_true', help="Use only the locally stored bars.")
+    parser.add_argument('--tail', action='store_true',
+                        help="Fetch and compute only the bars the strategies need to warm up.")
+    parser.add_argument('--verify-tail', action='store_true',
+                        help="Compare the tail evaluation with the full history and print the differences.")
+    parser.add_argument('--output', help="Write the combined table to this CSV file.")
+    parser.add_argument('--no-history', action='store_true', help="Do not record the signals in the signal history.")
+    parser.add_argument('--metrics', help="Record per-stage and per-symbol timings and write them to this JSON file.")
+    args = parser.parse_args(argv)
+
+    # Resolve the symbols, the exchange and the strategies
+    exchange, strategies = MARKETS.get(args.market, (None, None))
+    if args.symbols or args.watchlist:
+        symbols = list(args.symbols or [])
+        if args.watchlist:
+            with open(args.watchlist) as f:
+                symbols += [line.strip() for line in f if line.strip()]
+    elif args.market:
+        symbols = market_symbols(args.market)
+    else:
+        parser.error("give --market, --symbols or --watchlist")
+    exchange = args.exchange or exchange
+    if exchange is None:
+        parser.error("--exchange is required for a watchlist without --market")
+    strategies = args.strategies or strategies or ['bankery', 'rsi']
+
+    # Fetch every symbol once (only the warm-up window in tail mode)
+    n_bars = min(args.n_bars, warmup(strategies)) if args.tail and not args.verify_tail else args.n_bars
+    metrics = ScanMetrics() if args.metrics else NULL_METRICS
+    pool = SessionPool(TvDatafeed, size=args.sessions)
+    # No more workers than sessions: waiting for a free session would count against the request timeout
+    engine = FetchEngine(lambda: pool, max_workers=min(args.workers, args.sessions), timeout=30, metrics=metrics)
+    store = BarStore()
+    results = store.fetch(engine, symbols, exchange=exchange, interval=Interval.in_daily,
+                          n_bars=n_bars, offline=args.offline)
+    if args.market in MARKET_EXCHANGES and not args.offline:
+        SymbolUniverse().record_results(args.market, results, exchange=exchange, engine=engine)
+
+    if args.verify_tail:
+        frames = [(symbol, data) for symbol, data, error in results if error is None and data is not None]
+        print(verify_tail(frames, strategies))
+
+    # Evaluate all strategies on the same bars and show the combined table
+    table = run_scan(results, strategies, tail=args.tail, metrics=metrics)
+    pd.set_option('display.max_rows', None)
+    print(table)
+    print("\nSymbols with at least one signal:")
+    print(table[table[strategies].eq(True).any(axis=1)])
+
+    if not args.no_history:
+        sink = ResultSink(f"scan_{args.market or exchange}", table.columns)
+        sink.extend(table)
+        sink.close()
+    if args.output:
+        table.to_csv(args.output, index=False)
+    if args.metrics:
+        summary = metrics.write(args.metrics)
+        print(f"\nStage timings in seconds (full report in {args.metrics}):")
+        stages = pd.DataFrame(summary['stages']).T.drop(columns='histogram', errors='ignore')
+        print(stages.to_string(float_format=lambda value: f'{value:.4f}'))
+        if summary['errors']:
+            print("Errors:", summary['errors'])
+    return table
+
+
+if __name__ == '__main__':
+    main()
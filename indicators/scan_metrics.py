@@ -0,0 +1,174 @@
+"""
+Optional per-stage timing and per-symbol latency instrumentation for scans.
+
+ScanMetrics records, per stage ('throttle', 'fetch', 'prepare', 'compute',
+'signal', ...), how long every symbol took, which exceptions were raised (by
+type, including the ones the scan loop swallows), and how many bars and bytes
+were received. summary() turns this into p50/p95/p99 percentiles, latency
+histograms and the slowest symbols, ready to be written as JSON.
+
+When instrumentation is disabled the scan uses NULL_METRICS, whose methods do
+nothing, so the only cost left is a method call per stage and symbol.
+"""
+
+# Import required libraries
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# Upper edges of the latency histogram buckets, in milliseconds
+HISTOGRAM_EDGES_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+
+def histogram(seconds, edges_ms=HISTOGRAM_EDGES_MS):
+    """
+    Count latencies per bucket.
+
+    Returns:
+    - A dictionary {'<=1ms': count, ..., '>30000ms': count} without the empty buckets.
+    """
+    counts = np.bincount(np.searchsorted(edges_ms, np.asarray(seconds) * 1000), minlength=len(edges_ms) + 1)
+    labels = [f"<={edge:g}ms" for edge in edges_ms] + [f">{edges_ms[-1]:g}ms"]
+    return {label: int(count) for label, count in zip(labels, counts) if count}
+
+
+class ScanMetrics:
+    """
+    Thread-safe collector of per-symbol stage latencies, errors and received data.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.seconds = defaultdict(lambda: defaultdict(float))  # stage -> symbol -> seconds
+        self.errors = defaultdict(Counter)  # stage -> exception type -> count
+        self.error_symbols = defaultdict(list)  # (stage, exception type) -> first few symbols
+        self.bars = {}
+        self.bytes = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, stage, symbol, seconds):
+        """
+        Add 'seconds' to the time the symbol spent in a stage (symbol None for universe-wide work).
+        """
+        with self._lock:
+            self.seconds[stage][symbol] += seconds
+
+    def error(self, stage, symbol, exception):
+        """
+        Count an exception raised while a symbol was in a stage.
+        """
+        name = type(exception).__name__
+        with self._lock:
+            self.errors[stage][name] += 1
+            examples = self.error_symbols[(stage, name)]
+            if len(examples) < 5:
+                examples.append(symbol)
+
+    @contextmanager
+    def time(self, stage, symbol=None):
+        """
+        Time a block of code as a stage of a symbol; exceptions are counted and re-raised.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(stage, symbol, e)
+            raise
+        finally:
+            self.record(stage, symbol, time.perf_counter() - start)
+
+    def received(self, symbol, data):
+        """
+        Record the number of bars and the in-memory size of the data received for a symbol.
+        """
+        if data is None:
+            return
+        with self._lock:
+            self.bars[symbol] = len(data)
+            self.bytes[symbol] = int(data.memory_usage(index=True, deep=False).sum())
+
+    def summary(self, slowest=10):
+        """
+        Summarize the run.
+
+        Parameters:
+        - slowest: Number of slowest symbols listed.
+
+        Returns:
+        - A JSON-serializable dictionary with the wall time, per-stage statistics
+          (count, total, mean, p50, p95, p99, max, histogram), errors by stage and
+          exception type, received bars and bytes, and the slowest symbols with
+          their time per stage.
+        """
+        stages = {}
+        totals = defaultdict(float)
+        for stage, per_symbol in self.seconds.items():
+            values = np.array([seconds for symbol, seconds in per_symbol.items() if symbol is not None])
+            stages[stage] = {}
+            if None in per_symbol:
+                # Work done for the whole universe at once
+                stages[stage]['universe_total'] = per_symbol[None]
+            if len(values) == 0:
+                continue
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stages[stage].update({'count': len(values), 'total': float(values.sum()), 'mean': float(values.mean()),
+                                  'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+                                  'max': float(values.max()), 'histogram': histogram(values)})
+            for symbol, seconds in per_symbol.items():
+                if symbol is not None:
+                    totals[symbol] += seconds
+
+        ranking = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:slowest]
+        return {
+            'wall_seconds': time.perf_counter() - self.started,
+            'symbols': len(totals),
+            'stages': stages,
+            'errors': {stage: dict(counts) for stage, counts in self.errors.items()},
+            'error_examples': {f"{stage}/{name}": symbols for (stage, name), symbols in self.error_symbols.items()},
+            'bars': int(sum(self.bars.values())),
+            'bytes': int(sum(self.bytes.values())),
+            'slowest': [{'symbol': symbol, 'seconds': seconds,
+                         'stages': {stage: self.seconds[stage][symbol] for stage in self.seconds
+                                    if symbol in self.seconds[stage]},
+                         'bars': self.bars.get(symbol)} for symbol, seconds in ranking],
+        }
+
+    def write(self, path, slowest=10):
+        """
+        Write the summary to a JSON file and return it.
+        """
+        summary = self.summary(slowest)
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=2, default=str)
+        return summary
+
+
+class NullMetrics:
+    """
+    Disabled instrumentation: same interface as ScanMetrics, records nothing.
+    """
+
+    enabled = False
+    _context = nullcontext()
+
+    def record(self, stage, symbol, seconds):
+        pass
+
+    def error(self, stage, symbol, exception):
+        pass
+
+    def time(self, stage, symbol=None):
+        return self._context
+
+    def received(self, symbol, data):
+        pass
+
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,244 @@
+"""
+Pool of reusable TradingView sessions shared by the fetch workers.
+
+TvDatafeed logs in when it is created and opens a new websocket (and sends the
+whole session setup again) on every get_hist call. SessionPool keeps a fixed
+number of sessions and lends each one to one request at a time:
+
+- sessions are created (and authenticated) once, lazily, up to the pool size,
+- with keep_alive, a session keeps its websocket open between requests and
+  only sends the per-symbol messages, answering the server's heartbeats,
+- a session whose request fails (closed socket, timeout, protocol error) is
+  discarded and replaced by a new one, and the error is passed on.
+
+The pool has the same get_hist interface as TvDatafeed, so FetchEngine can use
+it directly: FetchEngine(lambda: pool, ...). The engine then owns the retries
+(a retried request gets a fresh session) and the back-off, and sees every
+failure; 'retries' is only meant for using the pool on its own. Give the engine
+at most 'size' workers: a request waiting for a free session would count
+against the engine's timeout.
+"""
+
+# Import required libraries
+import json
+import queue
+import re
+import threading
+import time
+
+# Packets of a TradingView websocket frame: '~m~<length>~m~<payload>'
+PACKET = re.compile(r'~m~(\d+)~m~')
+
+
+def split_packets(frame):
+    """
+    Split a websocket frame into its payloads.
+    """
+    packets, position = [], 0
+    while True:
+        match = PACKET.match(frame, position)
+        if match is None:
+            return packets
+        start = match.end()
+        length = int(match.group(1))
+        packets.append(frame[start:start + length])
+        position = start + length
+
+
+def _header(payload):
+    return f"~m~{len(payload)}~m~{payload}"
+
+
+class Session:
+    """
+    One TradingView session (a TvDatafeed instance), optionally with a persistent websocket.
+    """
+
+    def __init__(self, feed, keep_alive=True, idle_timeout=20.0, read_timeout=30.0):
+        """
+        Parameters:
+        - feed: TvDatafeed instance (or any object with a 'get_hist' method).
+        - keep_alive: Reuse the websocket between requests when the feed supports it.
+        - idle_timeout: Reconnect instead of reusing a websocket idle for longer than this (seconds).
+        - read_timeout: Give up on a request that receives nothing for this long (seconds).
+        """
+        self.feed = feed
+        # The persistent path drives TvDatafeed's own message helpers; other feeds use plain get_hist
+        self.keep_alive = keep_alive and all(hasattr(feed, name) for name in (
+            '_TvDatafeed__create_connection', '_TvDatafeed__send_message', '_TvDatafeed__format_symbol',
+            '_TvDatafeed__create_df'))
+        self.idle_timeout = idle_timeout
+        self.read_timeout = read_timeout
+        self.connected = False
+        self.series = 0
+        self.requests = 0
+        self.last_used = time.monotonic()
+
+    def _connect(self):
+        feed = self.feed
+        feed._TvDatafeed__create_connection()
+        feed.ws.settimeout(self.read_timeout)
+        feed._TvDatafeed__send_message("set_auth_token", [feed.token])
+        feed._TvDatafeed__send_message("chart_create_session", [feed.chart_session, ""])
+        self.connected = True
+        self.series = 0
+
+    def close(self):
+        """
+        Close the websocket (if any); the session can reconnect later.
+        """
+        ws = getattr(self.feed, 'ws', None)
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        self.connected = False
+
+    def get_hist(self, symbol, exchange='NSE', interval=None, n_bars=10, fut_contract=None,
+                 extended_session=False):
+        """
+        Fetch bars through this session (same arguments and result as TvDatafeed.get_hist).
+        """
+        self.requests += 1
+        if not self.keep_alive:
+            kwargs = {} if interval is None else {'interval': interval}
+            return self.feed.get_hist(symbol=symbol, exchange=exchange, n_bars=n_bars, fut_contract=fut_contract,
+                                      extended_session=extended_session, **kwargs)
+        try:
+            return self._get_hist_open(symbol, exchange, interval, n_bars, fut_contract, extended_session)
+        finally:
+            self.last_used = time.monotonic()
+
+    def _get_hist_open(self, symbol, exchange, interval, n_bars, fut_contract, extended_session):
+        # Request one series on the open websocket and read until it is complete
+        feed = self.feed
+        if self.connected and time.monotonic() - self.last_used > self.idle_timeout:
+            self.close()
+        if not self.connected:
+            self._connect()
+
+        send = feed._TvDatafeed__send_message
+        symbol = feed._TvDatafeed__format_symbol(symbol=symbol, exchange=exchange, contract=fut_contract)
+        self.series += 1
+        symbol_id, series_id = f"symbol_{self.series}", f"s{self.series}"
+        session = '"regular"' if not extended_session else '"extended"'
+        send("resolve_symbol", [feed.chart_session, symbol_id,
+                                '={"symbol":"' + symbol + '","adjustment":"splits","session":' + session + '}'])
+        send("create_series", [feed.chart_session, series_id, series_id, symbol_id,
+                               getattr(interval, 'value', interval or '1D'), n_bars])
+        send("switch_timezone", [feed.chart_session, "exchange"])
+
+        raw_data = ""
+        while True:
+            frame = feed.ws.recv()
+            if not frame:
+                raise ConnectionError("websocket closed by the server")
+            for packet in split_packets(frame):
+                if packet.startswith('~h~'):
+                    # Heartbeat: echo it, or the server drops the connection
+                    feed.ws.send(_header(packet))
+                    continue
+                try:
+                    message = json.loads(packet)
+                except ValueError:
+                    continue
+                kind = message.get('m')
+                params = message.get('p', [])
+                if kind == 'timescale_update' and len(params) > 1 and series_id in params[1]:
+                    raw_data += packet + "\n"
+                elif kind == 'series_completed' and series_id in params:
+                    # Stop the live updates of this series, the socket stays open for the next request
+                    send("remove_series", [feed.chart_session, series_id])
+                    return feed._TvDatafeed__create_df(raw_data, symbol) if raw_data else None
+                elif kind == 'symbol_error' and symbol_id in params:
+                    send("remove_series", [feed.chart_session, series_id])
+                    return None
+                elif kind in ('critical_error', 'protocol_error'):
+                    raise ConnectionError(f"TradingView {kind}: {params}")
+
+
+class SessionPool:
+    """
+    Fixed-size pool of sessions with the TvDatafeed.get_hist interface.
+    """
+
+    def __init__(self, factory, size=4, keep_alive=True, idle_timeout=20.0, read_timeout=30.0, retries=0):
+        """
+        Parameters:
+        - factory: Callable creating one TvDatafeed (e.g., TvDatafeed or a lambda logging in).
+        - size: Number of sessions kept open (at most 'size' requests run at once).
+        - keep_alive: Reuse each session's websocket between requests.
+        - idle_timeout: Reconnect a websocket idle for longer than this (seconds).
+        - read_timeout: Give up on a request that receives nothing for this long (seconds).
+        - retries: How many times a failed request is retried on a replacement session
+          (keep 0 under FetchEngine, which retries and backs off itself).
+        """
+        self.factory = factory
+        self.size = size
+        self.keep_alive = keep_alive
+        self.idle_timeout = idle_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.created = 0
+        self.replaced = 0
+        self._idle = queue.LifoQueue()  # Most recently used first, so warm connections are reused
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        # An idle session, a new one while below the pool size, or wait for one to be released
+        # (waiting in short steps, so that a slot freed by a discarded session is noticed)
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            with self._lock:
+                create = self.created < self.size
+                if create:
+                    self.created += 1
+            if create:
+                try:
+                    return Session(self.factory(), self.keep_alive, self.idle_timeout, self.read_timeout)
+                except Exception:
+                    with self._lock:
+                        self.created -= 1
+                    raise
+            try:
+                return self._idle.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _discard(self, session):
+        # Drop a broken session; a replacement is created on the next acquire
+        session.close()
+        with self._lock:
+            self.created -= 1
+            self.replaced += 1
+
+    def get_hist(self, symbol, exchange='NSE', interval=None, n_bars=10, fut_contract=None,
+                 extended_session=False):
+        """
+        Fetch bars on an idle session (same arguments and result as TvDatafeed.get_hist).
+        """
+        for attempt in range(self.retries + 1):
+            session = self._acquire()
+            try:
+                result = session.get_hist(symbol, exchange, interval, n_bars, fut_contract, extended_session)
+            except Exception:
+                self._discard(session)
+                if attempt == self.retries:
+                    raise
+                continue
+            self._idle.put(session)
+            return result
+
+    def close(self):
+        """
+        Close the websockets of all idle sessions.
+        """
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,172 @@
+"""
+Indicator functions shared by the scanners and the engines built on top of them.
+"""
+
+# Import required libraries
+import numpy as np
+import pandas_ta as ta
+
+
+# Define Simple Moving Average (SMA) function
+def sma(series, length):
+    """
+    Calculate the Simple Moving Average (SMA) for a given series.
+
+    Parameters:
+    - series: The data series (e.g., close prices) to calculate the SMA on.
+    - length: The number of periods over which to calculate the SMA.
+
+    Returns:
+    - A Pandas Series representing the SMA of the input series.
+    """
+    return series.rolling(window=length).mean()
+
+# Define Exponential Moving Average (EMA) function
+def ema(series, length):
+    """
+    Calculate the Exponential Moving Average (EMA) for a given series.
+
+    Parameters:
+    - series: The data series to calculate the EMA on.
+    - length: The span of the EMA.
+
+    Returns:
+    - A Pandas Series representing the EMA of the input series.
+    """
+    return series.ewm(span=length, adjust=False).mean()
+
+def bankery_lines(data):
+    """
+    Compute the 'fundtrend' and 'bullbearline' lines of the Bankery indicator.
+
+    Parameters:
+    - data: A DataFrame containing stock data with columns 'open', 'high', 'low', 'close'.
+
+    Returns:
+    - A tuple (fundtrend, bullbearline) of Pandas Series.
+    """
+    # Rolling minimum low over 27 periods (used twice below)
+    rolling_min = data['low'].rolling(window=27).min()
+
+    # Calculate the difference between the current close and the rolling minimum low over 27 periods
+    close_minus_rolling_min = data['close'] - rolling_min
+
+    # Calculate the range between the rolling maximum high and rolling minimum low over 27 periods
+    rolling_range = data['high'].rolling(window=27).max() - rolling_min
+
+    # Compute the percentage change within the rolling range
+    percentage_change = (close_minus_rolling_min / rolling_range) * 100
+
+    # Calculate two SMAs of the percentage change
+    sma1 = sma(percentage_change, 5)
+    sma2 = sma(sma1, 3)
+
+    # Compute the 'fundtrend' indicator using a weighted formula
+    fundtrend = (3 * sma1 - 2 * sma2 - 50) * 1.032 + 50
+
+    # Calculate the typical price
+    typ = (2 * data['close'] + data['high'] + data['low'] + data['open']) / 5
+
+    # Calculate the lowest low and highest high over a 34-period window
+    lol = data['low'].rolling(window=34).min()
+    hoh = data['high'].rolling(window=34).max()
+
+    # Compute the 'bullbearline' indicator using EMA
+    bullbearline = ema(((typ - lol) / (hoh - lol) * 100), 13)
+
+    return fundtrend, bullbearline
+
+def Bankery(data):
+    """
+    Compute custom indicators and generate entry signals based on the provided data.
+
+    Parameters:
+    - data: A DataFrame containing stock data with columns 'open', 'high', 'low', 'close', 'volume'.
+
+    Returns:
+    - A DataFrame with an added 'Entry' column indicating potential buy signals.
+    """
+    # Create a copy of the data to avoid modifying the original DataFrame
+    df = data.copy()
+
+    fundtrend, bullbearline = bankery_lines(data)
+
+    # Determine the 'bankerentry' signal based on the fundtrend and bullbearline
+    bankerentry = (fundtrend > bullbearline) & (bullbearline < 25)
+
+    # Add the 'Entry' signal to the DataFrame
+    df['Entry'] = bankerentry
+
+    return df
+
+# Function to calculate RSI
+def calculate_rsi(data, length=14):
+    """
+    Calculate the Relative Strength Index (RSI) for the given data.
+
+    Parameters:
+    - data: DataFrame containing stock data with a 'close' price column.
+    - length: The period over which to calculate the RSI.
+
+    Returns:
+    - The DataFrame with an added 'RSI' column.
+    """
+    # Use pandas_ta to calculate RSI
+    data['RSI'] = ta.rsi(data['close'], length=length)
+    return data
+
+# Inverse Fisher Transform of an already computed RSI (shared by calculate_rsi_ift and the parameter sweep)
+def rsi_ift_from_rsi(rsi, smoothing_length=9, smoothing='ema'):
+    """
+    Smooth an RSI series and apply the Inverse Fisher Transform (IFT).
+
+    Parameters:
+    - rsi: Pandas Series of RSI values.
+    - smoothing_length: The period of the smoothing step.
+    - smoothing: 'ema' or 'sma', as in calculate_rsi_ift.
+
+    Returns:
+    - A Pandas Series of IFT_RSI values.
+    """
+    if smoothing == 'sma':
+        # Normalize RSI to the range [-1, 1] for IFT
+        normalized_rsi = 2 * (rsi - 50) / 100
+
+        # Smooth the normalized RSI with a simple moving average (SMA)
+        smoothed_rsi = ta.sma(normalized_rsi, length=smoothing_length)
+
+        # Apply the Inverse Fisher Transform
+        return np.tanh(smoothed_rsi)
+    if smoothing == 'ema':
+        # Normalize RSI
+        v1 = 0.1 * (rsi - 50)
+
+        # Smooth v1 using an Exponential Moving Average (EMA)
+        v2 = ta.ema(v1, length=smoothing_length)
+
+        # Apply the Inverse Fisher Transform
+        return (np.exp(2 * v2) - 1) / (np.exp(2 * v2) + 1)
+    raise ValueError(f"Unknown smoothing: {smoothing!r} (expected 'ema' or 'sma')")
+
+# Function to calculate RSI and apply Inverse Fisher Transform (IFT) on RSI with adjustable parameters
+def calculate_rsi_ift(data, rsi_length=5, smoothing_length=9, smoothing='ema'):
+    """
+    Calculate the RSI and apply the Inverse Fisher Transform (IFT) on RSI with adjustable RSI and smoothing lengths.
+
+    Parameters:
+    - data: DataFrame containing price data with a 'close' column.
+    - rsi_length: The period over which to calculate the RSI.
+    - smoothing_length: The period of the smoothing step.
+    - smoothing: 'ema' for the crypto variant (0.1 * (RSI - 50) smoothed with an EMA),
+      'sma' for the BIST variant (RSI normalized to [-1, 1] smoothed with an SMA).
+
+    Returns:
+    - The DataFrame with added 'RSI' and 'IFT_RSI' columns.
+    """
+    # Calculate RSI
+    data['RSI'] = ta.rsi(data['close'], length=rsi_length)
+
+    # Smooth it and apply the Inverse Fisher Transform
+    data['IFT_RSI'] = rsi_ift_from_rsi(data['RSI'], smoothing_length=smoothing_length, smoothing=smoothing)
+
+    return data
@@ -0,0 +1,531 @@
+"""
+Streaming O(1) incremental indicator state.
+
+Each state object consumes one bar at a time and updates in constant time, so
+a scan only has to feed the bars that arrived since the previous run instead of
+recomputing the whole history. States can be saved to and restored from JSON.
+
+The building blocks mirror the pandas kernels used by the batch functions in
+strategies.py (Kahan-compensated rolling mean, EWM with the same weighting and
+NaN rules, inf treated as NaN on input), so a state fed the same bars gives the
+same values as the full recompute.
+"""
+
+# Import required libraries
+import copy
+import json
+import math
+import os
+import tempfile
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from bar_store import split_symbol, interval_value
+
+# Default location of the saved states, next to the other datasets (the DATASETS_DIR environment variable moves them)
+DATASETS_DIR = os.environ.get('DATASETS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datasets'))
+DEFAULT_ROOT = os.path.join(DATASETS_DIR, 'states')
+
+NAN = float('nan')
+
+# Relative tolerance when comparing the saved last committed bar with the current history
+BAR_RTOL = 1e-6
+
+
+def _clean(value):
+    # Rolling/EWM kernels treat inf as missing
+    value = float(value)
+    return NAN if math.isinf(value) else value
+
+
+def _div(a, b):
+    # Float division with NumPy semantics instead of ZeroDivisionError
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+# Registry of state classes, used to restore them from JSON
+_STATES = {}
+
+
+class StreamingState:
+    """
+    Base class with JSON (de)serialization for the streaming states.
+
+    Sub-classes list the data columns they consume in 'INPUTS' and implement
+    'update(*values)' returning the indicator output for the new bar.
+    """
+
+    INPUTS = ('close',)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _STATES[cls.__name__] = cls
+
+    def to_dict(self):
+        """
+        Return a JSON-serializable dictionary of the state.
+        """
+        out = {'type': type(self).__name__}
+        for key, value in self.__dict__.items():
+            if isinstance(value, StreamingState):
+                value = value.to_dict()
+            elif isinstance(value, deque):
+                value = {'deque': list(value), 'maxlen': value.maxlen}
+            out[key] = value
+        return out
+
+    @staticmethod
+    def from_dict(data):
+        """
+        Rebuild a state saved with 'to_dict'.
+        """
+        cls = _STATES[data['type']]
+        state = cls.__new__(cls)
+        for key, value in data.items():
+            if key == 'type':
+                continue
+            if isinstance(value, dict) and 'type' in value:
+                value = StreamingState.from_dict(value)
+            elif isinstance(value, dict) and 'deque' in value:
+                value = deque((tuple(v) if isinstance(v, list) else v for v in value['deque']), value['maxlen'])
+            setattr(state, key, value)
+        return state
+
+    def run(self, data):
+        """
+        Feed every row of a DataFrame and return the list of outputs.
+        """
+        columns = [data[column].to_numpy(dtype=np.float64) for column in self.INPUTS]
+        return [self.update(*values) for values in zip(*columns)]
+
+
+class EWMState(StreamingState):
+    """
+    Exponentially weighted mean, matching pandas 'Series.ewm(...).mean()'.
+    """
+
+    def __init__(self, span=None, alpha=None, adjust=False, min_periods=0):
+        """
+        Parameters:
+        - span: Span of the EMA (e.g., 13). Either 'span' or 'alpha' is required.
+        - alpha: Smoothing factor (e.g., 1 / length for Wilder's RMA).
+        - adjust: Same meaning as in pandas ewm.
+        - min_periods: Minimum number of observations before a value is output.
+        """
+        # pandas converts span/alpha to a center of mass and back
+        com = (span - 1) / 2.0 if span is not None else (1 - alpha) / alpha
+        self.alpha = 1. / (1. + com)
+        self.adjust = adjust
+        self.min_periods = max(int(min_periods), 1)
+        self.weighted = NAN
+        self.old_wt = 1.
+        self.nobs = 0
+        self.started = False
+
+    def update(self, value):
+        value = _clean(value)
+        is_observation = value == value
+        if not self.started:
+            self.started = True
+            self.weighted = value
+            self.nobs = int(is_observation)
+        else:
+            self.nobs += is_observation
+            if self.weighted == self.weighted:
+                new_wt = 1. if self.adjust else self.alpha
+                self.old_wt *= 1. - self.alpha
+                if is_observation:
+                    # avoid numerical errors on constant series
+                    if self.weighted != value:
+                        self.weighted = self.old_wt * self.weighted + new_wt * value
+                        self.weighted /= (self.old_wt + new_wt)
+                    if self.adjust:
+                        self.old_wt += new_wt
+                    else:
+                        self.old_wt = 1.
+            elif is_observation:
+                self.weighted = value
+        return self.weighted if self.nobs >= self.min_periods else NAN
+
+
+class SMAState(StreamingState):
+    """
+    Simple moving average, matching pandas 'Series.rolling(length).mean()'.
+
+    Keeps a Kahan-compensated running sum like the pandas kernel, so each new
+    bar costs one add and one remove.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.window = deque(maxlen=length)
+        self.nobs = 0
+        self.sum_x = 0.
+        self.neg_ct = 0
+        self.compensation_add = 0.
+        self.compensation_remove = 0.
+        self.num_consecutive_same_value = 0
+        self.prev_value = NAN
+
+    def update(self, value):
+        value = _clean(value)
+
+        # Remove the value leaving the window
+        if len(self.window) == self.length:
+            old = self.window[0]
+            if old == old:
+                self.nobs -= 1
+                y = - old - self.compensation_remove
+                t = self.sum_x + y
+                self.compensation_remove = t - self.sum_x - y
+                self.sum_x = t
+                if math.copysign(1.0, old) < 0:
+                    self.neg_ct -= 1
+
+        # Add the new value
+        self.window.append(value)
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum_x + y
+            self.compensation_add = t - self.sum_x - y
+            self.sum_x = t
+            if math.copysign(1.0, value) < 0:
+                self.neg_ct += 1
+            if value == self.prev_value:
+                self.num_consecutive_same_value += 1
+            else:
+                self.num_consecutive_same_value = 1
+            self.prev_value = value
+
+        if self.nobs >= self.length and self.nobs > 0:
+            result = self.sum_x / self.nobs
+            if self.num_consecutive_same_value >= self.nobs:
+                result = self.prev_value
+            elif self.neg_ct == 0 and result < 0:
+                result = 0.
+            elif self.neg_ct == self.nobs and result > 0:
+                result = 0.
+            return result
+        return NAN
+
+
+class RollingExtremumState(StreamingState):
+    """
+    Rolling maximum or minimum over a fixed window using a monotonic deque.
+    """
+
+    def __init__(self, length, mode='max'):
+        """
+        Parameters:
+        - length: Window length in bars (e.g., 27 or 34).
+        - mode: 'max' or 'min'.
+        """
+        self.length = length
+        self.mode = mode
+        self.index = 0
+        self.candidates = deque()
+        self.last_nan = -length
+
+    def update(self, value):
+        value = _clean(value)
+        i = self.index
+        self.index += 1
+
+        if value != value:
+            self.last_nan = i
+        else:
+            # Drop candidates that can never be the extremum again
+            if self.mode == 'max':
+                while self.candidates and self.candidates[-1][1] <= value:
+                    self.candidates.pop()
+            else:
+                while self.candidates and self.candidates[-1][1] >= value:
+                    self.candidates.pop()
+            self.candidates.append((i, value))
+
+        # Drop candidates that left the window
+        while self.candidates and self.candidates[0][0] <= i - self.length:
+            self.candidates.popleft()
+
+        # A full window of valid values is needed, as with pandas' default min_periods
+        if i + 1 < self.length or i - self.last_nan < self.length:
+            return NAN
+        return self.candidates[0][1]
+
+
+class RSIState(StreamingState):
+    """
+    Wilder RSI, matching 'ta.rsi(close, length)' (RMA of gains and losses).
+    """
+
+    def __init__(self, length=14, scalar=100):
+        self.length = length
+        self.scalar = scalar
+        self.prev_close = NAN
+        self.positive = EWMState(alpha=1.0 / length, adjust=True, min_periods=length)
+        self.negative = EWMState(alpha=1.0 / length, adjust=True, min_periods=length)
+
+    def update(self, close):
+        close = float(close)
+        change = close - self.prev_close
+        self.prev_close = close
+        positive_avg = self.positive.update(0. if change < 0 else change)
+        negative_avg = self.negative.update(0. if change > 0 else change)
+        return _div(self.scalar * positive_avg, positive_avg + abs(negative_avg))
+
+
+class PresmaEMAState(StreamingState):
+    """
+    EMA seeded with the SMA of the first 'length' values, matching 'ta.ema'.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.seed = []
+        self.ema = EWMState(span=length, adjust=False)
+
+    def update(self, value):
+        if self.seed is not None:
+            self.seed.append(float(value))
+            if len(self.seed) < self.length:
+                return NAN
+            # Missing values count as zero in the seed, like pandas' sum()
+            seed = np.asarray(self.seed)
+            value = float(np.where(np.isnan(seed), 0., seed).sum()) / self.length
+            self.seed = None
+        return self.ema.update(value)
+
+
+class RSIIFTState(StreamingState):
+    """
+    Inverse Fisher Transform on RSI, matching 'strategies.calculate_rsi_ift'.
+    """
+
+    def __init__(self, rsi_length=5, smoothing_length=9, smoothing='ema'):
+        """
+        Parameters:
+        - rsi_length: The period over which to calculate the RSI.
+        - smoothing_length: The period of the smoothing step.
+        - smoothing: 'ema' (crypto variant) or 'sma' (BIST variant).
+        """
+        if smoothing not in ('ema', 'sma'):
+            raise ValueError(f"Unknown smoothing: {smoothing!r} (expected 'ema' or 'sma')")
+        self.smoothing = smoothing
+        self.rsi = RSIState(rsi_length)
+        if smoothing == 'sma':
+            self.smoother = SMAState(smoothing_length)
+        else:
+            self.smoother = PresmaEMAState(smoothing_length)
+
+    def update(self, close):
+        rsi = self.rsi.update(close)
+        if self.smoothing == 'sma':
+            smoothed = self.smoother.update(2 * (rsi - 50) / 100)
+            return float(np.tanh(smoothed))
+        smoothed = self.smoother.update(0.1 * (rsi - 50))
+        return float((np.exp(2 * smoothed) - 1) / (np.exp(2 * smoothed) + 1))
+
+
+class BankeryState(StreamingState):
+    """
+    Bankery indicator, matching 'strategies.bankery_lines' and the 'Entry' signal.
+
+    The output of every bar is a tuple (fundtrend, bullbearline, entry).
+    """
+
+    INPUTS = ('open', 'high', 'low', 'close')
+
+    def __init__(self):
+        self.min_low_27 = RollingExtremumState(27, 'min')
+        self.max_high_27 = RollingExtremumState(27, 'max')
+        self.min_low_34 = RollingExtremumState(34, 'min')
+        self.max_high_34 = RollingExtremumState(34, 'max')
+        self.sma1 = SMAState(5)
+        self.sma2 = SMAState(3)
+        self.bullbear = EWMState(span=13, adjust=False)
+
+    def update(self, open_, high, low, close):
+        open_, high, low, close = float(open_), float(high), float(low), float(close)
+
+        # 'fundtrend' from the position of the close within the 27-bar range
+        rolling_min = self.min_low_27.update(low)
+        rolling_range = self.max_high_27.update(high) - rolling_min
+        percentage_change = _div(close - rolling_min, rolling_range) * 100
+        sma1 = self.sma1.update(percentage_change)
+        sma2 = self.sma2.update(sma1)
+        fundtrend = (3 * sma1 - 2 * sma2 - 50) * 1.032 + 50
+
+        # 'bullbearline' from the typical price within the 34-bar range
+        typ = (2 * close + high + low + open_) / 5
+        lol = self.min_low_34.update(low)
+        hoh = self.max_high_34.update(high)
+        bullbearline = self.bullbear.update(_div(typ - lol, hoh - lol) * 100)
+
+        entry = (fundtrend > bullbearline) and (bullbearline < 25)
+        return fundtrend, bullbearline, entry
+
+
+def _timestamps(data):
+    # Bar timestamps as datetime64, from a 'datetime' column or the index
+    values = data['datetime'] if 'datetime' in data else data.index
+    return pd.DatetimeIndex(values).values.astype('datetime64[ns]')
+
+
+class StateStore:
+    """
+    Saved streaming states keyed by (exchange, symbol, interval, name).
+
+    Every record holds the state after the last committed bar, that bar's
+    timestamp and input values (to detect a re-adjusted history) and the
+    outputs of the last two committed bars.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+
+    def _path(self, exchange, symbol, interval, name):
+        exchange, symbol = split_symbol(symbol, exchange)
+        safe = symbol.replace('/', '_').replace('\\', '_')
+        return os.path.join(self.root, interval_value(interval), exchange, safe, f'{name}.json')
+
+    def load(self, exchange, symbol, interval, name):
+        """
+        Return the saved record, or None if there is none.
+        """
+        path = self._path(exchange, symbol, interval, name)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            record = json.load(f)
+        record['state'] = StreamingState.from_dict(record['state'])
+        return record
+
+    def save(self, exchange, symbol, interval, name, record):
+        """
+        Write a record (state, timestamp, outputs) to disk.
+        """
+        path = self._path(exchange, symbol, interval, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = dict(record, state=record['state'].to_dict())
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def resume(self, exchange, symbol, interval, name, factory, data):
+        """
+        Bring a saved state up to date with 'data' and evaluate the latest bar.
+
+        All bars newer than the saved state except the last one are committed to
+        the state; the last (possibly still forming) bar is evaluated on a copy,
+        so it can be re-evaluated with fresh values on the next run. Without a
+        usable saved state, the state is rebuilt from the whole of 'data'.
+
+        Parameters:
+        - exchange, symbol, interval: Key of the series.
+        - name: Name of the indicator state (e.g., 'rsi_14').
+        - factory: Callable returning a fresh state object.
+        - data: DataFrame of bars with a 'datetime' column or a datetime index.
+
+        The saved state is only resumed when its last committed bar is present in
+        'data' with the same input values; a history re-adjusted for a split or a
+        dividend keeps its timestamps but not its prices, so the state is rebuilt.
+
+        Returns:
+        - A list [previous output, last output] for the last two bars of 'data'
+          (None where there is no bar).
+        """
+        times = _timestamps(data)
+        columns = [data[column].to_numpy(dtype=np.float64) for column in factory().INPUTS]
+
+        record = None
+        try:
+            record = self.load(exchange, symbol, interval, name)
+        except (OSError, ValueError, KeyError):
+            record = None
+
+        start = 0
+        if record is not None:
+            committed = np.datetime64(record['timestamp'], 'ns')
+            start = int(np.searchsorted(times, committed, side='right'))
+            # The saved state must end on a bar that is present in 'data', with the same values
+            if (start == 0 or times[start - 1] != committed or record.get('bar') is None
+                    or not np.allclose([column[start - 1] for column in columns], record['bar'],
+                                       rtol=BAR_RTOL, atol=0, equal_nan=True)):
+                record = None
+                start = 0
+        if record is None:
+            record = {'state': factory(), 'timestamp': None, 'bar': None, 'outputs': [None, None]}
+
+        state = record['state']
+        outputs = record['outputs']
+        if start >= len(times):
+            # No new bar since the last run
+            return outputs
+
+        # Commit every new bar except the last one
+        for row in range(start, len(times) - 1):
+            outputs = [outputs[-1], state.update(*(column[row] for column in columns))]
+            record['timestamp'] = str(times[row])
+            record['bar'] = [float(column[row]) for column in columns]
+        record['outputs'] = outputs
+        if record['timestamp'] is not None:
+            self.save(exchange, symbol, interval, name, record)
+
+        # Evaluate the last bar without committing it
+        latest = copy.deepcopy(state).update(*(column[-1] for column in columns))
+        return [outputs[-1], latest]
+
+
+def verify_resume(data, factory, split=2.0, new_bars=5, root=None):
+    """
+    Check resumed states against a full recompute, including across a re-adjusted history.
+
+    In both cases the state is saved without the last 'new_bars' bars of 'data' (as
+    on the previous scan) and then resumed:
+    on the whole of 'data', and on a copy refetched after a split (every price
+    divided by 'split', the timestamps unchanged), which must rebuild the state
+    instead of continuing the stale one on the rescaled prices.
+
+    Parameters:
+    - data: DataFrame of bars with the state's input columns and a datetime index.
+    - factory: Callable returning a fresh state object.
+    - split: Adjustment factor of the refetched history.
+    - new_bars: Number of bars that arrived since the state was saved.
+    - root: Directory of the temporary state store (defaults to a new temporary folder).
+
+    Returns:
+    - A DataFrame with, per case, the resumed and recomputed last output and whether they match.
+    """
+    store = StateStore(root or tempfile.mkdtemp())
+    adjusted = data.copy()
+    prices = [column for column in ('open', 'high', 'low', 'close') if column in adjusted]
+    adjusted[prices] = adjusted[prices] / split
+
+    rows = []
+    for case, frame in (('resume', data), ('adjusted refetch', adjusted)):
+        store.resume('VERIFY', case, '1D', 'verify', factory, data.iloc[:-new_bars])
+        resumed = store.resume('VERIFY', case, '1D', 'verify', factory, frame)[-1]
+        full = factory().run(frame)[-1]
+        rows.append([case, resumed, full, bool(np.allclose(resumed, full, rtol=1e-9, equal_nan=True))])
+    return pd.DataFrame(rows, columns=['Case', 'Resumed', 'Recomputed', 'OK'])
+
+if __name__ == '__main__':
+    # Self-check on a random walk: python streaming.py
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 600)))
+    bars = pd.DataFrame({'open': close * np.exp(rng.normal(0, 0.005, 600)), 'close': close},
+                        index=pd.date_range('2022-01-01', periods=600, freq='D', name='datetime'))
+    bars['high'] = bars[['open', 'close']].max(axis=1) * 1.01
+    bars['low'] = bars[['open', 'close']].min(axis=1) * 0.99
+    for name, factory in (('rsi_14', lambda: RSIState(14)), ('ift_5_9', lambda: RSIIFTState(5, 9)),
+                          ('bankery', BankeryState)):
+        print(f"\n{name}:")
+        print(verify_resume(bars, factory).to_string(index=False))
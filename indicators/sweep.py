@@ -0,0 +1,134 @@
+"""
+Parallel parameter sweep for the IFT-RSI signal.
+
+Evaluates a grid of (rsi_length, smoothing, smoothing_length, threshold) on a
+local price history with the vectorized backtester. The work is split by RSI
+length: every task computes its RSI once, derives the IFT of every smoothing
+variant from it, and scores every threshold on that IFT. Tasks run on a
+process pool and the results come back as one table ranked by a metric.
+
+Usage:
+    python sweep.py ../datasets/modified_bitcoin_data_hourly_1.csv
+    python sweep.py prices.csv --rsi-lengths 3 5 8 --smoothing-lengths 5 9 13 --thresholds -0.7 -0.5 --rank-by total_return
+"""
+
+# Import required libraries
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+
+from strategies import rsi_ift_from_rsi
+from backtest import _fired, load_prices, run_backtest
+
+# Default grid: 20 RSI lengths x 25 smoothing lengths x 10 thresholds x 2 smoothings = 10,000 cells
+RSI_LENGTHS = list(range(2, 22))
+SMOOTHING_LENGTHS = list(range(2, 27))
+THRESHOLDS = [round(-0.9 + 0.1 * i, 1) for i in range(10)]
+SMOOTHINGS = ['sma', 'ema']
+
+
+def sweep_rsi_length(close, rsi_length, smoothing_lengths, thresholds, smoothings, hold=24, cost=0.001,
+                     bars_per_year=365 * 24):
+    """
+    Score every grid cell sharing one RSI length.
+
+    Parameters:
+    - close: NumPy array of closing prices in chronological order.
+    - rsi_length: RSI length of this task.
+    - smoothing_lengths, thresholds, smoothings: The other grid axes.
+    - hold, cost, bars_per_year: Passed to backtest.run_backtest.
+
+    Returns:
+    - A list of dictionaries, one per grid cell, with the parameters and the backtest statistics.
+    """
+    data = pd.DataFrame({'close': close})
+    rsi = ta.rsi(data['close'], length=rsi_length)  # Computed once for the whole task
+    rows = []
+    for smoothing in smoothings:
+        for smoothing_length in smoothing_lengths:
+            ift = rsi_ift_from_rsi(rsi, smoothing_length=smoothing_length, smoothing=smoothing)
+            for threshold in thresholds:
+                # Same signal as backtest.ift_entries (NaN comparisons are False, so the warm-up bars never fire)
+                entries = _fired(ift <= threshold).to_numpy()
+                _, _, stats = run_backtest(data, entries, hold=hold, cost=cost, bars_per_year=bars_per_year)
+                rows.append(dict(rsi_length=rsi_length, smoothing=smoothing, smoothing_length=smoothing_length,
+                                 threshold=threshold, **stats))
+    return rows
+
+
+def run_sweep(close, rsi_lengths=RSI_LENGTHS, smoothing_lengths=SMOOTHING_LENGTHS, thresholds=THRESHOLDS,
+              smoothings=SMOOTHINGS, rank_by='sharpe', min_trades=10, workers=None, **options):
+    """
+    Evaluate the whole grid on a process pool.
+
+    Parameters:
+    - close: NumPy array of closing prices in chronological order.
+    - rsi_lengths, smoothing_lengths, thresholds, smoothings: Grid axes.
+    - rank_by: Statistic to rank by (a key of the backtest statistics), best first.
+    - min_trades: Cells with fewer trades are ranked last.
+    - workers: Number of processes (defaults to the number of CPUs).
+    - options: Passed to sweep_rsi_length (hold, cost, bars_per_year).
+
+    Returns:
+    - A DataFrame with one row per grid cell, ranked by 'rank_by'.
+    """
+    close = np.asarray(close, dtype=float)
+    workers = workers or os.cpu_count() or 1
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(sweep_rsi_length, close, rsi_length, smoothing_lengths, thresholds, smoothings,
+                               **options) for rsi_length in rsi_lengths]
+        for future in futures:
+            rows.extend(future.result())
+
+    table = pd.DataFrame(rows)
+    table['eligible'] = table['trades'] >= min_trades
+    table = table.sort_values(['eligible', rank_by], ascending=[False, False], kind='stable')
+    return table.drop(columns='eligible').reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep the IFT-RSI parameters on a price history.")
+    parser.add_argument('file', nargs='?',
+                        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datasets',
+                                             'modified_bitcoin_data_hourly_1.csv'),
+                        help="OHLCV CSV file in chronological order.")
+    parser.add_argument('--rsi-lengths', nargs='+', type=int, default=RSI_LENGTHS)
+    parser.add_argument('--smoothing-lengths', nargs='+', type=int, default=SMOOTHING_LENGTHS)
+    parser.add_argument('--thresholds', nargs='+', type=float, default=THRESHOLDS,
+                        help="Entry when IFT_RSI drops to the threshold or below.")
+    parser.add_argument('--smoothings', nargs='+', choices=SMOOTHINGS, default=SMOOTHINGS)
+    parser.add_argument('--hold', type=int, default=24, help="Number of bars each trade is held.")
+    parser.add_argument('--cost', type=float, default=0.001, help="Cost per side as a fraction of the price.")
+    parser.add_argument('--bars-per-year', type=int, default=365 * 24, help="Bars per year (hourly crypto by default).")
+    parser.add_argument('--rank-by', default='sharpe', help="Statistic to rank by, best first.")
+    parser.add_argument('--min-trades', type=int, default=10, help="Rank cells with fewer trades last.")
+    parser.add_argument('--workers', type=int, help="Number of processes.")
+    parser.add_argument('--top', type=int, default=20, help="Number of rows to print.")
+    parser.add_argument('--output', help="Write the ranked table to this CSV file.")
+    args = parser.parse_args(argv)
+
+    close = load_prices(args.file)['close'].to_numpy(dtype=float)
+    n_cells = len(args.rsi_lengths) * len(args.smoothing_lengths) * len(args.thresholds) * len(args.smoothings)
+    print(f"Sweeping {n_cells} combinations on {len(close)} bars...")
+
+    start = time.time()
+    table = run_sweep(close, args.rsi_lengths, args.smoothing_lengths, args.thresholds, args.smoothings,
+                      rank_by=args.rank_by, min_trades=args.min_trades, workers=args.workers,
+                      hold=args.hold, cost=args.cost, bars_per_year=args.bars_per_year)
+    print(f"Done in {time.time() - start:.1f}s\n")
+
+    pd.set_option('display.width', 200)
+    print(table.head(args.top).to_string())
+    if args.output:
+        table.to_csv(args.output, index=False)
+    return table
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Warm-up-aware tail evaluation of the scanner signals.
+
+The scanners only look at the last one or two values of every indicator, but
+they fetch and compute 1000 bars per symbol. Every indicator here declares the
+number of bars it needs before its last values are settled:
+
+- Rolling windows (SMA, rolling min/max) need exactly their window length.
+- EWMs (the Bankery EMA(13), the RSI's RMA and the IFT's EMA(9)) never fully
+  forget their start, but the weight left on the bars before the window decays
+  as (1 - alpha) ** n. The warm-up is the smallest n for which that weight is
+  below TOLERANCE.
+
+Tail evaluation fetches only that window and computes every strategy for the
+whole universe at once on stacked NumPy arrays (see panel.py), without copying
+and re-indexing each symbol's DataFrame. Because the EWMs start from a
+different seed, the values are not bit-for-bit those of the full history; use
+'verify_tail' to measure the difference on real bars.
+"""
+
+# Import required libraries
+import math
+
+import numpy as np
+import pandas as pd
+
+from panel import stack_panel, bankery_panel, rsi_panel, rsi_ift_panel
+
+# Largest weight the truncated history may still carry in an EWM
+TOLERANCE = 1e-6
+
+
+def ewm_warmup(alpha, tolerance=TOLERANCE):
+    """
+    Return the number of bars after which an EWM has forgotten its start.
+
+    Parameters:
+    - alpha: Smoothing factor of the EWM (2 / (span + 1) for an EMA, 1 / length for an RMA).
+    - tolerance: Largest weight left on the bars before the window.
+
+    Returns:
+    - The smallest n such that (1 - alpha) ** n <= tolerance.
+    """
+    return int(math.ceil(math.log(tolerance) / math.log(1 - alpha)))
+
+
+class TailStrategy:
+    """
+    A scanner signal computed on the last 'warmup' bars of every symbol.
+    """
+
+    def __init__(self, warmup, values, rule, scale=1.0):
+        """
+        Parameters:
+        - warmup: Number of bars needed for the last two values to be settled.
+        - values: Function of a panel (see stack_panel) returning a dictionary of
+          named (symbols x bars) indicator arrays.
+        - rule: Function of that dictionary returning a boolean array (one signal per symbol).
+        - scale: Typical range of the indicator values (100 for RSI-like oscillators),
+          used to turn TOLERANCE into an absolute tolerance.
+        """
+        self.warmup = warmup
+        self.values = values
+        self.rule = rule
+        self.scale = scale
+
+
+def _last_valid(values, k=1):
+    # k-th last non-NaN value of every row (NaN where a row has fewer valid values)
+    valid = ~np.isnan(values)
+    position = values.shape[1] - 1 - np.argmax(np.cumsum(valid[:, ::-1], axis=1) >= k, axis=1)
+    result = values[np.arange(len(values)), position]
+    return np.where(valid.sum(axis=1) >= k, result, np.nan)
+
+
+def _bankery_values(panel):
+    fundtrend, bullbearline, entry = bankery_panel(panel)
+    return {'fundtrend': fundtrend, 'bullbearline': bullbearline, 'entry': entry}
+
+def _rsi_values(panel):
+    return {'rsi': rsi_panel(panel['close'], 14)}
+
+def _ift_values(smoothing):
+    return lambda panel: {'ift': rsi_ift_panel(panel['close'], 5, 9, smoothing)}
+
+
+# The 34-bar range plus the EMA(13) of 'bullbearline', and one more bar for the cross
+BANKERY_WARMUP = 34 + ewm_warmup(2 / 14) + 1
+# The RSI(14)'s RMA, one bar for the first difference and one for the cross
+RSI_WARMUP = ewm_warmup(1 / 14) + 2
+# The RSI(5)'s RMA and the SMA(9) of the BIST variant
+IFT_SMA_WARMUP = ewm_warmup(1 / 5) + 1 + 9
+# The RSI(5)'s RMA and the EMA(9) of the crypto variant, seeded after 9 bars
+IFT_EMA_WARMUP = ewm_warmup(1 / 5) + 1 + 9 + ewm_warmup(2 / 10)
+
+TAIL_STRATEGIES = {
+    'bankery': TailStrategy(BANKERY_WARMUP, _bankery_values,
+                            lambda v: ~v['entry'][:, -2] & v['entry'][:, -1], scale=100.0),
+    'rsi': TailStrategy(RSI_WARMUP, _rsi_values,
+                        lambda v: (_last_valid(v['rsi'], 2) < 30) & (_last_valid(v['rsi']) >= 30), scale=100.0),
+    'ift_bist': TailStrategy(IFT_SMA_WARMUP, _ift_values('sma'),
+                             lambda v: _last_valid(v['ift']) < -0.5),
+    'ift_crypto': TailStrategy(IFT_EMA_WARMUP, _ift_values('ema'),
+                               lambda v: _last_valid(v['ift']) <= -0.5),
+    'ift_range': TailStrategy(IFT_EMA_WARMUP, _ift_values('ema'),
+                              lambda v: (-0.5 <= _last_valid(v['ift'])) & (_last_valid(v['ift']) <= 0.5)),
+}
+
+
+def warmup(strategies):
+    """
+    Return the number of bars to fetch for tail evaluation of the given strategies.
+    """
+    return max(TAIL_STRATEGIES[name].warmup for name in strategies)
+
+
+def _tail(panel, n_bars):
+    # The panel is right-aligned, so the last columns are the last bars of every symbol
+    return {column: values[:, -n_bars:] for column, values in panel.items()}
+
+
+def evaluate_tail(frames, strategies):
+    """
+    Evaluate strategies on the warm-up window of every symbol.
+
+    Parameters:
+    - frames: List of (symbol, DataFrame) pairs with 'open', 'high', 'low', 'close'.
+      Longer histories are cut to each strategy's warm-up.
+    - strategies: List of strategy names (keys of TAIL_STRATEGIES).
+
+    Returns:
+    - A dictionary mapping each strategy to a list of booleans, one per symbol.
+    """
+    if not frames:
+        return {name: [] for name in strategies}
+    _, panel = stack_panel(frames)
+    signals = {}
+    for name in strategies:
+        strategy = TAIL_STRATEGIES[name]
+        values = strategy.values(_tail(panel, strategy.warmup))
+        signals[name] = [bool(signal) for signal in strategy.rule(values)]
+    return signals
+
+
+def verify_tail(frames, strategies, tolerance=TOLERANCE):
+    """
+    Compare the tail-window indicator values with the full-history ones.
+
+    Parameters:
+    - frames: List of (symbol, DataFrame) pairs with the full history.
+    - strategies: List of strategy names (keys of TAIL_STRATEGIES).
+    - tolerance: Allowed difference relative to each indicator's scale.
+
+    Returns:
+    - A DataFrame with, per strategy and indicator, the largest absolute difference
+      on the last two bars, the allowed difference, and the number of symbols whose
+      signal differs.
+    """
+    _, panel = stack_panel(frames)
+    rows = []
+    for name in strategies:
+        strategy = TAIL_STRATEGIES[name]
+        full = strategy.values(panel)
+        tail = strategy.values(_tail(panel, strategy.warmup))
+        mismatches = int((strategy.rule(full) != strategy.rule(tail)).sum())
+        for key in full:
+            if full[key].dtype == bool:
+                continue
+            difference = np.abs(full[key][:, -2:] - tail[key][:, -2:])
+            rows.append([name, key, float(np.nanmax(difference, initial=0.)),
+                         tolerance * strategy.scale, mismatches])
+    report = pd.DataFrame(rows, columns=['Strategy', 'Indicator', 'Max Difference', 'Tolerance', 'Signal Mismatches'])
+    report['OK'] = report['Max Difference'] <= report['Tolerance']
+    return report
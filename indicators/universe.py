@@ -0,0 +1,281 @@
+"""
+Cached, pre-filtered symbol universe with exchange routing.
+
+The scanners used to call get_all_symbols(market) on every start and then
+request every symbol with one hard-coded exchange. SymbolUniverse instead:
+
+- caches the symbol list of every market on disk and refreshes it only when it
+  is older than the TTL (a failed refresh falls back to the stale copy),
+- keeps every symbol as an 'EXCHANGE:SYMBOL' ticker, so that NYSE/AMEX (or
+  GATEIO) names are requested from their own exchange,
+- stores attributes known before any bar is fetched (type, last close and
+  volume from the screener, or the volume of the locally stored bars) so that
+  a scan can skip irrelevant symbols,
+- remembers the symbols that returned no data on several separate runs (and
+  have no stored bars), and skips them until the mark expires, instead of
+  spending a request on them on every scan.
+
+Usage:
+    python universe.py america --refresh
+    python universe.py america --exchanges NASDAQ --min-volume 100000
+"""
+
+# Import required libraries
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, split_symbol
+
+# Default location of the cached lists, next to the other datasets (the DATASETS_DIR environment variable moves them)
+DATASETS_DIR = os.environ.get('DATASETS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'datasets'))
+DEFAULT_ROOT = os.path.join(DATASETS_DIR, 'universe')
+
+# Columns of a cached symbol list
+COLUMNS = ['ticker', 'exchange', 'symbol', 'type', 'close', 'volume']
+
+# Upper bound on the number of rows requested from the screener per market
+LISTING_LIMIT = 100000
+
+
+def fetch_listing(market):
+    """
+    Download the symbol list of a market.
+
+    Uses the screener query (with type, last close and volume) when the installed
+    tradingview_screener provides it, and get_all_symbols otherwise.
+
+    Parameters:
+    - market: Screener market name (e.g., 'america', 'turkey', 'crypto').
+
+    Returns:
+    - A DataFrame with the COLUMNS, one row per ticker.
+    """
+    try:
+        from tradingview_screener import Query
+    except ImportError:
+        Query = None
+
+    if Query is not None:
+        _, data = (Query().set_markets(market)
+                   .select('name', 'type', 'close', 'volume')
+                   .limit(LISTING_LIMIT)
+                   .get_scanner_data())
+        listing = pd.DataFrame({'ticker': data['ticker'],
+                                'type': data['type'] if 'type' in data else None,
+                                'close': data['close'] if 'close' in data else np.nan,
+                                'volume': data['volume'] if 'volume' in data else np.nan})
+    else:
+        from tradingview_screener import get_all_symbols
+
+        listing = pd.DataFrame({'ticker': get_all_symbols(market=market), 'type': None,
+                                'close': np.nan, 'volume': np.nan})
+
+    parts = [split_symbol(ticker, '') for ticker in listing['ticker']]
+    listing['exchange'] = [exchange for exchange, _ in parts]
+    listing['symbol'] = [symbol for _, symbol in parts]
+    listing = listing.drop_duplicates('ticker').sort_values('ticker').reset_index(drop=True)
+    return listing[COLUMNS]
+
+
+class SymbolUniverse:
+    """
+    On-disk index of the tradable symbols of every market.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, ttl_hours=24, dead_days=7, dead_runs=3, store=None):
+        """
+        Parameters:
+        - root: Directory holding the cached lists.
+        - ttl_hours: Age after which a market's list is downloaded again.
+        - dead_days: How long a symbol that returned no data is skipped (counted from its last empty answer).
+        - dead_runs: Number of separate runs a symbol must return no data on before it is skipped.
+        - store: BarStore used for the volume of symbols the screener gave none for (default BarStore()).
+        """
+        self.root = root
+        self.ttl_hours = ttl_hours
+        self.dead_days = dead_days
+        self.dead_runs = dead_runs
+        self.store = store or BarStore()
+
+    def _path(self, market, suffix):
+        return os.path.join(self.root, f'{market}{suffix}')
+
+    def _write_json(self, path, value):
+        os.makedirs(self.root, exist_ok=True)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(value, f)
+        os.replace(path + '.tmp', path)
+
+    def age_hours(self, market):
+        """
+        Return the age of the cached list of a market in hours, or None if nothing is cached.
+        """
+        path = self._path(market, '.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return (time.time() - json.load(f)['fetched_at']) / 3600
+
+    def _stored_volume(self, listing, interval='1D', bars=20):
+        # Median volume of the last stored bars, for the symbols without a screener volume
+        volume = listing['volume'].to_numpy(dtype=float).copy()
+        for row in np.flatnonzero(np.isnan(volume)):
+            data = self.store.load(listing.at[row, 'exchange'], listing.at[row, 'symbol'], interval)
+            if data is not None and len(data):
+                volume[row] = float(np.median(data['volume'].to_numpy()[-bars:]))
+        listing['volume'] = volume
+        return listing
+
+    def listing(self, market, refresh=False):
+        """
+        Return the symbol list of a market, downloading it when the cache is missing or expired.
+
+        Parameters:
+        - market: Screener market name.
+        - refresh: Download the list even when the cache is still fresh.
+
+        Returns:
+        - A DataFrame with the COLUMNS.
+        """
+        csv_path = self._path(market, '.csv')
+        age = self.age_hours(market)
+        if not refresh and age is not None and age < self.ttl_hours:
+            return pd.read_csv(csv_path, keep_default_na=False, na_values=[''])
+
+        try:
+            listing = self._stored_volume(fetch_listing(market))
+        except Exception as e:
+            if age is None:
+                raise
+            print(f"Could not refresh the {market} symbol list ({e}), using the copy from {age:.0f} hours ago")
+            return pd.read_csv(csv_path, keep_default_na=False, na_values=[''])
+
+        os.makedirs(self.root, exist_ok=True)
+        listing.to_csv(csv_path + '.tmp', index=False)
+        os.replace(csv_path + '.tmp', csv_path)
+        self._write_json(self._path(market, '.json'), {'fetched_at': time.time(), 'rows': len(listing)})
+        return listing
+
+    def _records(self, market):
+        # Empty-answer records of a market, without the expired ones
+        path = self._path(market, '.dead.json')
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            records = json.load(f)
+        cutoff = time.time() - self.dead_days * 86400
+        return {ticker: record for ticker, record in records.items() if record.get('last', record['since']) >= cutoff}
+
+    def dead(self, market):
+        """
+        Return the symbols currently skipped because they returned no data, as {ticker: record}.
+        """
+        return {ticker: record for ticker, record in self._records(market).items()
+                if record.get('runs', 1) >= self.dead_runs}
+
+    def record_results(self, market, results, exchange=None, interval='1D', engine=None, max_failure_rate=0.05):
+        """
+        Update the dead-symbol list from the results of a fetch.
+
+        tvDatafeed also answers None on receive errors, timeouts and rate limiting,
+        so a single empty answer proves nothing. A symbol is only skipped once it
+        came back empty on 'dead_runs' separate runs (each record counts the empty
+        runs in 'runs'; a record without it counts as one run), and an empty answer
+        is not counted when:
+
+        - bars are stored for the symbol (it had data before, the answer is transient),
+        - the symbol's own request failed with an error or a timeout on any attempt,
+        - the run as a whole was unhealthy: more than 'max_failure_rate' of the
+          symbols failed on an attempt or only returned data on a retry (the feed
+          was dropping requests).
+
+        Symbols that returned data are cleared.
+
+        Parameters:
+        - market: Screener market name.
+        - results: List of (symbol, data, error) tuples from FetchEngine/BarStore.
+        - exchange: Exchange of the symbols given without an 'EXCHANGE:' prefix.
+        - interval: Interval of the fetched bars (to look up the stored ones).
+        - engine: FetchEngine that produced the results, whose attempt counters tell
+          which symbols failed and how healthy the run was.
+        - max_failure_rate: Share of unhealthy symbols above which nothing is counted.
+        """
+        records = self._records(market)
+        now = time.time()
+        failed = {symbol for symbol, _, error in results if error is not None}
+        recovered = 0
+        if engine is not None:
+            failed |= engine.failed_items
+            recovered = engine.recovered
+        healthy = (len(failed) + recovered) <= max_failure_rate * len(results)
+        for symbol, data, error in results:
+            symbol_exchange, name = split_symbol(symbol, exchange or '')
+            ticker = f'{symbol_exchange}:{name}'
+            if data is not None and len(data) > 0:
+                records.pop(ticker, None)
+            elif healthy and symbol not in failed and self.store.read_meta(symbol_exchange, name, interval) is None:
+                # Counted once per run; only 'dead_runs' empty runs make it dead
+                if ticker in records:
+                    records[ticker]['runs'] = records[ticker].get('runs', 1) + 1
+                else:
+                    records[ticker] = {'since': now, 'runs': 1}
+                records[ticker]['last'] = now
+        self._write_json(self._path(market, '.dead.json'), records)
+
+    def select(self, market, exchanges=None, types=None, min_volume=None, min_price=None,
+               include_dead=False, refresh=False):
+        """
+        Return the tickers of a market that pass the filters.
+
+        Attributes that are unknown (no screener value and nothing stored locally)
+        never exclude a symbol.
+
+        Parameters:
+        - market: Screener market name.
+        - exchanges: Keep only these exchanges (e.g., ['NASDAQ']).
+        - types: Keep only these screener types (e.g., ['stock', 'dr']).
+        - min_volume: Minimum last-known volume.
+        - min_price: Minimum last-known close.
+        - include_dead: Also return the symbols that recently returned no data.
+        - refresh: Download the list even when the cache is still fresh.
+
+        Returns:
+        - A sorted list of 'EXCHANGE:SYMBOL' tickers.
+        """
+        listing = self.listing(market, refresh=refresh)
+        keep = pd.Series(True, index=listing.index)
+        if exchanges is not None:
+            keep &= listing['exchange'].isin(exchanges)
+        if types is not None:
+            keep &= listing['type'].isna() | listing['type'].isin(types)
+        if min_volume is not None:
+            keep &= listing['volume'].isna() | (listing['volume'] >= min_volume)
+        if min_price is not None:
+            keep &= listing['close'].isna() | (listing['close'] >= min_price)
+        if not include_dead:
+            keep &= ~listing['ticker'].isin(list(self.dead(market)))
+        return sorted(listing.loc[keep, 'ticker'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Show (and refresh) the cached symbol universe of a market.")
+    parser.add_argument('market', help="Screener market name (e.g., america, turkey, crypto).")
+    parser.add_argument('--refresh', action='store_true', help="Download the symbol list again.")
+    parser.add_argument('--exchanges', nargs='+', help="Keep only these exchanges.")
+    parser.add_argument('--types', nargs='+', help="Keep only these screener types.")
+    parser.add_argument('--min-volume', type=float, help="Minimum last-known volume.")
+    parser.add_argument('--min-price', type=float, help="Minimum last-known close.")
+    args = parser.parse_args()
+
+    universe = SymbolUniverse()
+    tickers = universe.select(args.market, exchanges=args.exchanges, types=args.types, min_volume=args.min_volume,
+                              min_price=args.min_price, refresh=args.refresh)
+    listing = universe.listing(args.market)
+    print(f"{len(tickers)} of {len(listing)} symbols selected "
+          f"({len(universe.dead(args.market))} skipped as dead, list {universe.age_hours(args.market):.1f} hours old)")
+    print(pd.Series([ticker.split(':', 1)[0] for ticker in tickers], dtype=object).value_counts().to_string())